@@ -1,20 +1,26 @@
 """
 AI Models Package for Violation Detection
+
+Detector classes are imported on first access so that importing the
+package (e.g. for the detector pool) does not pull in MediaPipe.
 """
-from .face_detection import FaceDetector
-from .eye_gaze_tracking import EyeGazeTracker
-from .phone_detection import PhoneDetector
-from .sound_detection import SoundDetector
-from .background_blur import BackgroundBlurDetector
-from .person_detection import PersonDetector
-from .head_movement_detector import HeadMovementDetector
+import importlib
+
+_EXPORTS = {
+    'FaceDetector': 'face_detection',
+    'EyeGazeTracker': 'eye_gaze_tracking',
+    'PhoneDetector': 'phone_detection',
+    'SoundDetector': 'sound_detection',
+    'BackgroundBlurDetector': 'background_blur',
+    'PersonDetector': 'person_detection',
+    'HeadMovementDetector': 'head_movement_detector'
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'FaceDetector',
-    'EyeGazeTracker',
-    'PhoneDetector',
-    'SoundDetector',
-    'BackgroundBlurDetector',
-    'PersonDetector',
-    'HeadMovementDetector'
-]
\ No newline at end of file
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = importlib.import_module(f'.{_EXPORTS[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
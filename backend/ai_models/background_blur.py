@@ -10,16 +10,20 @@ logger = logging.getLogger(__name__)
 class BackgroundBlurDetector:
     """Detect background blur enforcement"""
     
+    # Full analysis frame: the Laplacian variance threshold is tuned for it
+    input_width = None
+    
     def __init__(self):
         """Initialize background blur detector"""
         self.blur_threshold = 50  # Threshold for blur detection
         
-    def detect_blur_status(self, frame):
+    def detect_blur_status(self, frame, gray=None):
         """
         Detect if background is blurred
         
         Args:
             frame: Input video frame
+            gray: Optional pre-converted grayscale copy of the frame
             
         Returns:
             dict: Blur detection results
@@ -33,7 +37,8 @@ class BackgroundBlurDetector:
                 }
             
             # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
             # Calculate Laplacian variance (measure of blur)
             laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
@@ -64,13 +69,15 @@ class BackgroundBlurDetector:
                 'error': str(e)
             }
     
-    def detect_blur_removal_attempt(self, prev_frame, curr_frame):
+    def detect_blur_removal_attempt(self, prev_frame, curr_frame, prev_gray=None, curr_gray=None):
         """
         Detect if student is trying to remove blur
         
         Args:
             prev_frame: Previous frame
             curr_frame: Current frame
+            prev_gray: Optional grayscale copy of the previous frame
+            curr_gray: Optional grayscale copy of the current frame (same size as prev_gray)
             
         Returns:
             bool: True if blur removal attempt detected
@@ -79,8 +86,9 @@ class BackgroundBlurDetector:
             if prev_frame is None or curr_frame is None:
                 return False
             
-            prev_gray = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
-            curr_gray = cv2.cvtColor(curr_frame, cv2.COLOR_BGR2GRAY)
+            if prev_gray is None or curr_gray is None:
+                prev_gray = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
+                curr_gray = cv2.cvtColor(curr_frame, cv2.COLOR_BGR2GRAY)
             
             # Calculate difference
             diff = cv2.absdiff(prev_gray, curr_gray)
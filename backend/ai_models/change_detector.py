@@ -0,0 +1,98 @@
+"""
+Per-session frame change detection for adaptive sampling
+"""
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (result key, field, value that signals a problem)
+ALERT_FLAGS = (
+    ('phone', 'phone_detected', True),
+    ('persons', 'multiple_persons', True),
+    ('face', 'face_detected', False),
+    ('eye_gaze', 'is_suspicious', True),
+    ('head_movement', 'extreme_movement', True),
+    ('blur', 'removal_attempt', True),
+)
+
+
+class FrameChangeDetector:
+    """Decide whether a frame differs enough from the last analysed one to re-run detectors"""
+
+    def __init__(self, change_threshold=None, max_interval=None):
+        """
+        Args:
+            change_threshold: Mean absolute gray-level difference (0-255) that counts as motion
+            max_interval: Most consecutive frames that may reuse earlier results
+        """
+        from config import Config
+        self.change_threshold = Config.FRAME_CHANGE_THRESHOLD if change_threshold is None else change_threshold
+        self.max_interval = Config.FRAME_MAX_SKIP if max_interval is None else max_interval
+        self.reset()
+
+    def reset(self):
+        """Forget the reference frame and cached results"""
+        self.reference = None
+        self.last_results = None
+        self.last_detectors = None
+        self.interval = 1
+        self.frames_since_analysis = 0
+        self.stats = {'analyzed': 0, 'skipped': 0}
+
+    def change_score(self, small_gray):
+        """Mean absolute difference against the last analysed frame"""
+        if self.reference is None or self.reference.shape != small_gray.shape:
+            return None
+        return float(np.mean(cv2.absdiff(self.reference, small_gray)))
+
+    def check(self, small_gray, detectors):
+        """
+        Decide whether to run the detectors on this frame
+
+        Args:
+            small_gray: Downscaled grayscale frame
+            detectors: Frozen set of result keys requested (None = all)
+
+        Returns:
+            tuple: (should_analyze, change_score)
+        """
+        score = self.change_score(small_gray)
+        if score is None or self.last_results is None or detectors != self.last_detectors:
+            return True, score
+        if score > self.change_threshold:
+            return True, score
+        if self.frames_since_analysis + 1 >= self.interval:
+            return True, score
+        return False, score
+
+    def skipped(self):
+        """Record that cached results were reused for a frame"""
+        self.frames_since_analysis += 1
+        self.stats['skipped'] += 1
+
+    def update(self, small_gray, detectors, results, score):
+        """
+        Store a freshly analysed frame and adapt the sampling interval
+
+        Motion or any alert drops back to analysing every frame; quiet
+        frames double the interval up to max_interval.
+        """
+        moved = score is not None and score > self.change_threshold
+        if moved or self._has_alert(results):
+            self.interval = 1
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.reference = small_gray
+        self.last_results = results
+        self.last_detectors = detectors
+        self.frames_since_analysis = 0
+        self.stats['analyzed'] += 1
+
+    @staticmethod
+    def _has_alert(results):
+        for key, field, alert_value in ALERT_FLAGS:
+            if results.get(key, {}).get(field) is alert_value:
+                return True
+        return False
@@ -0,0 +1,155 @@
+"""
+Per-session pool of detection managers
+"""
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .frame_engine import DetectorTimings
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolEntry:
+    """A manager bound to one session, with a lock serialising its use"""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.lock = threading.Lock()
+
+
+class DetectorPool:
+    """
+    Bounded LRU pool of ViolationDetectionManager instances keyed by session
+
+    Each proctoring session gets its own manager so MediaPipe tracking
+    graphs and HeadMovementDetector state never see another student's
+    frames. Only requests for the same session wait on each other.
+    """
+
+    def __init__(self, max_size=32, factory=None):
+        """
+        Args:
+            max_size: Maximum number of managers kept in this process
+            factory: Callable returning a new manager (for tests)
+        """
+        self.max_size = max(1, int(max_size))
+        self.timings = DetectorTimings()
+        self._factory = factory
+        self._entries = OrderedDict()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'reused': 0, 'evicted': 0, 'released': 0}
+
+    def _new_manager(self):
+        if self._factory is not None:
+            return self._factory()
+        from .model_manager import ViolationDetectionManager
+        return ViolationDetectionManager(timings=self.timings)
+
+    def _checkout(self, session_id):
+        """Find or assign the entry for a session (pool lock held by caller)"""
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._entries.move_to_end(session_id)
+            return entry, False
+
+        if self._idle:
+            entry = _PoolEntry(self._idle.pop())
+            self._stats['reused'] += 1
+        elif len(self._entries) < self.max_size:
+            entry = None
+        else:
+            # Evict the least recently used session and take over its manager
+            evicted_id, entry = self._entries.popitem(last=False)
+            self._stats['evicted'] += 1
+            logger.info(f"Detector pool full, evicting session {evicted_id}")
+        if entry is not None:
+            self._entries[session_id] = entry
+        return entry, True
+
+    @contextmanager
+    def session(self, session_id):
+        """
+        Exclusive use of the manager assigned to a session
+
+        Usage:
+            with pool.session(session_id) as manager:
+                manager.analyze_frame(frame)
+        """
+        session_id = str(session_id)
+        with self._lock:
+            entry, fresh = self._checkout(session_id)
+            if entry is None:
+                # Build the manager outside the pool lock, it loads models
+                entry = _PoolEntry(None)
+                self._entries[session_id] = entry
+                self._stats['created'] += 1
+
+        with entry.lock:
+            if entry.manager is None:
+                entry.manager = self._new_manager()
+            elif fresh:
+                entry.manager.reset()
+            yield entry.manager
+
+    def release(self, session_id):
+        """
+        Free a session's manager when the session ends
+
+        Returns:
+            bool: True if the session held a manager
+        """
+        with self._lock:
+            entry = self._entries.pop(str(session_id), None)
+            if entry is None:
+                return False
+            self._stats['released'] += 1
+
+        with entry.lock:
+            if entry.manager is not None:
+                entry.manager.reset()
+                with self._lock:
+                    if len(self._entries) + len(self._idle) < self.max_size:
+                        self._idle.append(entry.manager)
+        return True
+
+    def prewarm(self):
+        """Build one fully loaded manager and park it for the next session"""
+        manager = self._new_manager()
+        if hasattr(manager, 'load_all'):
+            manager.load_all()
+        with self._lock:
+            if len(self._entries) + len(self._idle) < self.max_size:
+                self._idle.append(manager)
+                self._stats['created'] += 1
+        return manager
+
+    def stats(self):
+        """Pool occupancy and lifecycle counters"""
+        with self._lock:
+            return dict(self._stats, active=len(self._entries), idle=len(self._idle),
+                        max_size=self.max_size)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_detector_pool():
+    """Get or create the process-wide detector pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from config import Config
+                _pool = DetectorPool(max_size=Config.DETECTOR_POOL_SIZE)
+    return _pool
+
+
+def release_session_detectors(session_id):
+    """Release a session's detectors if this process created any"""
+    if _pool is None:
+        return False
+    return _pool.release(session_id)
@@ -12,25 +12,66 @@ logger = logging.getLogger(__name__)
 class EyeGazeTracker:
     """Track eye gaze direction for suspicious behavior"""
     
+    # Full analysis frame: iris landmarks need every pixel around the eyes
+    input_width = None
+    
+    # ROI shift (fraction of its size) above which the landmark tracker is restarted
+    ROI_RESET_THRESHOLD = 0.1
+    
     def __init__(self):
         """Initialize eye gaze tracker"""
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
+        self.face_mesh = self._create_face_mesh()
+        # Crop the tracker's landmarks are relative to (None = full frame)
+        self._roi = None
+        
+        # Eye landmark indices
+        self.LEFT_EYE_INDICES = [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398]
+        self.RIGHT_EYE_INDICES = [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246]
+        
+    def _create_face_mesh(self):
+        """Create a FaceMesh graph in tracking mode"""
+        return self.mp_face_mesh.FaceMesh(
             static_image_mode=False,
             max_num_faces=1,
             min_detection_confidence=0.5
         )
+    
+    def reset(self):
+        """Discard landmark tracking state from previous frames"""
+        self.face_mesh.close()
+        self.face_mesh = self._create_face_mesh()
+        self._roi = None
+    
+    def _stable_roi(self, roi):
+        """
+        Crop to feed FaceMesh for this frame
         
-        # Eye landmark indices
-        self.LEFT_EYE_INDICES = [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398]
-        self.RIGHT_EYE_INDICES = [33, 7, 163, 144, 145, 153, 154, 155, 133, 173, 157, 158, 159, 160, 161, 246]
+        FaceMesh tracks landmarks in the coordinates of the image it was
+        last given, so the previous crop is reused while the face stays
+        within ROI_RESET_THRESHOLD of it. A larger move (or switching
+        between a crop and the full frame) restarts the tracker.
+        """
+        previous = self._roi
+        if roi is not None and previous is not None:
+            px, py, pw, ph = previous
+            if max(abs(roi[0] - px) / pw, abs(roi[1] - py) / ph,
+                   abs(roi[2] - pw) / pw, abs(roi[3] - ph) / ph) <= self.ROI_RESET_THRESHOLD:
+                return previous
+        if roi != previous:
+            self.reset()
+            self._roi = roi
+        return roi
         
-    def detect_eye_gaze(self, frame):
+    def detect_eye_gaze(self, frame, frame_rgb=None, roi=None):
         """
         Detect eye gaze direction
         
         Args:
             frame: Input video frame
+            frame_rgb: Optional pre-converted RGB copy of the frame
+            roi: Optional (x, y, width, height) pixel box around the face;
+                only this crop is passed to FaceMesh
             
         Returns:
             dict: Eye gaze information
@@ -44,8 +85,15 @@ class EyeGazeTracker:
                     'is_suspicious': False
                 }
             
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.face_mesh.process(frame_rgb)
+            if frame_rgb is None:
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            h, w, c = frame.shape
+            roi = self._stable_roi(tuple(roi) if roi is not None else None)
+            if roi is not None:
+                rx, ry, rw, rh = roi
+                results = self.face_mesh.process(np.ascontiguousarray(frame_rgb[ry:ry + rh, rx:rx + rw]))
+            else:
+                results = self.face_mesh.process(frame_rgb)
             
             if not results.multi_face_landmarks:
                 return {
@@ -56,11 +104,16 @@ class EyeGazeTracker:
                 }
             
             landmarks = results.multi_face_landmarks[0].landmark
-            h, w, c = frame.shape
             
             # Get eye positions
             left_eye = self._get_eye_center(landmarks, self.LEFT_EYE_INDICES)
             right_eye = self._get_eye_center(landmarks, self.RIGHT_EYE_INDICES)
+            if roi is not None:
+                # Map crop-relative coordinates back to the full frame
+                scale = np.array([rw / w, rh / h])
+                offset = np.array([rx / w, ry / h])
+                left_eye = left_eye * scale + offset
+                right_eye = right_eye * scale + offset
             
             # Calculate gaze direction
             gaze_direction = self._calculate_gaze_direction(left_eye, right_eye, w, h)
@@ -11,6 +11,9 @@ logger = logging.getLogger(__name__)
 class FaceDetector:
     """Detect face presence and visibility"""
     
+    # Frame width this detector needs (the full-range model runs at 192x192; results are relative)
+    input_width = 320
+    
     def __init__(self):
         """Initialize face detection model"""
         self.mp_face_detection = mp.solutions.face_detection
@@ -20,12 +23,13 @@ class FaceDetector:
         )
         self.min_face_size = 0.05  # Minimum face size relative to frame
         
-    def detect_face(self, frame):
+    def detect_face(self, frame, frame_rgb=None):
         """
         Detect face in frame
         
         Args:
             frame: Input video frame
+            frame_rgb: Optional pre-converted RGB copy of the frame
             
         Returns:
             dict: Detection results with face presence and confidence
@@ -40,7 +44,8 @@ class FaceDetector:
                 }
             
             # Convert BGR to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if frame_rgb is None:
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             h, w, c = frame.shape
             
             # Detect faces
@@ -57,12 +62,15 @@ class FaceDetector:
             # Analyze detections
             face_sizes = []
             confidences = []
+            largest_bbox = None
             
             for detection in results.detections:
                 bbox = detection.location_data.relative_bounding_box
                 face_width = bbox.width
                 face_height = bbox.height
                 face_size = face_width * face_height
+                if not face_sizes or face_size > max(face_sizes):
+                    largest_bbox = (bbox.xmin, bbox.ymin, bbox.width, bbox.height)
                 face_sizes.append(face_size)
                 
                 if hasattr(detection, 'score'):
@@ -76,7 +84,8 @@ class FaceDetector:
                 'confidence': float(avg_confidence),
                 'face_count': len(face_sizes),
                 'face_size': float(avg_face_size),
-                'face_visible': avg_face_size > self.min_face_size
+                'face_visible': bool(avg_face_size > self.min_face_size),
+                'bbox': [float(v) for v in largest_bbox]  # Largest face: relative (xmin, ymin, width, height)
             }
             
         except Exception as e:
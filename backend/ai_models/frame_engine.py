@@ -0,0 +1,231 @@
+"""
+Frame decoding, shared frame conversions and timing for frame analysis
+"""
+import struct
+import time
+import threading
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Size of the downscaled grayscale copy used for cheap frame-to-frame comparisons
+SMALL_FRAME_SIZE = (160, 120)
+
+# cv2.imdecode flags that let libjpeg decode at 1/n scale
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# JPEG start-of-frame markers (SOF0-SOF15 except DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class FrameTooLarge(ValueError):
+    """Raised when an uploaded frame exceeds the byte or pixel budget"""
+
+
+def image_size(data):
+    """
+    Read (width, height) from a JPEG or PNG header without decoding
+
+    Returns:
+        tuple: (width, height), or None for other or malformed formats
+    """
+    try:
+        if data[:8] == b'\x89PNG\r\n\x1a\n':
+            return struct.unpack('>II', bytes(data[16:24]))
+        if data[:2] != b'\xff\xd8':
+            return None
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker == 0xFF:
+                i += 1
+                continue
+            length = struct.unpack('>H', bytes(data[i + 2:i + 4]))[0]
+            if marker in _JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', bytes(data[i + 5:i + 9]))
+                return width, height
+            i += 2 + length
+    except struct.error:
+        pass
+    return None
+
+
+def decode_frame(data, analysis_width=640, max_bytes=None, max_pixels=None):
+    """
+    Decode an uploaded image straight to the analysis resolution
+    
+    JPEGs wider than twice the analysis width are decoded at 1/2, 1/4 or
+    1/8 scale by libjpeg, so full-size pixels are never materialised. The
+    result is then downscaled once to analysis_width (aspect preserved).
+    
+    Args:
+        data: Encoded image bytes
+        analysis_width: Width every frame is normalised to (never upscaled)
+        max_bytes: Reject encoded images larger than this
+        max_pixels: Reject images whose source width * height exceeds this
+        
+    Returns:
+        BGR frame, or None if the data is not a decodable image
+        
+    Raises:
+        FrameTooLarge: If a budget is exceeded
+    """
+    if max_bytes and len(data) > max_bytes:
+        raise FrameTooLarge(f"Frame is {len(data)} bytes, limit is {max_bytes}")
+    
+    flag = cv2.IMREAD_COLOR
+    size = image_size(data)
+    if size is not None:
+        width, height = size
+        if max_pixels and width * height > max_pixels:
+            raise FrameTooLarge(f"Frame is {width}x{height}, limit is {max_pixels} pixels")
+        for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+            if width // factor >= analysis_width:
+                flag = reduced_flag
+                break
+    
+    frame = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if frame is None:
+        return None
+    if size is None and max_pixels and frame.shape[0] * frame.shape[1] > max_pixels:
+        raise FrameTooLarge(f"Frame is {frame.shape[1]}x{frame.shape[0]}, limit is {max_pixels} pixels")
+    return resize_to_width(frame, analysis_width)
+
+
+def resize_to_width(frame, width):
+    """Downscale a frame to the given width, keeping aspect ratio (never upscales)"""
+    h, w = frame.shape[:2]
+    if not width or w <= width:
+        return frame
+    height = max(1, int(round(h * width / w)))
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+class FrameContext:
+    """Lazily computed colour conversions of one frame, shared by all detectors"""
+
+    def __init__(self, frame):
+        """
+        Wrap a BGR frame
+
+        Args:
+            frame: Input video frame (BGR)
+        """
+        self.frame = frame
+        self._rgb = None
+        self._gray = None
+        self._small_gray = None
+        self._scaled = {}
+
+    @property
+    def valid(self):
+        """True if the frame holds pixel data"""
+        return self.frame is not None and self.frame.size > 0
+
+    @property
+    def rgb(self):
+        """RGB copy of the frame (converted once)"""
+        if self._rgb is None and self.valid:
+            self._rgb = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def gray(self):
+        """Grayscale copy of the frame (converted once)"""
+        if self._gray is None and self.valid:
+            self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def small_gray(self):
+        """Fixed-size downscaled grayscale copy for frame differencing"""
+        if self._small_gray is None and self.valid:
+            self._small_gray = cv2.resize(self.gray, SMALL_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+        return self._small_gray
+
+    def scaled(self, width):
+        """
+        Context for a copy of the frame downscaled to width
+        
+        Detectors declare the input width they need; each width is
+        resized once per frame and shared. Returns self when width is
+        None or not smaller than the frame.
+        """
+        if not width or not self.valid or self.frame.shape[1] <= width:
+            return self
+        ctx = self._scaled.get(width)
+        if ctx is None:
+            ctx = FrameContext(resize_to_width(self.frame, width))
+            self._scaled[width] = ctx
+        return ctx
+
+
+class DetectorTimings:
+    """Thread-safe accumulator of per-detector inference time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, name, elapsed_ms):
+        """Add one measurement for a detector"""
+        with self._lock:
+            entry = self._totals.setdefault(name, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+
+    def report(self):
+        """
+        Summarise recorded timings
+
+        Returns:
+            dict: {detector: {calls, total_ms, avg_ms, max_ms}}
+        """
+        with self._lock:
+            return {
+                name: {
+                    'calls': e['calls'],
+                    'total_ms': round(e['total_ms'], 3),
+                    'avg_ms': round(e['total_ms'] / e['calls'], 3) if e['calls'] else 0,
+                    'max_ms': round(e['max_ms'], 3)
+                } for name, e in self._totals.items()
+            }
+
+    def reset(self):
+        """Clear all recorded timings"""
+        with self._lock:
+            self._totals = {}
+
+
+def timed(fn, *args, **kwargs):
+    """
+    Call fn and measure wall time
+
+    Returns:
+        tuple: (result, elapsed milliseconds)
+    """
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def to_builtin(value):
+    """Recursively convert numpy scalars and arrays to JSON/BSON-safe Python types"""
+    if isinstance(value, dict):
+        return {k: to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -11,25 +11,39 @@ logger = logging.getLogger(__name__)
 class HeadMovementDetector:
     """Detect suspicious head movements"""
     
+    # Frame width this detector needs (Pose runs at 256x256; landmarks are relative)
+    input_width = 320
+    
     def __init__(self):
         """Initialize head movement detector"""
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
+        self.pose = self._create_pose()
+        
+        self.prev_head_position = None
+        self.movement_threshold = 0.15  # Relative movement threshold
+        self.extreme_angle_threshold = 45  # Degrees
+        
+    def _create_pose(self):
+        """Create a Pose graph in tracking mode"""
+        return self.mp_pose.Pose(
             static_image_mode=False,
             model_complexity=1,
             min_detection_confidence=0.5
         )
-        
+    
+    def reset(self):
+        """Discard pose tracking state and the previous head position"""
+        self.pose.close()
+        self.pose = self._create_pose()
         self.prev_head_position = None
-        self.movement_threshold = 0.15  # Relative movement threshold
-        self.extreme_angle_threshold = 45  # Degrees
         
-    def detect_head_movement(self, frame):
+    def detect_head_movement(self, frame, frame_rgb=None):
         """
         Detect suspicious head movements
         
         Args:
             frame: Input video frame
+            frame_rgb: Optional pre-converted RGB copy of the frame
             
         Returns:
             dict: Movement detection results
@@ -43,7 +57,8 @@ class HeadMovementDetector:
                     'confidence': 0
                 }
             
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if frame_rgb is None:
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             h, w, c = frame.shape
             
             results = self.pose.process(frame_rgb)
@@ -1,122 +1,311 @@
 """
 Unified Model Manager for all AI detection models
 """
+import importlib
 import logging
-from .face_detection import FaceDetector
-from .eye_gaze_tracking import EyeGazeTracker
-from .phone_detection import PhoneDetector
-from .sound_detection import SoundDetector
-from .background_blur import BackgroundBlurDetector
-from .person_detection import PersonDetector
-from .head_movement_detector import HeadMovementDetector
+import threading
+import time
+from .change_detector import FrameChangeDetector
+from .frame_engine import FrameContext, DetectorTimings, timed, to_builtin
 
 logger = logging.getLogger(__name__)
 
+# attribute: (module, class, Config flag, label). Modules are imported on first use.
+DETECTOR_REGISTRY = {
+    'face_detector': ('face_detection', 'FaceDetector', 'ENABLE_FACE_DETECTION', 'Face detection'),
+    'eye_tracker': ('eye_gaze_tracking', 'EyeGazeTracker', 'ENABLE_EYE_GAZE_TRACKING', 'Eye gaze tracking'),
+    'phone_detector': ('phone_detection', 'PhoneDetector', 'ENABLE_PHONE_DETECTION', 'Phone detection'),
+    'sound_detector': ('sound_detection', 'SoundDetector', 'ENABLE_SOUND_DETECTION', 'Sound detection'),
+    'blur_detector': ('background_blur', 'BackgroundBlurDetector', 'ENABLE_BLUR_BACKGROUND', 'Background blur detection'),
+    'person_detector': ('person_detection', 'PersonDetector', 'ENABLE_PERSON_DETECTION', 'Person detection'),
+    'head_detector': ('head_movement_detector', 'HeadMovementDetector', 'ENABLE_HEAD_MOVEMENT_DETECTION', 'Head movement detection'),
+}
+
+# attribute -> {'status', 'import_ms', 'init_ms'} for the first load in this process
+_startup_report = {}
+_report_lock = threading.Lock()
+
+
+def _detector_enabled(attr):
+    from config import Config
+    return getattr(Config, DETECTOR_REGISTRY[attr][2], True)
+
+
+def get_startup_report():
+    """Import and first-initialisation time of each detector in this process"""
+    with _report_lock:
+        return {k: dict(v) for k, v in _startup_report.items()}
+
+
 class ViolationDetectionManager:
     """Unified manager for all violation detection models"""
     
-    def __init__(self):
-        """Initialize all detection models"""
-        logger.info("Initializing violation detection models...")
-        
-        try:
-            self.face_detector = FaceDetector()
-            logger.info("✓ Face detection model loaded")
-        except Exception as e:
-            logger.warning(f"Face detection initialization failed: {str(e)}")
-            self.face_detector = None
-        
-        try:
-            self.eye_tracker = EyeGazeTracker()
-            logger.info("✓ Eye gaze tracking model loaded")
-        except Exception as e:
-            logger.warning(f"Eye gaze tracking initialization failed: {str(e)}")
-            self.eye_tracker = None
-        
-        try:
-            self.phone_detector = PhoneDetector()
-            logger.info("✓ Phone detection model loaded")
-        except Exception as e:
-            logger.warning(f"Phone detection initialization failed: {str(e)}")
-            self.phone_detector = None
-        
-        try:
-            self.sound_detector = SoundDetector()
-            logger.info("✓ Sound detection model loaded")
-        except Exception as e:
-            logger.warning(f"Sound detection initialization failed: {str(e)}")
-            self.sound_detector = None
-        
-        try:
-            self.blur_detector = BackgroundBlurDetector()
-            logger.info("✓ Background blur detection model loaded")
-        except Exception as e:
-            logger.warning(f"Background blur detection initialization failed: {str(e)}")
-            self.blur_detector = None
-        
-        try:
-            self.person_detector = PersonDetector()
-            logger.info("✓ Person detection model loaded")
-        except Exception as e:
-            logger.warning(f"Person detection initialization failed: {str(e)}")
-            self.person_detector = None
+    def __init__(self, timings=None):
+        """
+        Create a manager; detectors are loaded lazily on first use
         
-        try:
-            self.head_detector = HeadMovementDetector()
-            logger.info("✓ Head movement detection model loaded")
-        except Exception as e:
-            logger.warning(f"Head movement detection initialization failed: {str(e)}")
-            self.head_detector = None
+        Args:
+            timings: Optional DetectorTimings shared with other managers
+        """
+        self.timings = timings if timings is not None else DetectorTimings()
+        self._load_lock = threading.Lock()
         
-        logger.info("Violation detection manager initialized")
+        self.change_detector = FrameChangeDetector()
+        from config import Config
+        self.analysis_mode = Config.ANALYSIS_MODE
+        self.stage_stats = {}
+        self._last_face_center = None
+    
+    def __getattr__(self, name):
+        # Only called for attributes not yet set, i.e. detectors not loaded yet
+        if name in DETECTOR_REGISTRY:
+            return self._load_detector(name)
+        raise AttributeError(name)
     
-    def analyze_frame(self, frame, prev_frame=None):
+    def _load_detector(self, attr):
+        """Import and construct one detector (None if disabled or failing)"""
+        with self._load_lock:
+            if attr in self.__dict__:
+                return self.__dict__[attr]
+            
+            module_name, class_name, flag, label = DETECTOR_REGISTRY[attr]
+            if not _detector_enabled(attr):
+                logger.info(f"{label} disabled by {flag}")
+                self.__dict__[attr] = None
+                with _report_lock:
+                    _startup_report.setdefault(attr, {'status': 'disabled', 'import_ms': 0, 'init_ms': 0})
+                return None
+            
+            detector = None
+            import_ms = init_ms = 0.0
+            try:
+                start = time.perf_counter()
+                module = importlib.import_module(f'.{module_name}', __package__)
+                import_ms = (time.perf_counter() - start) * 1000.0
+                start = time.perf_counter()
+                detector = getattr(module, class_name)()
+                init_ms = (time.perf_counter() - start) * 1000.0
+                status = 'loaded'
+                logger.info(f"✓ {label} model loaded ({import_ms:.0f} ms import, {init_ms:.0f} ms init)")
+            except Exception as e:
+                status = f'failed: {e}'
+                logger.warning(f"{label} initialization failed: {str(e)}")
+            
+            self.__dict__[attr] = detector
+            with _report_lock:
+                _startup_report.setdefault(attr, {
+                    'status': status,
+                    'import_ms': round(import_ms, 1),
+                    'init_ms': round(init_ms, 1)
+                })
+            return detector
+    
+    def load_all(self):
+        """Eagerly load every enabled detector (used for warm-up)"""
+        for attr in DETECTOR_REGISTRY:
+            getattr(self, attr)
+        return self
+    
+    # Frame analysis stages in execution order: (result key, detector attribute, runner)
+    FRAME_STAGES = (
+        ('face', 'face_detector', lambda d, ctx, prev: d.detect_face(ctx.frame, frame_rgb=ctx.rgb)),
+        ('eye_gaze', 'eye_tracker', lambda d, ctx, prev: d.detect_eye_gaze(ctx.frame, frame_rgb=ctx.rgb)),
+        ('phone', 'phone_detector', lambda d, ctx, prev: d.detect_phone(ctx.frame, gray=ctx.gray)),
+        ('blur', 'blur_detector', lambda d, ctx, prev: _run_blur(d, ctx, prev)),
+        ('persons', 'person_detector', lambda d, ctx, prev: d.detect_persons(ctx.frame, frame_rgb=ctx.rgb)),
+        ('head_movement', 'head_detector', lambda d, ctx, prev: d.detect_head_movement(ctx.frame, frame_rgb=ctx.rgb)),
+    )
+
+    ANALYSIS_MODES = ('full', 'cascade')
+
+    # Stages the cascade schedules around the face box; the rest run as in 'full'
+    CASCADE_STAGES = ('face', 'eye_gaze', 'head_movement')
+    
+    # Face-centre shift (fraction of frame) above which the cascade re-runs Pose
+    FACE_MOVEMENT_THRESHOLD = 0.05
+    
+    # Margin added around the face box before cropping for FaceMesh
+    ROI_MARGIN = 0.25
+
+    def analyze_frame(self, frame, prev_frame=None, detectors=None, skip_unchanged=False):
         """
         Analyze frame for all violations
         
         Args:
             frame: Current frame
             prev_frame: Previous frame (for movement analysis)
+            detectors: Optional iterable of result keys to run (default: all)
+            skip_unchanged: Reuse the previous results when the frame has not
+                changed noticeably (per-session managers only)
             
         Returns:
-            dict: All detection results
+            dict: All detection results. When results were reused, 'reused'
+            is True and 'timings_ms' is empty.
         """
-        results = {}
+        ctx = FrameContext(frame)
+        prev_ctx = FrameContext(prev_frame) if prev_frame is not None else None
+        if not skip_unchanged or not ctx.valid:
+            return self._run_stages(ctx, prev_ctx, detectors)
+        
+        wanted = frozenset(detectors) if detectors is not None else None
+        analyze, score = self.change_detector.check(ctx.small_gray, wanted)
+        if not analyze:
+            self.change_detector.skipped()
+            self.timings.record('skipped', 0.0)
+            results = dict(self.change_detector.last_results, reused=True, timings_ms={})
+            results['change_score'] = score
+            return results
         
-        # Face detection
-        if self.face_detector:
-            results['face'] = self.face_detector.detect_face(frame)
+        results = self._run_stages(ctx, prev_ctx, detectors)
+        self.change_detector.update(ctx.small_gray, wanted, results, score)
+        results['reused'] = False
+        results['change_score'] = score
+        return results
+
+    def _run_stages(self, ctx, prev_ctx, detectors):
+        """Run the selected detector stages over a prepared frame context"""
+        wanted = set(detectors) if detectors is not None else None
+        cascade = self.analysis_mode == 'cascade'
+        result = {'timings_ms': {}}
         
-        # Eye gaze tracking
-        if self.eye_tracker:
-            results['eye_gaze'] = self.eye_tracker.detect_eye_gaze(frame)
+        for key, attr, runner in self.FRAME_STAGES:
+            if wanted is not None and key not in wanted:
+                continue
+            if cascade and key in self.CASCADE_STAGES:
+                continue
+            detector = getattr(self, attr)
+            if not detector:
+                continue
+            width = getattr(detector, 'input_width', None)
+            scaled_prev = prev_ctx.scaled(width) if prev_ctx is not None else None
+            output, elapsed = timed(runner, detector, ctx.scaled(width), scaled_prev)
+            result[key] = to_builtin(output)
+            result['timings_ms'][key] = round(elapsed, 3)
+            self.timings.record(key, elapsed)
+            self._count_stage(key, ran=True)
         
-        # Phone detection
-        if self.phone_detector:
-            results['phone'] = self.phone_detector.detect_phone(frame)
+        if cascade:
+            self._run_cascade(ctx, wanted, result)
+        return result
+
+    def _run_cascade(self, ctx, wanted, result):
+        """
+        Region-of-interest cascade for one frame, filling in result
         
-        # Background blur
-        if self.blur_detector:
-            results['blur'] = self.blur_detector.detect_blur_status(frame)
-            if prev_frame is not None:
-                results['blur']['removal_attempt'] = self.blur_detector.detect_blur_removal_attempt(prev_frame, frame)
+        The face detector runs first. FaceMesh gaze only sees a crop around
+        the detected face and is skipped when there is none. Without a face
+        detector (disabled or failed to load) gaze runs on the full frame.
+        Pose runs only when the face is missing or has moved since the last
+        frame. The other detectors are run by _run_stages.
+        """
+        def run(key, fn, *args, **kwargs):
+            output, elapsed = timed(fn, *args, **kwargs)
+            result[key] = to_builtin(output)
+            result['timings_ms'][key] = round(elapsed, 3)
+            self.timings.record(key, elapsed)
+            self._count_stage(key, ran=True)
         
-        # Person detection
-        if self.person_detector:
-            results['persons'] = self.person_detector.detect_persons(frame)
+        def wants(key):
+            return wanted is None or key in wanted
         
-        # Head movement
-        if self.head_detector:
-            results['head_movement'] = self.head_detector.detect_head_movement(frame)
+        face = None
+        if self.face_detector and (wants('face') or wants('eye_gaze') or wants('head_movement')):
+            face_ctx = ctx.scaled(self.face_detector.input_width)
+            run('face', self.face_detector.detect_face, face_ctx.frame, frame_rgb=face_ctx.rgb)
+            face = result['face']
+        face_found = bool(face and face.get('face_detected') and face.get('bbox'))
         
-        return results
+        if self.eye_tracker and wants('eye_gaze'):
+            if face_found:
+                roi = self._face_roi(face['bbox'], ctx.frame.shape)
+                run('eye_gaze', self.eye_tracker.detect_eye_gaze, ctx.frame, frame_rgb=ctx.rgb, roi=roi)
+            elif not self.face_detector:
+                run('eye_gaze', self.eye_tracker.detect_eye_gaze, ctx.frame, frame_rgb=ctx.rgb)
+            else:
+                result['eye_gaze'] = {
+                    'looking_at_screen': False,
+                    'gaze_direction': 'unknown',
+                    'confidence': 0,
+                    'is_suspicious': True,
+                    'skipped': True
+                }
+                self._count_stage('eye_gaze', ran=False)
+        
+        if self.head_detector and wants('head_movement'):
+            face_center = None
+            if face_found:
+                x, y, w, h = face['bbox']
+                face_center = (x + w / 2, y + h / 2)
+            moved = (
+                face_center is None or self._last_face_center is None or
+                max(abs(face_center[0] - self._last_face_center[0]),
+                    abs(face_center[1] - self._last_face_center[1])) > self.FACE_MOVEMENT_THRESHOLD
+            )
+            if moved:
+                head_ctx = ctx.scaled(self.head_detector.input_width)
+                run('head_movement', self.head_detector.detect_head_movement, head_ctx.frame, frame_rgb=head_ctx.rgb)
+            else:
+                result['head_movement'] = {
+                    'extreme_movement': False,
+                    'movement_speed': 0,
+                    'head_angle': 0,
+                    'confidence': 0,
+                    'skipped': True
+                }
+                self._count_stage('head_movement', ran=False)
+            self._last_face_center = face_center
+        
+        return result
+
+    def _face_roi(self, bbox, shape):
+        """Pixel (x, y, w, h) crop around a relative face box, with margin, clipped to the frame"""
+        frame_h, frame_w = shape[:2]
+        x, y, w, h = bbox
+        mx, my = w * self.ROI_MARGIN, h * self.ROI_MARGIN
+        x0 = max(0, int((x - mx) * frame_w))
+        y0 = max(0, int((y - my) * frame_h))
+        x1 = min(frame_w, int((x + w + mx) * frame_w))
+        y1 = min(frame_h, int((y + h + my) * frame_h))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def _count_stage(self, key, ran):
+        entry = self.stage_stats.setdefault(key, {'ran': 0, 'skipped': 0})
+        entry['ran' if ran else 'skipped'] += 1
+
+    def set_analysis_mode(self, mode):
+        """Select 'full' (every detector on the whole frame) or 'cascade' (face ROI first)"""
+        if mode not in self.ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        self.analysis_mode = mode
+
+    def get_stage_stats(self):
+        """Per-stage run and skip counters"""
+        return {k: dict(v) for k, v in self.stage_stats.items()}
+
+    def reset(self):
+        """Drop per-student tracking state so the manager can serve another session"""
+        self.change_detector.reset()
+        self._last_face_center = None
+        # Only reset detectors that have been loaded
+        for attr in ('eye_tracker', 'head_detector', 'sound_detector'):
+            detector = self.__dict__.get(attr)
+            if detector:
+                detector.reset()
+
+    def get_timing_report(self):
+        """Cumulative per-detector inference timings"""
+        return self.timings.report()
     
-    def analyze_audio(self, audio_data):
+    def analyze_audio(self, audio_data, sample_rate=None, dtype='<i2'):
         """
         Analyze audio for violations
         
         Args:
-            audio_data: Audio data
+            audio_data: Raw PCM bytes or a numpy array of samples
+            sample_rate: Samples per second (default: detector's current rate)
+            dtype: Sample format of raw PCM bytes
             
         Returns:
             dict: Audio analysis results
@@ -124,16 +313,68 @@ class ViolationDetectionManager:
         results = {}
         
         if self.sound_detector:
-            results['sound'] = self.sound_detector.detect_sound(audio_data)
+            if isinstance(audio_data, (bytes, bytearray, memoryview)):
+                result, elapsed = timed(self.sound_detector.process_pcm, audio_data,
+                                        dtype=dtype, sample_rate=sample_rate)
+            else:
+                result, elapsed = timed(self.sound_detector.detect_sound, audio_data,
+                                        sample_rate=sample_rate)
+            self.timings.record('sound', elapsed)
+            results['sound'] = to_builtin(result)
         
         return results
 
+def _run_blur(detector, ctx, prev_ctx):
+    """Blur status plus removal attempt against the previous frame"""
+    result = detector.detect_blur_status(ctx.frame, gray=ctx.gray)
+    if prev_ctx is not None:
+        result['removal_attempt'] = detector.detect_blur_removal_attempt(
+            prev_ctx.frame, ctx.frame,
+            prev_gray=prev_ctx.small_gray, curr_gray=ctx.small_gray
+        )
+    return result
+
 # Singleton instance
 _manager = None
 
 def get_detection_manager():
-    """Get or create detection manager instance"""
+    """
+    Get or create the shared detection manager instance
+    
+    Stateless callers only. Per-student analysis should use
+    detector_pool.get_detector_pool().session(session_id) so tracking
+    state is not shared between students.
+    """
     global _manager
     if _manager is None:
         _manager = ViolationDetectionManager()
-    return _manager
\ No newline at end of file
+    return _manager
+
+
+def warm_up(background=True):
+    """
+    Load all enabled detectors into the detector pool ahead of the first frame
+    
+    Args:
+        background: Run in a daemon thread instead of blocking
+    """
+    def _run():
+        from .detector_pool import get_detector_pool
+        start = time.perf_counter()
+        try:
+            get_detector_pool().prewarm()
+            report = get_startup_report()
+            total = (time.perf_counter() - start) * 1000.0
+            logger.info(f"Detector warm-up finished in {total:.0f} ms")
+            for attr, entry in report.items():
+                logger.info(f"  {attr}: {entry['status']} "
+                            f"(import {entry['import_ms']} ms, init {entry['init_ms']} ms)")
+        except Exception as e:
+            logger.error(f"Detector warm-up failed: {e}")
+    
+    if background:
+        thread = threading.Thread(target=_run, name='detector-warm-up', daemon=True)
+        thread.start()
+        return thread
+    _run()
+    return None
\ No newline at end of file
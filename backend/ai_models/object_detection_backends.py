@@ -0,0 +1,180 @@
+"""
+CPU object detection backends for quantized YOLO-style ONNX models
+"""
+import os
+import cv2
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# COCO class ids the proctoring system cares about
+COCO_SUSPICIOUS_CLASSES = {
+    62: 'monitor',
+    63: 'laptop',
+    64: 'mouse',
+    65: 'remote',
+    66: 'keyboard',
+    67: 'cell phone',
+    73: 'book',
+}
+PHONE_CLASS_ID = 67
+
+
+def letterbox_blob(frame, input_size):
+    """
+    Letterbox a BGR frame to a square input and build an NCHW float blob
+
+    Shared by inference and by int8 calibration (export_phone_model.py), so
+    the quantization ranges are measured on exactly what the model sees.
+
+    Returns:
+        tuple: (blob, scale from frame pixels to network pixels)
+    """
+    h, w = frame.shape[:2]
+    scale = input_size / max(h, w)
+    resized = cv2.resize(frame, (int(round(w * scale)), int(round(h * scale))),
+                         interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((input_size, input_size, 3), 114, dtype=np.uint8)
+    canvas[:resized.shape[0], :resized.shape[1]] = resized
+    return cv2.dnn.blobFromImage(canvas, 1 / 255.0, swapRB=True), scale
+
+
+class ONNXDetectorBackend:
+    """
+    Common pre/post-processing for single-output YOLO (v5/v8) ONNX exports
+
+    Subclasses only implement _forward(blob) -> raw output array.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_path, input_size=320, confidence_threshold=0.4, nms_threshold=0.45):
+        """
+        Args:
+            model_path: Path to the .onnx model file
+            input_size: Square network input size in pixels
+            confidence_threshold: Minimum class score to keep a box
+            nms_threshold: IoU threshold for non-maximum suppression
+        """
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Detection model not found: {model_path}")
+        self.model_path = model_path
+        self.input_size = int(input_size)
+        self.confidence_threshold = confidence_threshold
+        self.nms_threshold = nms_threshold
+
+    def _preprocess(self, frame):
+        """Letterbox to input_size and build an NCHW float blob"""
+        return letterbox_blob(frame, self.input_size)
+
+    def _forward(self, blob):
+        raise NotImplementedError
+
+    def detect(self, frame):
+        """
+        Run the model on a BGR frame
+
+        Returns:
+            list: {'class_id', 'label', 'confidence', 'bbox': (x, y, w, h)} in frame pixels
+        """
+        blob, scale = self._preprocess(frame)
+        output = np.squeeze(self._forward(blob))
+        if output.ndim != 2:
+            return []
+        # YOLOv8 exports are (84, N); YOLOv5 exports are (N, 85) with an objectness column
+        if output.shape[0] < output.shape[1]:
+            output = output.T
+            boxes, class_scores = output[:, :4], output[:, 4:]
+        else:
+            boxes, class_scores = output[:, :4], output[:, 5:] * output[:, 4:5]
+
+        class_ids = np.argmax(class_scores, axis=1)
+        confidences = class_scores[np.arange(len(class_ids)), class_ids]
+        keep = (confidences >= self.confidence_threshold) & np.isin(class_ids, list(COCO_SUSPICIOUS_CLASSES))
+        if not np.any(keep):
+            return []
+
+        boxes, class_ids, confidences = boxes[keep], class_ids[keep], confidences[keep]
+        # (cx, cy, w, h) in network pixels -> (x, y, w, h) in frame pixels
+        xywh = np.column_stack([
+            boxes[:, 0] - boxes[:, 2] / 2,
+            boxes[:, 1] - boxes[:, 3] / 2,
+            boxes[:, 2],
+            boxes[:, 3]
+        ]) / scale
+        indices = cv2.dnn.NMSBoxes(xywh.tolist(), confidences.tolist(),
+                                   self.confidence_threshold, self.nms_threshold)
+
+        detections = []
+        for i in np.array(indices).flatten():
+            x, y, bw, bh = xywh[i]
+            class_id = int(class_ids[i])
+            detections.append({
+                'class_id': class_id,
+                'label': COCO_SUSPICIOUS_CLASSES[class_id],
+                'confidence': float(confidences[i]),
+                'bbox': (int(x), int(y), int(bw), int(bh))
+            })
+        return detections
+
+
+class OpenCVDNNBackend(ONNXDetectorBackend):
+    """ONNX model executed by OpenCV's DNN module (no extra dependency)"""
+
+    name = 'opencv_dnn'
+
+    def __init__(self, model_path, **kwargs):
+        super().__init__(model_path, **kwargs)
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def _forward(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward()
+
+
+class ONNXRuntimeBackend(ONNXDetectorBackend):
+    """ONNX model executed by ONNX Runtime on CPU (best for int8 quantized models)"""
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, threads=1, **kwargs):
+        super().__init__(model_path, **kwargs)
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        # One thread per session: parallelism comes from worker processes
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _forward(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+BACKENDS = {
+    'onnxruntime': ONNXRuntimeBackend,
+    'opencv_dnn': OpenCVDNNBackend,
+}
+
+
+def create_backend(name, model_path, **kwargs):
+    """
+    Create a model backend
+
+    Args:
+        name: 'onnxruntime', 'opencv_dnn' or 'auto' (ONNX Runtime if installed, else OpenCV DNN)
+
+    Raises:
+        Exception: If the model or runtime cannot be loaded
+    """
+    if name == 'auto':
+        import importlib.util
+        name = 'onnxruntime' if importlib.util.find_spec('onnxruntime') else 'opencv_dnn'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detection backend: {name}")
+    return BACKENDS[name](model_path, **kwargs)
@@ -11,17 +11,21 @@ logger = logging.getLogger(__name__)
 class PersonDetector:
     """Detect number of persons in frame"""
     
+    # Frame width this detector needs (the segmentation model runs at 256x256)
+    input_width = 256
+    
     def __init__(self):
         """Initialize person detector"""
         self.mp_selfie_segmentation = mp.solutions.selfie_segmentation
         self.segmentation = self.mp_selfie_segmentation.SelfieSegmentation(model_selection=0)
         
-    def detect_persons(self, frame):
+    def detect_persons(self, frame, frame_rgb=None):
         """
         Detect number of persons in frame
         
         Args:
             frame: Input video frame
+            frame_rgb: Optional pre-converted RGB copy of the frame
             
         Returns:
             dict: Detection results
@@ -35,7 +39,8 @@ class PersonDetector:
                     'multiple_persons': False
                 }
             
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if frame_rgb is None:
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             results = self.segmentation.process(frame_rgb)
             
             # Get foreground mask
@@ -1,5 +1,5 @@
 """
-Phone/Device Detection using COCO-SSD Model
+Phone/Device Detection using a quantized COCO object detector
 """
 import cv2
 import numpy as np
@@ -10,16 +10,20 @@ logger = logging.getLogger(__name__)
 class PhoneDetector:
     """Detect mobile phones and suspicious devices"""
     
-    def __init__(self):
-        """Initialize phone detector"""
-        # Try to import TensorFlow models
-        try:
-            import tensorflow as tf
-            self.tf = tf
-            self.model_loaded = True
-        except ImportError:
-            logger.warning("TensorFlow not available for phone detection")
-            self.model_loaded = False
+    def __init__(self, backend=None, model_path=None, input_size=None):
+        """
+        Initialize phone detector
+        
+        Args:
+            backend: 'auto', 'onnxruntime', 'opencv_dnn' or 'contour'
+                (default: PHONE_DETECTOR_BACKEND)
+            model_path: YOLO-style ONNX model (default: PHONE_MODEL_PATH)
+            input_size: Square model input size (default: PHONE_MODEL_INPUT_SIZE)
+        """
+        from config import Config
+        backend = backend or Config.PHONE_DETECTOR_BACKEND
+        model_path = model_path or Config.PHONE_MODEL_PATH
+        input_size = input_size or Config.PHONE_MODEL_INPUT_SIZE
         
         # Objects to detect as suspicious
         self.suspicious_objects = [
@@ -28,14 +32,30 @@ class PhoneDetector:
         ]
         
         # Confidence threshold
-        self.confidence_threshold = 0.5
+        self.confidence_threshold = Config.PHONE_CONFIDENCE_THRESHOLD
+        
+        self.backend = None
+        if backend != 'contour':
+            try:
+                from .object_detection_backends import create_backend
+                self.backend = create_backend(
+                    backend, model_path, input_size=input_size,
+                    confidence_threshold=self.confidence_threshold
+                )
+                logger.info(f"Phone detection using {self.backend.name} ({model_path}, {input_size}px)")
+            except Exception as e:
+                logger.warning(f"Phone detection model unavailable, using contour heuristic: {e}")
+        self.model_loaded = self.backend is not None
+        # The model letterboxes to input_size anyway; the contour areas are tuned for the analysis frame
+        self.input_width = input_size if self.model_loaded else None
     
-    def detect_phone(self, frame):
+    def detect_phone(self, frame, gray=None):
         """
         Detect phone/device in frame
         
         Args:
             frame: Input video frame
+            gray: Optional pre-converted grayscale copy of the frame
             
         Returns:
             dict: Detection results
@@ -48,18 +68,19 @@ class PhoneDetector:
                     'objects_detected': []
                 }
             
-            # Simple edge-based detection if TensorFlow not available
+            # Simple edge-based detection if no model is available
             if not self.model_loaded:
-                return self._simple_phone_detection(frame)
+                return self._simple_phone_detection(frame, gray)
             
-            # Advanced detection would go here
-            # Using COCO-SSD or similar model
+            objects = self.backend.detect(frame)
+            phones = [o for o in objects if o['label'] == 'cell phone']
             
             return {
-                'phone_detected': False,
-                'confidence': 0,
-                'objects_detected': [],
-                'method': 'simple'
+                'phone_detected': len(phones) > 0,
+                'confidence': max((o['confidence'] for o in phones), default=0),
+                'suspicious_objects_count': len(objects),
+                'objects_detected': objects,
+                'method': self.backend.name
             }
             
         except Exception as e:
@@ -70,18 +91,20 @@ class PhoneDetector:
                 'error': str(e)
             }
     
-    def _simple_phone_detection(self, frame):
+    def _simple_phone_detection(self, frame, gray=None):
         """
         Simple phone detection using edges and contours
         
         Args:
             frame: Input video frame
+            gray: Optional pre-converted grayscale copy of the frame
             
         Returns:
             dict: Detection results
         """
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
             # Detect edges
             edges = cv2.Canny(gray, 50, 150)
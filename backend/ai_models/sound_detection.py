@@ -6,54 +6,126 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Speech carries most of its energy in this band
+SPEECH_BAND_HZ = (300, 3000)
+
+# Full-scale values used to bring integer PCM into [-1, 1]
+PCM_SCALE = {
+    np.dtype('int16'): 1.0 / 32768.0,
+    np.dtype('int32'): 1.0 / 2147483648.0,
+    np.dtype('uint8'): 1.0 / 128.0,
+}
+
+
 class SoundDetector:
-    """Detect unusual sounds during exam"""
-    
-    def __init__(self):
-        """Initialize sound detector"""
-        self.sample_rate = 16000
-        self.noise_threshold = 0.3
+    """
+    Detect unusual sounds during exam
+
+    Audio is consumed as a stream of fixed-size chunks. Each chunk gets an
+    rfft against a precomputed speech band mask, and per-chunk loudness and
+    voice activity are kept in a ring buffer covering the rolling window.
+    Partial chunks are carried over to the next call, so one detector
+    instance must only ever see one session's audio.
+    """
+
+    def __init__(self, sample_rate=16000, chunk_size=512, window_seconds=2.0):
+        """
+        Initialize sound detector
+
+        Args:
+            sample_rate: Samples per second of the incoming audio
+            chunk_size: Samples per analysis chunk (512 = 32 ms at 16 kHz)
+            window_seconds: Length of the rolling decision window
+        """
         self.sound_threshold = 0.5
         self.min_duration = 0.5  # seconds
-        
-    def detect_sound(self, audio_data):
+        # Chunk counts as voiced when this much of its energy is in the speech band
+        self.speech_band_ratio = 0.6
+        # ...and it is this many times louder than the tracked noise floor
+        self.vad_margin = 3.0
+        self.min_speech_rms = 0.01
+
+        self.chunk_size = chunk_size
+        self.window_seconds = window_seconds
+        self.sample_rate = None
+        self.configure(sample_rate)
+
+    def configure(self, sample_rate):
+        """
+        Precompute the analysis window and band mask for a sample rate
+
+        Args:
+            sample_rate: Samples per second
+        """
+        if sample_rate == self.sample_rate:
+            return
+        self.sample_rate = int(sample_rate)
+        self.chunk_duration = self.chunk_size / self.sample_rate
+        self._window = np.hanning(self.chunk_size).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.chunk_size, d=1.0 / self.sample_rate)
+        self._speech_mask = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+        # Ignore DC so offsets in cheap microphones do not count as energy
+        self._total_mask = freqs > 0
+        self._ring_size = max(1, int(round(self.window_seconds / self.chunk_duration)))
+        self.reset()
+
+    def reset(self):
+        """Drop buffered audio and rolling state (new session)"""
+        self._carry = np.empty(0, dtype=np.float32)
+        self._ring_rms = np.zeros(self._ring_size, dtype=np.float32)
+        self._ring_voiced = np.zeros(self._ring_size, dtype=bool)
+        self._ring_pos = 0
+        self._ring_filled = 0
+        self._noise_floor = None
+
+    def process_pcm(self, pcm_bytes, dtype='<i2', sample_rate=None):
+        """
+        Analyze raw little-endian PCM bytes
+
+        Args:
+            pcm_bytes: bytes/bytearray/memoryview of mono PCM samples
+            dtype: Sample format ('<i2' = 16-bit signed, '<f4' = 32-bit float)
+            sample_rate: Samples per second, if different from the current rate
+
+        Returns:
+            dict: Sound detection results over the rolling window
+        """
+        dtype = np.dtype(dtype)
+        usable = len(pcm_bytes) - len(pcm_bytes) % dtype.itemsize
+        # Zero-copy view over the request body
+        samples = np.frombuffer(pcm_bytes, dtype=dtype, count=usable // dtype.itemsize)
+        return self.detect_sound(samples, sample_rate=sample_rate)
+
+    def detect_sound(self, audio_data, sample_rate=None):
         """
         Detect unusual sounds
-        
+
         Args:
-            audio_data: Audio data as numpy array
-            
+            audio_data: Mono samples as numpy array (integer PCM or float in [-1, 1])
+            sample_rate: Samples per second, if different from the current rate
+
         Returns:
             dict: Sound detection results
         """
         try:
+            if sample_rate:
+                self.configure(sample_rate)
+
             if audio_data is None or len(audio_data) == 0:
-                return {
-                    'sound_detected': False,
-                    'volume': 0,
-                    'confidence': 0
-                }
-            
-            # Normalize audio
-            audio_normalized = self._normalize_audio(audio_data)
-            
-            # Calculate RMS (Root Mean Square) for volume
-            rms = np.sqrt(np.mean(audio_normalized ** 2))
-            
-            # Detect speech or unusual sounds
-            is_speech = self._detect_speech_patterns(audio_normalized)
-            
-            # Determine if sound is suspicious
-            suspicious_sound = rms > self.sound_threshold or is_speech
-            
-            return {
-                'sound_detected': suspicious_sound,
-                'volume': float(rms),
-                'is_speech': is_speech,
-                'confidence': float(min(rms, 1.0)),
-                'volume_level': self._get_volume_level(rms)
-            }
-            
+                return self._result(chunks=0)
+
+            samples = self._to_float(np.asarray(audio_data))
+            if self._carry.size:
+                samples = np.concatenate((self._carry, samples))
+
+            n_chunks = samples.size // self.chunk_size
+            consumed = n_chunks * self.chunk_size
+            self._carry = samples[consumed:].copy()
+            if n_chunks:
+                self._push_chunks(samples[:consumed].reshape(n_chunks, self.chunk_size))
+
+            return self._result(chunks=n_chunks)
+
         except Exception as e:
             logger.error(f"Sound detection error: {str(e)}")
             return {
@@ -62,30 +134,80 @@ class SoundDetector:
                 'confidence': 0,
                 'error': str(e)
             }
-    
-    def _normalize_audio(self, audio_data):
-        """Normalize audio data"""
-        max_val = np.max(np.abs(audio_data))
-        if max_val == 0:
-            return audio_data
-        return audio_data / max_val
-    
-    def _detect_speech_patterns(self, audio_data):
-        """Detect if audio contains speech"""
-        try:
-            # Simple frequency analysis
-            # Speech typically has energy in 300-3000 Hz range
-            fft = np.fft.fft(audio_data)
-            frequencies = np.abs(fft)
-            
-            # Check energy in speech frequency band
-            speech_energy = np.mean(frequencies)
-            
-            return speech_energy > self.noise_threshold
-            
-        except:
-            return False
-    
+
+    def _to_float(self, samples):
+        """Scale samples to float32 in [-1, 1]"""
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        scale = PCM_SCALE.get(samples.dtype.newbyteorder('='))
+        if samples.dtype == np.uint8:
+            return (samples.astype(np.float32) - 128.0) * scale
+        if scale is not None:
+            return samples.astype(np.float32) * scale
+        return samples.astype(np.float32, copy=False)
+
+    def _push_chunks(self, chunks):
+        """Analyze a (n, chunk_size) block and append per-chunk stats to the ring"""
+        rms = np.sqrt(np.mean(chunks * chunks, axis=1))
+        power = np.abs(np.fft.rfft(chunks * self._window, axis=1)) ** 2
+        total = power[:, self._total_mask].sum(axis=1)
+        speech = power[:, self._speech_mask].sum(axis=1)
+        band_ratio = np.divide(speech, total, out=np.zeros_like(speech), where=total > 0)
+
+        voiced = np.empty(len(rms), dtype=bool)
+        for i, level in enumerate(rms):
+            floor = self._noise_floor if self._noise_floor is not None else self.min_speech_rms
+            voiced[i] = (level > max(self.min_speech_rms, floor * self.vad_margin)
+                         and band_ratio[i] >= self.speech_band_ratio)
+            # Fall quickly to quiet levels, rise slowly so speech does not raise the floor
+            rate = 0.5 if level < floor else 0.01
+            self._noise_floor = floor + rate * (level - floor)
+
+        n = len(rms)
+        if n >= self._ring_size:
+            rms, voiced, n = rms[-self._ring_size:], voiced[-self._ring_size:], self._ring_size
+        idx = (self._ring_pos + np.arange(n)) % self._ring_size
+        self._ring_rms[idx] = rms
+        self._ring_voiced[idx] = voiced
+        self._ring_pos = (self._ring_pos + n) % self._ring_size
+        self._ring_filled = min(self._ring_size, self._ring_filled + n)
+
+    def _result(self, chunks):
+        """Summarize the rolling window"""
+        filled = self._ring_filled
+        if filled == 0:
+            return {
+                'sound_detected': False,
+                'volume': 0,
+                'is_speech': False,
+                'confidence': 0,
+                'volume_level': 'silent',
+                'chunks_processed': chunks
+            }
+
+        if filled < self._ring_size:
+            rms_window = self._ring_rms[:filled]
+            voiced_window = self._ring_voiced[:filled]
+        else:
+            rms_window, voiced_window = self._ring_rms, self._ring_voiced
+
+        rms = float(np.sqrt(np.mean(rms_window ** 2)))
+        speech_seconds = float(np.count_nonzero(voiced_window) * self.chunk_duration)
+        is_speech = speech_seconds >= self.min_duration
+        suspicious_sound = rms > self.sound_threshold or is_speech
+
+        return {
+            'sound_detected': suspicious_sound,
+            'volume': rms,
+            'is_speech': is_speech,
+            'speech_seconds': round(speech_seconds, 3),
+            'noise_floor': float(self._noise_floor or 0),
+            'confidence': float(min(max(rms / self.sound_threshold,
+                                        speech_seconds / self.window_seconds), 1.0)),
+            'volume_level': self._get_volume_level(rms),
+            'chunks_processed': chunks
+        }
+
     def _get_volume_level(self, rms):
         """Classify volume level"""
         if rms < 0.1:
@@ -97,4 +219,4 @@ class SoundDetector:
         elif rms < 0.8:
             return 'loud'
         else:
-            return 'very_loud'
\ No newline at end of file
+            return 'very_loud'
@@ -5,7 +5,14 @@ from flask_jwt_extended import JWTManager
 from datetime import timedelta
 from dotenv import load_dotenv
 
+# Before the imports below: config.Config reads the environment when it is first imported
+load_dotenv()
+
+from config import Config
 from database import mongo
+from indexes import ensure_indexes
+from services.session_monitor import backfill_session_updated_at
+from services.realtime import init_realtime
 from routes.auth import auth_bp
 from routes.exam import exam_bp
 from routes.results import results_bp
@@ -13,8 +20,6 @@ from routes.examiner import examiner_bp
 from routes.proctoring import proctoring_bp
 from routes.violations import violations_bp
 
-load_dotenv()
-
 def create_app():
     app = Flask(__name__)
 
@@ -22,7 +27,13 @@ def create_app():
     app.config['MONGO_URI'] = os.getenv('MONGO_URI', 'mongodb://localhost:27017/exam_proctoring')
 
     # ── JWT ──────────────────────────────────────────────────────────────────
-    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'super-secret-key')
+    app.config['JWT_SECRET_KEY'] = Config.JWT_SECRET_KEY
+    if os.getenv('FLASK_ENV') == 'production':
+        # Tokens and evidence links signed with a published placeholder can be forged
+        if Config.JWT_SECRET_KEY in Config.INSECURE_SECRET_KEYS:
+            raise RuntimeError('JWT_SECRET_KEY must be set to a private value in production')
+        if Config.EVIDENCE_URL_SECRET in Config.INSECURE_SECRET_KEYS:
+            raise RuntimeError('EVIDENCE_URL_SECRET must be set to a private value in production')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 
     # ── CORS ─────────────────────────────────────────────────────────────────
@@ -38,9 +49,9 @@ def create_app():
                 "https://*.railway.app",
             ],
             "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization", "Accept"],
+            "allow_headers": ["Content-Type", "Authorization", "Accept", "Idempotency-Key"],
             "supports_credentials": True,
-            "expose_headers": ["Content-Type", "Authorization"]
+            "expose_headers": ["Content-Type", "Authorization", "Retry-After"]
         }
     })
 
@@ -49,7 +60,7 @@ def create_app():
         origin = response.headers.get('Access-Control-Allow-Origin')
         if not origin:
             response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Accept')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,Accept,Idempotency-Key')
         response.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,PATCH,DELETE,OPTIONS')
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response
@@ -58,6 +69,22 @@ def create_app():
     mongo.init_app(app)
     jwt = JWTManager(app)
 
+    # ── Real-time monitoring (Socket.IO at /socket.io/) ─────────────────────
+    init_realtime(app, [o for o in allowed_origins + [
+        "http://localhost:3000",
+        "http://127.0.0.1:3000",
+        "http://frontend:3000",
+        "https://exam-frontend.onrender.com",
+    ] if '*' not in o])
+
+    # ── Indexes ───────────────────────────────────────────────────────────────
+    if os.getenv('MONGO_ENSURE_INDEXES', 'True').lower() == 'true':
+        try:
+            ensure_indexes(mongo.db)
+            backfill_session_updated_at(mongo.db)
+        except Exception as e:
+            app.logger.error(f"Index creation skipped: {e}")
+
     # ── JWT error handlers ────────────────────────────────────────────────────
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Compare phone detection backends for latency and recall
+
+The fixture directory holds images plus a labels file:
+    fixtures/
+        labels.csv     filename,phone   (phone is 1 or 0)
+        frame_001.jpg
+        ...
+Usage:
+    python benchmark_phone_detection.py fixtures/ --backends contour onnxruntime opencv_dnn
+    python benchmark_phone_detection.py fixtures/ --backends onnxruntime --model fp32.onnx int8.onnx
+
+Neither a model nor fixtures ship with the repository: export one with
+export_phone_model.py and label your own frames. Model backends exit with
+an error when the model file is missing instead of falling back to the
+contour heuristic.
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import logging
+
+import cv2
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_fixtures(fixture_dir):
+    """
+    Load labelled frames
+
+    Returns:
+        list: (filename, frame, has_phone) tuples
+    """
+    fixtures = []
+    with open(os.path.join(fixture_dir, 'labels.csv'), newline='') as f:
+        for row in csv.DictReader(f):
+            frame = cv2.imread(os.path.join(fixture_dir, row['filename']))
+            if frame is None:
+                logger.warning(f"Skipping unreadable fixture: {row['filename']}")
+                continue
+            fixtures.append((row['filename'], frame, row['phone'].strip() == '1'))
+    return fixtures
+
+
+def benchmark(detector, fixtures, warmup=3):
+    """
+    Run a detector over every fixture
+
+    Returns:
+        dict: Latency and detection quality summary
+    """
+    for _, frame, _ in fixtures[:warmup]:
+        detector.detect_phone(frame)
+
+    latencies = []
+    tp = fp = fn = tn = 0
+    for _, frame, has_phone in fixtures:
+        start = time.perf_counter()
+        result = detector.detect_phone(frame)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        detected = result.get('phone_detected', False)
+        if has_phone:
+            tp, fn = tp + detected, fn + (not detected)
+        else:
+            fp, tn = fp + detected, tn + (not detected)
+
+    return {
+        'frames': len(fixtures),
+        'mean_ms': float(np.mean(latencies)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'recall': tp / (tp + fn) if tp + fn else None,
+        'precision': tp / (tp + fp) if tp + fp else None,
+        'false_positive_rate': fp / (fp + tn) if fp + tn else None
+    }
+
+
+def _fmt(value):
+    return '-' if value is None else f"{value:.3f}"
+
+
+def main():
+    from config import Config
+    from ai_models.phone_detection import PhoneDetector
+
+    parser = argparse.ArgumentParser(description='Benchmark phone detection backends')
+    parser.add_argument('fixture_dir', help='Directory with labels.csv and images')
+    parser.add_argument('--backends', nargs='+', default=['contour', 'auto'])
+    parser.add_argument('--model', nargs='+', default=[Config.PHONE_MODEL_PATH],
+                        help='ONNX models to compare, e.g. fp32 and int8 (default: PHONE_MODEL_PATH)')
+    parser.add_argument('--input-size', type=int, default=None)
+    args = parser.parse_args()
+
+    if not os.path.isfile(os.path.join(args.fixture_dir, 'labels.csv')):
+        logger.error(f"No labels.csv in {args.fixture_dir}; see the module docstring for the fixture layout")
+        return 1
+    if any(b != 'contour' for b in args.backends):
+        missing = [m for m in args.model if not os.path.isfile(m)]
+        if missing:
+            logger.error(f"Model not found: {', '.join(missing)}. Export one with export_phone_model.py "
+                         f"or pass --model, or benchmark only --backends contour")
+            return 1
+
+    fixtures = load_fixtures(args.fixture_dir)
+    if not fixtures:
+        logger.error("No fixtures loaded")
+        return 1
+
+    runs = []
+    for backend in args.backends:
+        for model in ([None] if backend == 'contour' else args.model):
+            detector = PhoneDetector(backend=backend, model_path=model, input_size=args.input_size)
+            if backend != 'contour' and not detector.model_loaded:
+                logger.error(f"{backend}: could not load {model}")
+                return 1
+            name = f"{detector.backend.name}:{os.path.basename(model)}" if model else 'contour'
+            runs.append((name, detector))
+
+    print(f"{'backend':<40}{'frames':>8}{'mean_ms':>10}{'p95_ms':>10}{'recall':>9}{'precision':>11}{'fpr':>8}")
+    for name, detector in runs:
+        r = benchmark(detector, fixtures)
+        print(f"{name:<40}{r['frames']:>8}{r['mean_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{_fmt(r['recall']):>9}{_fmt(r['precision']):>11}{_fmt(r['false_positive_rate']):>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
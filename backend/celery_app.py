@@ -6,6 +6,8 @@ from flask import Flask
 import os
 from datetime import datetime, timedelta
 
+from config_evidence import AUTO_CLEANUP_INTERVAL_HOURS
+
 # Create Celery app
 celery = Celery(__name__)
 
@@ -33,7 +35,7 @@ celery.conf.update(
     beat_schedule={
         'clean-old-uploads': {
             'task': 'celery_app.clean_old_uploads',
-            'schedule': timedelta(hours=24),
+            'schedule': timedelta(hours=AUTO_CLEANUP_INTERVAL_HOURS),
         },
         'generate-reports': {
             'task': 'celery_app.generate_exam_reports',
@@ -43,9 +45,56 @@ celery.conf.update(
             'task': 'celery_app.send_pending_notifications',
             'schedule': timedelta(minutes=5),
         },
+        'requeue-stale-submissions': {
+            'task': 'celery_app.requeue_stale_submissions',
+            'schedule': timedelta(minutes=1),
+        },
     }
 )
 
+_flask_app = None
+
+def _get_flask_app():
+    """One Flask app per worker process for tasks that need MongoDB"""
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app()
+    return _flask_app
+
+@celery.task(name='celery_app.grade_submission', bind=True, max_retries=3,
+             acks_late=True, default_retry_delay=5)
+def grade_submission(self, submission_id):
+    """Grade a queued exam submission and store its result"""
+    from config import Config
+    from services.submission_service import grade_submission as grade
+
+    with _get_flask_app().app_context():
+        try:
+            result = grade(submission_id, stale_after=Config.SUBMISSION_STALE_SECONDS)
+            return {'status': 'graded' if result else 'skipped', 'submission_id': submission_id}
+        except Exception as e:
+            raise self.retry(exc=e)
+
+@celery.task(name='celery_app.requeue_stale_submissions')
+def requeue_stale_submissions():
+    """Re-enqueue submissions that were never graded"""
+    from config import Config
+    from services.submission_service import requeue_stale_submissions as requeue
+
+    with _get_flask_app().app_context():
+        count = requeue(stale_after=Config.SUBMISSION_STALE_SECONDS)
+    return {'status': 'Stale submissions requeued', 'count': count}
+
+@celery.task(name='celery_app.compress_evidence', acks_late=True)
+def compress_evidence(evidence_path):
+    """Downsize and re-encode a stored evidence image"""
+    from services.evidence_compression import compress_evidence as compress
+
+    with _get_flask_app().app_context():
+        result = compress(evidence_path)
+    return {'status': 'compressed' if result else 'skipped', 'evidence_path': evidence_path, **(result or {})}
+
 @celery.task(name='celery_app.send_email')
 def send_email(recipient, subject, html_body):
     """Send email asynchronously"""
@@ -110,23 +159,12 @@ def generate_exam_reports():
 
 @celery.task(name='celery_app.clean_old_uploads')
 def clean_old_uploads():
-    """Clean old uploaded files"""
-    try:
-        import os
-        import time
-        
-        upload_dir = 'uploads/evidence'
-        cutoff_time = time.time() - (30 * 24 * 60 * 60)  # 30 days
-        
-        for filename in os.listdir(upload_dir):
-            filepath = os.path.join(upload_dir, filename)
-            if os.path.isfile(filepath):
-                if os.stat(filepath).st_mtime < cutoff_time:
-                    os.remove(filepath)
-        
-        return {'status': 'Old files cleaned'}
-    except Exception as e:
-        return {'status': 'Cleanup failed', 'error': str(e)}
+    """Delete expired evidence (see services/evidence_retention)"""
+    from services.evidence_retention import purge_expired
+
+    with _get_flask_app().app_context():
+        report = purge_expired()
+    return {'status': 'Old files cleaned', **report}
 
 @celery.task(name='celery_app.send_pending_notifications')
 def send_pending_notifications():
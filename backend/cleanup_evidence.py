@@ -3,8 +3,7 @@
 Cleanup old evidence files (configurable retention period)
 Run this script manually or as a cron job
 """
-import os
-from datetime import datetime, timedelta
+import argparse
 import logging
 from config_evidence import EVIDENCE_DIR, EVIDENCE_RETENTION_HOURS
 
@@ -14,48 +13,32 @@ logger = logging.getLogger(__name__)
 MAX_AGE_HOURS = EVIDENCE_RETENTION_HOURS  # From config (default: 48 hours)
 
 def cleanup_old_evidence():
-    """Delete evidence files older than configured retention period"""
+    """
+    Delete evidence whose retention period has passed
+
+    Driven by the expires_at index on evidence_blobs (see
+    services/evidence_retention), so a run only reads expired evidence
+    instead of stat-ing every file. Referencing violations are kept with
+    evidence_path cleared.
+
+    Returns:
+        tuple: (files deleted, bytes freed)
+    """
     try:
-        if not os.path.exists(EVIDENCE_DIR):
-            logger.warning(f"Evidence directory not found: {EVIDENCE_DIR}")
-            return
-        
-        cutoff_time = datetime.now() - timedelta(hours=MAX_AGE_HOURS)
-        deleted_count = 0
-        total_size = 0
-        
-        logger.info(f"Starting cleanup of files older than {MAX_AGE_HOURS} hours...")
-        logger.info(f"Cutoff time: {cutoff_time}")
-        
-        for filename in os.listdir(EVIDENCE_DIR):
-            if filename == '.gitkeep':
-                continue
-            
-            filepath = os.path.join(EVIDENCE_DIR, filename)
-            
-            # Skip if not a file
-            if not os.path.isfile(filepath):
-                continue
-            
-            # Get file modification time
-            file_time = datetime.fromtimestamp(os.path.getmtime(filepath))
-            file_size = os.path.getsize(filepath)
-            
-            # Delete if older than cutoff
-            if file_time < cutoff_time:
-                try:
-                    os.remove(filepath)
-                    deleted_count += 1
-                    total_size += file_size
-                    logger.info(f"Deleted: {filename} (age: {datetime.now() - file_time}, size: {file_size} bytes)")
-                except Exception as e:
-                    logger.error(f"Failed to delete {filename}: {str(e)}")
-        
+        from services.evidence_retention import purge_expired
+
+        with _app_context():
+            report = purge_expired()
+
         logger.info(f"Cleanup complete!")
-        logger.info(f"Files deleted: {deleted_count}")
-        logger.info(f"Space freed: {total_size / 1024:.2f} KB")
-        
-        return deleted_count, total_size
+        logger.info(f"Files deleted: {report['deleted']} in {report['batches']} batch(es)")
+        logger.info(f"Violations tombstoned: {report['violations_tombstoned']}")
+        logger.info(f"Space freed: {report['bytes_freed'] / 1024:.2f} KB")
+        logger.info(f"Uncompressed images re-queued: {report['compression_requeued']}")
+        if report['more']:
+            logger.info("More expired evidence remains; it is deleted on the next run")
+
+        return report['deleted'], report['bytes_freed']
         
     except Exception as e:
         logger.error(f"Error during cleanup: {str(e)}")
@@ -63,6 +46,15 @@ def cleanup_old_evidence():
         traceback.print_exc()
         return 0, 0
 
+def _app_context():
+    """A new app's context when run as a script; the caller's app context is reused"""
+    from contextlib import nullcontext
+    from flask import has_app_context
+    if has_app_context():
+        return nullcontext()
+    from app import create_app
+    return create_app().app_context()
+
 if __name__ == '__main__':
     print("=" * 60)
     print("🧹 EVIDENCE CLEANUP SCRIPT")
@@ -70,7 +62,16 @@ if __name__ == '__main__':
     print(f"Directory: {EVIDENCE_DIR}")
     print(f"Max age: {MAX_AGE_HOURS} hours")
     print("=" * 60)
-    
+
+    parser = argparse.ArgumentParser(description='Delete expired evidence')
+    parser.add_argument('--adopt-legacy', action='store_true',
+                        help='First register files saved flat in the evidence directory (run once after upgrading)')
+    args = parser.parse_args()
+    if args.adopt_legacy:
+        from services.evidence_retention import adopt_legacy_files
+        with _app_context():
+            print(f"Legacy files registered: {adopt_legacy_files()}")
+
     deleted, size = cleanup_old_evidence()
     
     print("=" * 60)
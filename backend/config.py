@@ -12,6 +12,10 @@ class Config:
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/exam_proctoring')
 
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
+    # Placeholder secrets (defaults and .env.example); create_app refuses them in production
+    INSECURE_SECRET_KEYS = {
+        'your-secret-key-change-in-production', 'your-super-secret-key-change-this', 'super-secret-key'
+    }
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
 
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
@@ -33,8 +37,93 @@ class Config:
     ENABLE_PHONE_DETECTION = os.getenv('ENABLE_PHONE_DETECTION', 'True').lower() == 'true'
     ENABLE_TAB_MONITORING = os.getenv('ENABLE_TAB_MONITORING', 'True').lower() == 'true'
     ENABLE_EYE_GAZE_TRACKING = os.getenv('ENABLE_EYE_GAZE_TRACKING', 'True').lower() == 'true'
+    ENABLE_PERSON_DETECTION = os.getenv('ENABLE_PERSON_DETECTION', 'True').lower() == 'true'
+    ENABLE_HEAD_MOVEMENT_DETECTION = os.getenv('ENABLE_HEAD_MOVEMENT_DETECTION', 'True').lower() == 'true'
+
+    # Maximum per-session detector managers kept by each worker process
+    DETECTOR_POOL_SIZE = int(os.getenv('DETECTOR_POOL_SIZE', 32))
+
+    # Frame inference worker processes (0 = analyse in the request thread)
+    INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', 2))
+    INFERENCE_QUEUE_DEPTH = int(os.getenv('INFERENCE_QUEUE_DEPTH', 64))
+    INFERENCE_TIMEOUT_SECONDS = float(os.getenv('INFERENCE_TIMEOUT_SECONDS', 5))
+    INFERENCE_RETRY_AFTER_SECONDS = int(os.getenv('INFERENCE_RETRY_AFTER_SECONDS', 2))
+
+    # Violations are written in insert_many batches of up to this size, at least this often.
+    # Low/medium violations can be lost if a worker crashes within the interval; high-severity
+    # ones and those that trigger an auto-submit are written immediately. 1 disables buffering.
+    VIOLATION_BATCH_SIZE = int(os.getenv('VIOLATION_BATCH_SIZE', 100))
+    VIOLATION_FLUSH_INTERVAL_SECONDS = float(os.getenv('VIOLATION_FLUSH_INTERVAL_SECONDS', 1.0))
+
+    # Threads persisting background frame results; stored results are deleted after FRAME_RESULT_TTL_HOURS
+    FRAME_RESULT_WORKERS = int(os.getenv('FRAME_RESULT_WORKERS', 4))
+    FRAME_RESULT_TTL_HOURS = int(os.getenv('FRAME_RESULT_TTL_HOURS', 24))
+
+    # Background frame analysis records a violation type at most once per cooldown
+    FRAME_VIOLATION_COOLDOWN_SECONDS = int(os.getenv('FRAME_VIOLATION_COOLDOWN_SECONDS', 30))
+
+    # Uploaded frames are decoded at reduced scale and normalised to this width
+    FRAME_ANALYSIS_WIDTH = int(os.getenv('FRAME_ANALYSIS_WIDTH', 640))
+    FRAME_MAX_UPLOAD_BYTES = int(os.getenv('FRAME_MAX_UPLOAD_BYTES', 2 * 1024 * 1024))
+    FRAME_MAX_PIXELS = int(os.getenv('FRAME_MAX_PIXELS', 3840 * 2160))
+
+    # Skip detectors on frames that barely differ from the last analysed one
+    FRAME_SKIP_UNCHANGED = os.getenv('FRAME_SKIP_UNCHANGED', 'True').lower() == 'true'
+    FRAME_CHANGE_THRESHOLD = float(os.getenv('FRAME_CHANGE_THRESHOLD', 4.0))
+    FRAME_MAX_SKIP = int(os.getenv('FRAME_MAX_SKIP', 8))
+
+    # Phone detector: 'auto' / 'onnxruntime' / 'opencv_dnn' use PHONE_MODEL_PATH, 'contour' uses edge heuristics
+    PHONE_DETECTOR_BACKEND = os.getenv('PHONE_DETECTOR_BACKEND', 'auto')
+    PHONE_MODEL_PATH = os.getenv(
+        'PHONE_MODEL_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_models', 'weights', 'phone_detector_int8.onnx')
+    )
+    PHONE_MODEL_INPUT_SIZE = int(os.getenv('PHONE_MODEL_INPUT_SIZE', 320))
+    PHONE_CONFIDENCE_THRESHOLD = float(os.getenv('PHONE_CONFIDENCE_THRESHOLD', 0.4))
+
+    # Streaming audio uploads (/api/proctoring/audio)
+    AUDIO_SAMPLE_RATE = int(os.getenv('AUDIO_SAMPLE_RATE', 16000))
+    AUDIO_MAX_UPLOAD_BYTES = int(os.getenv('AUDIO_MAX_UPLOAD_BYTES', 1024 * 1024))
+
+    # 'full' runs every detector on the whole frame; 'cascade' runs FaceMesh on the face crop only
+    ANALYSIS_MODE = os.getenv('ANALYSIS_MODE', 'cascade')
+
+    # Compiled exam (questions + answer key) cache, checked against the exam's cache_version on
+    # every lookup; EXAM_CACHE_REDIS also shares compiled exams between processes
+    EXAM_CACHE_ENABLED = os.getenv('EXAM_CACHE_ENABLED', 'True').lower() == 'true'
+    EXAM_CACHE_REDIS = os.getenv('EXAM_CACHE_REDIS', 'False').lower() == 'true'
+    EXAM_CACHE_TTL_SECONDS = int(os.getenv('EXAM_CACHE_TTL_SECONDS', 300))
+    EXAM_CACHE_MAX_ENTRIES = int(os.getenv('EXAM_CACHE_MAX_ENTRIES', 256))
+
+    # Rendered answer reviews per (student, exam); expire with EXAM_CACHE_TTL_SECONDS
+    REVIEW_CACHE_ENABLED = os.getenv('REVIEW_CACHE_ENABLED', 'True').lower() == 'true'
+    REVIEW_CACHE_MAX_ENTRIES = int(os.getenv('REVIEW_CACHE_MAX_ENTRIES', 1024))
+
+    # Grade submissions in Celery workers (only enable where a worker runs, e.g. docker-compose);
+    # a queued submission no worker claims within SUBMISSION_FALLBACK_SECONDS is graded in process
+    SUBMISSION_QUEUE_ENABLED = os.getenv('SUBMISSION_QUEUE_ENABLED', 'False').lower() == 'true'
+    SUBMISSION_FALLBACK_SECONDS = int(os.getenv('SUBMISSION_FALLBACK_SECONDS', 30))
+    SUBMISSION_POLL_AFTER_SECONDS = int(os.getenv('SUBMISSION_POLL_AFTER_SECONDS', 2))
+    SUBMISSION_STALE_SECONDS = int(os.getenv('SUBMISSION_STALE_SECONDS', 300))
 
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Evidence links are HMAC-signed and expire after 1-2x this many seconds
+    EVIDENCE_URL_SECRET = os.getenv('EVIDENCE_URL_SECRET') or JWT_SECRET_KEY
+    EVIDENCE_URL_TTL_SECONDS = int(os.getenv('EVIDENCE_URL_TTL_SECONDS', 900))
+    # Let nginx stream evidence files from its internal EVIDENCE_ACCEL_PREFIX location
+    EVIDENCE_ACCEL_REDIRECT = os.getenv('EVIDENCE_ACCEL_REDIRECT', 'False').lower() == 'true'
+    EVIDENCE_ACCEL_PREFIX = os.getenv('EVIDENCE_ACCEL_PREFIX', '/_evidence/')
+
+    # Read examiner notifications are deleted this many days after being read
+    NOTIFICATION_READ_TTL_DAYS = int(os.getenv('NOTIFICATION_READ_TTL_DAYS', 30))
+
+    # Socket.IO monitoring events; REALTIME_REDIS fans them out across worker processes
+    # and lets Celery tasks publish. On by default when gunicorn runs several workers.
+    REALTIME_ENABLED = os.getenv('REALTIME_ENABLED', 'True').lower() == 'true'
+    REALTIME_REDIS = os.getenv(
+        'REALTIME_REDIS', str(int(os.getenv('WEB_CONCURRENCY', 1)) > 1)
+    ).lower() == 'true'
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
 
@@ -2,6 +2,7 @@
 Evidence Retention Configuration
 Configure how long violation evidence is kept
 """
+import os
 
 # Evidence retention settings
 EVIDENCE_RETENTION_HOURS = 48  # Keep evidence for 2 days (48 hours)
@@ -9,7 +10,9 @@ EVIDENCE_DIR = 'uploads/evidence'
 
 # Auto-cleanup settings
 AUTO_CLEANUP_ENABLED = True  # ENABLED - Automatically delete evidence after 48 hours
-AUTO_CLEANUP_INTERVAL_HOURS = 6  # Run cleanup every 6 hours
+AUTO_CLEANUP_INTERVAL_HOURS = 1  # Run cleanup every hour (each run only reads expired evidence)
+PURGE_BATCH_SIZE = 500  # Expired blobs deleted per batch
+PURGE_MAX_BATCHES = 20  # Batches per cleanup run; the rest waits for the next run
 
 # Storage limits
 MAX_EVIDENCE_SIZE_MB = 1000  # Maximum total evidence storage (1 GB)
@@ -22,6 +25,15 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'avi', 'mov', 'webm'}
 COMPRESS_IMAGES = True  # Compress images to save space
 IMAGE_QUALITY = 85  # JPEG quality (1-100)
 MAX_IMAGE_DIMENSION = 1920  # Max width/height in pixels
+IMAGE_FORMAT = 'jpeg'  # Stored image format: 'jpeg' or 'webp'
+# Compress in Celery workers; only set when a worker runs (False = a background thread in the web process)
+COMPRESS_IN_CELERY = os.getenv('COMPRESS_IN_CELERY', 'False').lower() == 'true'
+COMPRESS_RETRY_AFTER_MINUTES = 30  # Cleanup re-queues images still uncompressed after this long
+
+# Thumbnail settings
+THUMBNAIL_SIZES = (160, 480)  # Preview max width/height in pixels
+THUMBNAIL_QUALITY = 80  # JPEG quality of previews
+THUMBNAIL_DIR = 'thumbs'  # Under EVIDENCE_DIR
 
 def get_retention_hours():
     """Get evidence retention period in hours"""
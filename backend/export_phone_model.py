@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Quantize a YOLO-style ONNX object detector for CPU phone detection
+
+Export the fp32 model yourself (e.g. `yolo export model=yolov8n.pt format=onnx imgsz=320`)
+and collect a few hundred webcam frames like the ones the proctoring
+system sees (the benchmark fixture directory works), then run:
+    python export_phone_model.py yolov8n.onnx --calibration fixtures/
+The int8 model is written to PHONE_MODEL_PATH unless --output is given.
+
+Weights and activations are quantized statically into QDQ format, so
+ONNX Runtime runs the convolutions with int8 kernels. Always compare the
+result with the fp32 model before deploying it:
+    python benchmark_phone_detection.py fixtures/ --backends onnxruntime \
+        --model yolov8n.onnx ai_models/weights/phone_detector_int8.onnx
+"""
+import os
+import sys
+import argparse
+import logging
+import tempfile
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def calibration_images(calibration_dir, limit=None):
+    """Paths of the images in a calibration directory, sorted"""
+    paths = sorted(
+        os.path.join(calibration_dir, name) for name in os.listdir(calibration_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit] if limit else paths
+
+
+def make_calibration_reader(model_path, image_paths, input_size):
+    """
+    Calibration data reader feeding letterboxed frames to the model input
+
+    Returns:
+        onnxruntime.quantization.CalibrationDataReader
+    """
+    import cv2
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationDataReader
+    from ai_models.object_detection_backends import letterbox_blob
+
+    input_name = ort.InferenceSession(model_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(image_paths)
+
+        def get_next(self):
+            for path in self._paths:
+                frame = cv2.imread(path)
+                if frame is None:
+                    logger.warning(f"Skipping unreadable calibration image: {path}")
+                    continue
+                return {input_name: letterbox_blob(frame, input_size)[0]}
+            return None
+
+    return FrameReader()
+
+
+def quantize_model(source_path, output_path, calibration_dir, input_size, max_images=None):
+    """
+    Statically quantize weights and activations to int8 (QDQ format)
+
+    Args:
+        source_path: fp32 ONNX model
+        output_path: Destination for the quantized model
+        calibration_dir: Directory of representative frames
+        input_size: Square model input size the model was exported at
+        max_images: Use at most this many calibration images
+
+    Returns:
+        tuple: (fp32 size in bytes, int8 size in bytes)
+
+    Raises:
+        ValueError: If the calibration directory holds no images
+    """
+    from onnxruntime.quantization import quantize_static, QuantFormat, QuantType
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    images = calibration_images(calibration_dir, max_images)
+    if not images:
+        raise ValueError(f"No calibration images in {calibration_dir}")
+    logger.info(f"Calibrating on {len(images)} images at {input_size}px")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Shape inference and graph folding first, as ONNX Runtime recommends for static quantization
+        prepared_path = os.path.join(tmp_dir, 'prepared.onnx')
+        quant_pre_process(source_path, prepared_path)
+        quantize_static(
+            prepared_path, output_path,
+            make_calibration_reader(prepared_path, images, input_size),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True
+        )
+    return os.path.getsize(source_path), os.path.getsize(output_path)
+
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='Quantize an ONNX detector for phone detection')
+    parser.add_argument('source', help='fp32 ONNX model exported at the target input size')
+    parser.add_argument('--calibration', required=True, help='Directory of representative webcam frames')
+    parser.add_argument('--output', default=Config.PHONE_MODEL_PATH, help='Quantized model path')
+    parser.add_argument('--input-size', type=int, default=Config.PHONE_MODEL_INPUT_SIZE)
+    parser.add_argument('--max-images', type=int, default=500, help='Calibration images to use')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        logger.error(f"Model not found: {args.source}")
+        return 1
+    if not os.path.isdir(args.calibration):
+        logger.error(f"Calibration directory not found: {args.calibration}")
+        return 1
+
+    try:
+        source_size, output_size = quantize_model(
+            args.source, args.output, args.calibration, args.input_size, args.max_images
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    logger.info(f"Quantized {args.source} ({source_size / 1e6:.1f} MB) -> "
+                f"{args.output} ({output_size / 1e6:.1f} MB)")
+    logger.info(f"Compare before deploying: python benchmark_phone_detection.py {args.calibration} "
+                f"--backends onnxruntime --model {args.source} {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
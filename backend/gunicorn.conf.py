@@ -0,0 +1,21 @@
+"""
+Gunicorn configuration
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# One server process: it owns the inference pool, whose per-session affinity
+# does not extend across server processes. Scale inference with INFERENCE_WORKERS.
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+# Threaded workers, so open Socket.IO WebSockets do not block other requests.
+# Every connected examiner holds one thread for as long as the socket is open,
+# so size GUNICORN_THREADS for concurrent examiners plus request traffic.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 32))
+timeout = 120
+
+
+def post_fork(server, worker):
+    """Start loading detection models as soon as a worker is forked"""
+    from services.inference_pool import warm_up
+    warm_up()
@@ -0,0 +1,185 @@
+"""
+MongoDB index registry
+
+Every index the routes rely on is declared here and applied with
+ensure_indexes(), at startup and from the command line:
+
+    python indexes.py            # create missing indexes
+    python indexes.py --list     # show the registry
+"""
+import logging
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# collection -> list of (keys, options)
+INDEXES = {
+    'users': [
+        ([('email', ASCENDING)], {'unique': True}),
+    ],
+    'exams': [
+        ([('examiner_id', ASCENDING), ('created_at', DESCENDING)], {}),
+        ([('is_published', ASCENDING), ('created_at', DESCENDING)], {}),
+    ],
+    'exam_questions': [
+        ([('exam_id', ASCENDING), ('order', ASCENDING)], {}),
+    ],
+    'exam_enrollments': [
+        ([('exam_id', ASCENDING), ('student_id', ASCENDING)], {}),
+    ],
+    'proctoring_sessions': [
+        ([('student_id', ASCENDING), ('status', ASCENDING)], {}),
+        ([('exam_id', ASCENDING), ('status', ASCENDING), ('_id', ASCENDING)], {}),
+        ([('exam_id', ASCENDING), ('updated_at', ASCENDING)], {}),
+        ([('exam_id', ASCENDING), ('student_id', ASCENDING)], {}),
+    ],
+    'violations': [
+        ([('session_id', ASCENDING), ('created_at', DESCENDING)], {}),
+        ([('session_id', ASCENDING), ('violation_type', ASCENDING), ('created_at', DESCENDING)], {}),
+        ([('exam_id', ASCENDING), ('student_id', ASCENDING), ('created_at', DESCENDING)], {}),
+        ([('exam_id', ASCENDING), ('created_at', DESCENDING)], {}),
+        ([('evidence_path', ASCENDING)], {}),
+    ],
+    'exam_results': [
+        # One result per student and exam, however many graders race to store it
+        ([('student_id', ASCENDING), ('exam_id', ASCENDING)], {'unique': True}),
+        ([('exam_id', ASCENDING), ('submitted_at', DESCENDING), ('_id', DESCENDING)], {}),
+        ([('student_id', ASCENDING), ('submitted_at', DESCENDING), ('_id', DESCENDING)], {}),
+    ],
+    'student_answers': [
+        ([('student_id', ASCENDING), ('question_id', ASCENDING)], {}),
+        ([('student_id', ASCENDING), ('exam_id', ASCENDING)], {}),
+    ],
+    'examiner_notifications': [
+        ([('examiner_id', ASCENDING), ('created_at', DESCENDING)], {}),
+        ([('examiner_id', ASCENDING), ('_id', DESCENDING)], {}),
+        ([('examiner_id', ASCENDING), ('is_read', ASCENDING), ('_id', DESCENDING)], {}),
+        # Read notifications expire; unread ones are kept so the unread counters stay exact
+        ([('read_at', ASCENDING)], {
+            'expireAfterSeconds': Config.NOTIFICATION_READ_TTL_DAYS * 86400,
+            'partialFilterExpression': {'is_read': True}
+        }),
+    ],
+    'session_analytics': [
+        ([('session_id', ASCENDING)], {}),
+    ],
+    'frame_results': [
+        ([('session_id', ASCENDING), ('_id', ASCENDING)], {}),
+        # About one row per student per second while frames are streamed
+        ([('created_at', ASCENDING)], {'expireAfterSeconds': Config.FRAME_RESULT_TTL_HOURS * 3600}),
+    ],
+    'evidence_blobs': [
+        ([('expires_at', ASCENDING)], {}),
+        ([('compressed_at', ASCENDING), ('created_at', ASCENDING)], {}),
+    ],
+    'submissions': [
+        ([('idempotency_key', ASCENDING)], {'unique': True}),
+        ([('status', ASCENDING), ('created_at', ASCENDING)], {}),
+        ([('status', ASCENDING), ('claimed_at', ASCENDING)], {}),
+    ],
+}
+
+
+def index_name(keys):
+    """Default MongoDB name for an index key list, e.g. exam_id_1_created_at_-1"""
+    return '_'.join(f'{field}_{direction}' for field, direction in keys)
+
+
+def ensure_indexes(db, collections=None):
+    """
+    Create every registered index that does not exist yet
+
+    create_indexes is a no-op for indexes that already exist with the same
+    options, so this is safe to run on every startup. A collection whose
+    indexes cannot be built is logged and skipped so the others still get
+    theirs. On existing deployments the usual cause is duplicate values
+    under a unique index, e.g. two users with the same email: none of that
+    collection's indexes are created until the duplicates are removed.
+
+    Args:
+        db: pymongo Database
+        collections: Optional collection names to restrict to
+
+    Returns:
+        dict: collection -> list of index names, or an error message
+    """
+    report = {}
+    for name, specs in INDEXES.items():
+        if collections is not None and name not in collections:
+            continue
+        models = [IndexModel(keys, name=index_name(keys), **options) for keys, options in specs]
+        try:
+            _sync_ttl(db, name, specs)
+            _sync_unique(db, name, specs)
+            report[name] = db[name].create_indexes(models)
+        except OperationFailure as e:
+            if e.code in (11000, 359):
+                logger.error(
+                    f"Could not create indexes on {name}: duplicate values block a unique index; "
+                    f"remove the duplicates and rerun `python indexes.py --collection {name}`: {e}"
+                )
+            else:
+                logger.error(f"Could not create indexes on {name}: {e}")
+            report[name] = f"error: {e}"
+    return report
+
+
+def _sync_ttl(db, name, specs):
+    """Apply a changed expireAfterSeconds with collMod, which create_indexes would reject"""
+    ttl = {index_name(keys): options['expireAfterSeconds'] for keys, options in specs if 'expireAfterSeconds' in options}
+    if not ttl:
+        return
+    for index, info in db[name].index_information().items():
+        if index in ttl and info.get('expireAfterSeconds') not in (None, ttl[index]):
+            db.command('collMod', name, index={'name': index, 'expireAfterSeconds': ttl[index]})
+
+
+def _sync_unique(db, name, specs):
+    """
+    Make an existing non-unique index unique in place (MongoDB 6.0+)
+
+    create_indexes rejects a changed unique option on an index of the same
+    name. prepareUnique first stops new duplicates; the conversion then
+    fails with CannotConvertIndexToUnique (359) while old ones remain, and
+    the index keeps serving queries meanwhile.
+    """
+    unique = {index_name(keys) for keys, options in specs if options.get('unique')}
+    if not unique:
+        return
+    for index, info in db[name].index_information().items():
+        if index in unique and not info.get('unique'):
+            db.command('collMod', name, index={'name': index, 'prepareUnique': True})
+            db.command('collMod', name, index={'name': index, 'unique': True})
+
+
+def main():
+    import argparse
+    import os
+    from pymongo import MongoClient
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Create the MongoDB indexes the application uses')
+    parser.add_argument('--uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/exam_proctoring'))
+    parser.add_argument('--collection', action='append', help='Only this collection (repeatable)')
+    parser.add_argument('--list', action='store_true', help='Print the registry without connecting')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, specs in INDEXES.items():
+            for keys, options in specs:
+                suffix = ' (unique)' if options.get('unique') else ''
+                print(f"{name:24} {index_name(keys)}{suffix}")
+        return
+
+    client = MongoClient(args.uri)
+    db = client.get_default_database()
+    for name, result in ensure_indexes(db, args.collection).items():
+        print(f"{name:24} {result}")
+
+
+if __name__ == '__main__':
+    main()
@@ -105,7 +105,8 @@ def make_proctoring_session(student_id, exam_id, enrollment_id=None):
         'mic_active': True,
         'screen_locked': True,
         'start_time': datetime.utcnow(),
-        'end_time': None
+        'end_time': None,
+        'updated_at': datetime.utcnow()
     }
 
 def session_to_dict(s):
@@ -149,6 +150,7 @@ def violation_to_dict(v):
         'severity': v.get('severity', 'medium'),
         'description': v.get('description'),
         'evidence_path': v.get('evidence_path'),
+        'evidence_deleted_at': v['evidence_deleted_at'].isoformat() if v.get('evidence_deleted_at') else None,
         'trust_score_reduction': v.get('trust_score_reduction', 10),
         'created_at': v['created_at'].isoformat() if v.get('created_at') else None
     }
@@ -1,13 +1,17 @@
 """
 Exam Routes — MongoDB
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from bson import ObjectId
 
 from database import mongo
 from models import make_exam, exam_to_dict, make_question
+from services.exam_cache import get_compiled_exam, invalidate_exam, get_exam_cache
+from services.evidence_store import evidence_url, thumbnail_url
+from services.realtime import publish
+from services.result_reports import ResultReport, parse_report_args, joins_for, prefetch, stream_json
 
 exam_bp = Blueprint('exam', __name__)
 
@@ -95,12 +99,26 @@ def toggle_publish(exam_id):
         data = request.get_json()
         is_published = data.get('is_published', False)
         mongo.db.exams.update_one({'_id': ObjectId(exam_id)}, {'$set': {'is_published': is_published}})
+        invalidate_exam(exam_id)
 
         return jsonify({"message": "Exam status updated successfully", "is_published": is_published}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@exam_bp.route('/cache-stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Compiled exam cache hit/miss counters for this worker"""
+    try:
+        user = _get_user(get_jwt_identity())
+        if not user or user['role'] != 'examiner':
+            return jsonify({"error": "Unauthorized"}), 403
+        return jsonify(get_exam_cache().stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @exam_bp.route('/<exam_id>/acceptance-form', methods=['POST'])
 @jwt_required()
 def submit_acceptance(exam_id):
@@ -151,6 +169,10 @@ def start_exam(exam_id):
         session_doc = make_proctoring_session(student_id=student_id, exam_id=exam_id)
         result = mongo.db.proctoring_sessions.insert_one(session_doc)
         sid = str(result.inserted_id)
+        publish('session_started', exam_id, {
+            'session_id': sid, 'student_id': student_id,
+            'start_time': session_doc['start_time'].isoformat() if session_doc.get('start_time') else None
+        })
 
         return jsonify({
             "message": "Exam started successfully",
@@ -169,30 +191,19 @@ def start_exam(exam_id):
 @jwt_required()
 def get_exam(exam_id):
     try:
-        exam = mongo.db.exams.find_one({'_id': ObjectId(exam_id)})
-        if not exam:
+        compiled = get_compiled_exam(exam_id)
+        if not compiled:
             return jsonify({"error": "Exam not found"}), 404
 
-        questions = list(mongo.db.exam_questions.find({'exam_id': exam_id}).sort('order', 1))
+        exam = compiled['exam']
         return jsonify({
-            "id": str(exam['_id']),
+            "id": exam['id'],
             "title": exam['title'],
-            "description": exam.get('description'),
-            "duration": exam.get('duration'),
-            "total_marks": exam.get('total_marks'),
-            "passing_marks": exam.get('passing_marks'),
-            "questions": [
-                {
-                    "id": str(q['_id']),
-                    "question_text": q['question_text'],
-                    "option_a": q.get('option_a'),
-                    "option_b": q.get('option_b'),
-                    "option_c": q.get('option_c'),
-                    "option_d": q.get('option_d'),
-                    "marks": q.get('marks', 1),
-                    "question_type": q.get('question_type', 'mcq')
-                } for q in questions
-            ]
+            "description": exam['description'],
+            "duration": exam['duration'],
+            "total_marks": exam['total_marks'],
+            "passing_marks": exam['passing_marks'],
+            "questions": compiled['questions']
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -231,6 +242,7 @@ def add_questions(exam_id):
         ) for idx, q in enumerate(questions_data, 1)]
 
         mongo.db.exam_questions.insert_many(docs)
+        invalidate_exam(exam_id)
         return jsonify({
             "message": f"Successfully added {len(docs)} questions",
             "exam_id": exam_id,
@@ -288,9 +300,56 @@ def create_exam():
         return jsonify({"error": f"Failed to create exam: {str(e)}"}), 500
 
 
+# Row fields of the exam results report and the joins they need
+EXAM_RESULT_FIELD_JOINS = {
+    'student': {'students'},
+    'trust_score': {'sessions'},
+    'violation_count': {'violations'},
+    'violations': {'violations'},
+}
+
+
+def _exam_result_row(r, related):
+    student = related['student']
+    session = related['session']
+    violations = related['violations']
+    return {
+        'result_id': str(r['_id']),
+        'student': {
+            'id': str(student['_id']), 'name': student['name'], 'email': student['email']
+        } if student else {'id': r['student_id'], 'name': 'Unknown', 'email': ''},
+        'marks': {
+            'obtained': r.get('obtained_marks'),
+            'total': r.get('total_marks'),
+            'percentage': round(r['percentage'], 2) if r.get('percentage') else 0
+        },
+        'trust_score': r.get('final_trust_score') or (session['current_trust_score'] if session else 100),
+        'status': r.get('status', 'completed'),
+        'violation_count': len(violations),
+        'total_time_taken': r.get('total_time_taken'),
+        'violations': [{
+            'id': str(v['_id']),
+            'type': v.get('violation_type'),
+            'severity': v.get('severity', 'medium'),
+            'description': v.get('description'),
+            'reduction': v.get('trust_score_reduction'),
+            'evidence_path': v.get('evidence_path'),
+            'evidence_url': evidence_url(v.get('evidence_path')),
+            'thumbnail_url': thumbnail_url(v.get('evidence_path')),
+            'time': v['created_at'].isoformat() + 'Z' if v.get('created_at') else None
+        } for v in violations],
+        'submitted_at': r['submitted_at'].isoformat() + 'Z' if r.get('submitted_at') else None
+    }
+
+
 @exam_bp.route('/<exam_id>/results', methods=['GET'])
 @jwt_required()
 def get_exam_results(exam_id):
+    """
+    Results of every student in an exam, streamed
+
+    Query params: offset, limit (default: all), fields (comma-separated row keys)
+    """
     try:
         user_id = get_jwt_identity()
         user = _get_user(user_id)
@@ -303,44 +362,12 @@ def get_exam_results(exam_id):
         if exam['examiner_id'] != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
 
-        results = list(mongo.db.exam_results.find({'exam_id': exam_id}))
-        results_data = []
-        for r in results:
-            student = mongo.db.users.find_one({'_id': ObjectId(r['student_id'])})
-            violations = list(mongo.db.violations.find(
-                {'exam_id': exam_id, 'student_id': r['student_id']}
-            ).sort('created_at', -1))
-            session = mongo.db.proctoring_sessions.find_one(
-                {'exam_id': exam_id, 'student_id': r['student_id']}
-            )
-            results_data.append({
-                'result_id': str(r['_id']),
-                'student': {
-                    'id': str(student['_id']), 'name': student['name'], 'email': student['email']
-                } if student else {'id': r['student_id'], 'name': 'Unknown', 'email': ''},
-                'marks': {
-                    'obtained': r.get('obtained_marks'),
-                    'total': r.get('total_marks'),
-                    'percentage': round(r['percentage'], 2) if r.get('percentage') else 0
-                },
-                'trust_score': r.get('final_trust_score') or (session['current_trust_score'] if session else 100),
-                'status': r.get('status', 'completed'),
-                'violation_count': len(violations),
-                'total_time_taken': r.get('total_time_taken'),
-                'violations': [{
-                    'id': str(v['_id']),
-                    'type': v.get('violation_type'),
-                    'severity': v.get('severity', 'medium'),
-                    'description': v.get('description'),
-                    'reduction': v.get('trust_score_reduction'),
-                    'evidence_path': v.get('evidence_path'),
-                    'evidence_url': f"/api/proctoring/evidence/{v['evidence_path']}" if v.get('evidence_path') else None,
-                    'time': v['created_at'].isoformat() + 'Z' if v.get('created_at') else None
-                } for v in violations],
-                'submitted_at': r['submitted_at'].isoformat() + 'Z' if r.get('submitted_at') else None
-            })
-
-        return jsonify({
+        offset, limit, fields = parse_report_args(request.args)
+        report = ResultReport(
+            {'exam_id': exam_id}, _exam_result_row,
+            joins=joins_for(fields, EXAM_RESULT_FIELD_JOINS)
+        )
+        head = {
             'exam': {
                 'id': str(exam['_id']),
                 'title': exam['title'],
@@ -349,9 +376,14 @@ def get_exam_results(exam_id):
                 'auto_delete_enabled': exam.get('auto_delete_enabled', False),
                 'auto_delete_date': exam['auto_delete_date'].isoformat() + 'Z' if exam.get('auto_delete_date') else None
             },
-            'results': results_data,
-            'total_students': len(results_data)
-        }), 200
+            'offset': offset,
+            'total_students': report.count()
+        }
+        rows = prefetch(report.rows(offset, limit + 1 if limit else None, fields))
+        return Response(
+            stream_with_context(stream_json(head, 'results', rows, limit)),
+            mimetype='application/json'
+        )
 
     except Exception as e:
         import traceback; traceback.print_exc()
@@ -7,7 +7,8 @@ from bson import ObjectId
 import logging
 
 from database import mongo
-from models import notification_to_dict, exam_to_dict
+from models import exam_to_dict
+from services.notification_service import notification_service
 
 examiner_bp = Blueprint('examiner', __name__, url_prefix='/api/examiner')
 logger = logging.getLogger(__name__)
@@ -16,16 +17,25 @@ logger = logging.getLogger(__name__)
 @examiner_bp.route('/notifications', methods=['GET'])
 @jwt_required()
 def get_notifications():
+    """
+    Notifications of the examiner, newest first
+
+    Query params: limit (default 20, max 100), before (next_cursor of the
+    previous page), unread_only
+    """
     try:
         examiner_id = get_jwt_identity()
-        notifications = list(mongo.db.examiner_notifications.find(
-            {'examiner_id': examiner_id}
-        ).sort('created_at', -1))
-        unread = sum(1 for n in notifications if not n.get('is_read'))
-        return jsonify({
-            'notifications': [notification_to_dict(n) for n in notifications],
-            'unread_count': unread
-        }), 200
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        before = request.args.get('before')
+        if before and not ObjectId.is_valid(before):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        unread_only = request.args.get('unread_only', 'false').lower() == 'true'
+
+        page = notification_service.get_notifications_page(examiner_id, limit, before, unread_only)
+        page['unread_count'] = notification_service.get_unread_count(examiner_id)
+        return jsonify(page), 200
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -35,17 +45,42 @@ def get_notifications():
 def mark_notification_read(notif_id):
     try:
         examiner_id = get_jwt_identity()
-        n = mongo.db.examiner_notifications.find_one({'_id': ObjectId(notif_id)})
+        n = mongo.db.examiner_notifications.find_one({'_id': ObjectId(notif_id)}, {'examiner_id': 1})
         if not n:
             return jsonify({'error': 'Notification not found'}), 404
         if n['examiner_id'] != examiner_id:
             return jsonify({'error': 'Not authorized'}), 403
-        mongo.db.examiner_notifications.update_one({'_id': ObjectId(notif_id)}, {'$set': {'is_read': True}})
+        notification_service.mark_read(examiner_id, [notif_id])
         return jsonify({'message': 'Marked as read'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@examiner_bp.route('/notifications/read', methods=['POST'])
+@jwt_required()
+def mark_notifications_read():
+    """Mark several notifications read: {"ids": [...]}, or {"all": true} for every one"""
+    try:
+        examiner_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        if data.get('all'):
+            ids = None
+        elif isinstance(data.get('ids'), list) and data['ids']:
+            ids = data['ids'][:1000]
+        else:
+            return jsonify({'error': 'Provide ids or all'}), 400
+
+        # Only the examiner's own notifications match, so foreign ids are ignored
+        marked = notification_service.mark_read(examiner_id, ids)
+        return jsonify({
+            'message': 'Marked as read',
+            'marked': marked,
+            'unread_count': notification_service.get_unread_count(examiner_id)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @examiner_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
 def get_dashboard():
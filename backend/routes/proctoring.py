@@ -1,14 +1,19 @@
 """
 Proctoring Routes — MongoDB
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, redirect
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import logging
 import os
-import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+from config import Config
+from config_evidence import THUMBNAIL_SIZES
 from database import mongo
 from models import (
     make_violation, violation_to_dict,
@@ -16,21 +21,39 @@ from models import (
     make_analytics, analytics_to_dict, session_to_dict
 )
 from services.email_service import email_service
+from services.grading import load_answer_key, grade_answers
+from services.evidence_store import (
+    store_stream, add_reference, evidence_url, thumbnail_url, evidence_abspath,
+    normalize_evidence_path, verify_evidence_signature
+)
+from services.evidence_thumbnails import get_thumbnail, thumbnail_relpath
+from services.notification_service import notification_service
+from services.realtime import publish
+from services.session_monitor import recent_violations_pipeline
 
 proctoring_bp = Blueprint('proctoring', __name__)
 logger = logging.getLogger(__name__)
 
-UPLOAD_FOLDER = 'uploads/evidence'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'avi', 'mov', 'webm'}
 
+# Detectors run by /analyze-frame and /frames, and the result reported when one is
+# unavailable. Gaze and head movement are scheduled around the face box in cascade mode.
+FRAME_DETECTION_DEFAULTS = {
+    'phone': {'phone_detected': False},
+    'persons': {'multiple_persons': False},
+    'face': {'face_detected': True},
+    'eye_gaze': {'looking_at_screen': True, 'gaze_direction': 'center', 'is_suspicious': False},
+    'head_movement': {'extreme_movement': False},
+}
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
 def save_evidence_file(file):
+    """Store an uploaded evidence file in the evidence store; returns its evidence_path"""
     try:
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
         filename_ext = 'jpg'
         if file.filename and '.' in file.filename:
             ext = file.filename.rsplit('.', 1)[1].lower()
@@ -39,9 +62,7 @@ def save_evidence_file(file):
         elif file.content_type:
             ct_map = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif', 'video/mp4': 'mp4'}
             filename_ext = ct_map.get(file.content_type, 'jpg')
-        filename = f"{uuid.uuid4()}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{filename_ext}"
-        file.save(os.path.join(UPLOAD_FOLDER, filename))
-        return filename
+        return store_stream(file.stream, filename_ext)
     except Exception as e:
         logger.error(f"Error saving file: {e}")
     return None
@@ -63,53 +84,7 @@ def report_violation():
         if 'evidence' in request.files:
             evidence_path = save_evidence_file(request.files['evidence'])
 
-        severity_map = {'low': 5, 'medium': 10, 'high': 20}
-        trust_score_reduction = severity_map.get(severity, 10)
-
-        v_doc = make_violation(
-            student_id=student_id,
-            exam_id=session['exam_id'],
-            session_id=str(session['_id']),
-            violation_type=violation_type,
-            severity=severity,
-            evidence_path=evidence_path,
-            trust_score_reduction=trust_score_reduction
-        )
-        v_result = mongo.db.violations.insert_one(v_doc)
-
-        new_trust = max(0, session['current_trust_score'] - trust_score_reduction)
-        mongo.db.proctoring_sessions.update_one(
-            {'_id': session['_id']},
-            {'$set': {'current_trust_score': new_trust}}
-        )
-
-        response_data = {
-            'message': 'Violation recorded',
-            'violation_id': str(v_result.inserted_id),
-            'current_trust_score': new_trust,
-            'warning': new_trust < 80,
-            'evidence_saved': evidence_path is not None
-        }
-
-        if new_trust < 50 and session['status'] == 'active':
-            existing_result = mongo.db.exam_results.find_one({
-                'student_id': student_id, 'exam_id': session['exam_id']
-            })
-            if not existing_result:
-                response_data['critical_message'] = 'Trust score below 50%. Exam will be auto-submitted!'
-                try:
-                    # Refresh session doc with updated trust score
-                    session['current_trust_score'] = new_trust
-                    auto_result = _auto_submit_exam(session)
-                    response_data['auto_submitted'] = True
-                    if auto_result:
-                        response_data['result'] = auto_result
-                except Exception as ae:
-                    logger.error(f"Auto-submit failed: {ae}")
-            else:
-                response_data['critical_message'] = 'Exam already submitted.'
-                response_data['auto_submitted'] = True
-
+        response_data = _record_violation(session, violation_type, severity, evidence_path=evidence_path)
         return jsonify(response_data), 201
 
     except Exception as e:
@@ -118,6 +93,118 @@ def report_violation():
         return jsonify({'error': str(e)}), 500
 
 
+def _record_violation(session, violation_type, severity, evidence_path=None, description=None):
+    """
+    Store a violation, lower the session trust score and auto-submit if critical
+
+    Shared by /violation and background frame analysis.
+
+    Returns:
+        dict: Response payload describing the recorded violation
+    """
+    student_id = session['student_id']
+    severity_map = {'low': 5, 'medium': 10, 'high': 20}
+    trust_score_reduction = severity_map.get(severity, 10)
+
+    v_doc = make_violation(
+        student_id=student_id,
+        exam_id=session['exam_id'],
+        session_id=str(session['_id']),
+        violation_type=violation_type,
+        severity=severity,
+        description=description,
+        evidence_path=evidence_path,
+        trust_score_reduction=trust_score_reduction
+    )
+    from services.violation_buffer import get_violation_buffer
+    buffer = get_violation_buffer()
+    violation_id = buffer.add(v_doc)
+    if evidence_path:
+        add_reference(evidence_path)
+
+    # Atomic decrement floored at 0; the returned document carries the score after this violation
+    updated = mongo.db.proctoring_sessions.find_one_and_update(
+        {'_id': session['_id']},
+        [{'$set': {
+            'current_trust_score': {
+                '$max': [0, {'$subtract': [{'$ifNull': ['$current_trust_score', 100]}, trust_score_reduction]}]
+            },
+            'updated_at': '$$NOW'
+        }}],
+        projection={'current_trust_score': 1, 'status': 1},
+        return_document=ReturnDocument.AFTER
+    )
+    new_trust = updated['current_trust_score'] if updated else max(0, session['current_trust_score'] - trust_score_reduction)
+    if severity == 'high' or new_trust < 50:
+        # Not left in the buffer: it may trigger an auto-submit that counts the session's violations
+        buffer.flush()
+
+    publish('violation', session['exam_id'], {
+        'session_id': str(session['_id']),
+        'student_id': student_id,
+        'violation': {
+            'id': str(violation_id), 'type': violation_type,
+            'severity': severity, 'reduction': trust_score_reduction,
+            'time': v_doc['created_at'].isoformat() if v_doc.get('created_at') else None,
+            'evidence_url': evidence_url(evidence_path),
+            'thumbnail_url': thumbnail_url(evidence_path)
+        }
+    })
+    publish('trust_score', session['exam_id'], {'session_id': str(session['_id']), 'trust_score': new_trust})
+
+    response_data = {
+        'message': 'Violation recorded',
+        'violation_id': str(violation_id),
+        'current_trust_score': new_trust,
+        'warning': new_trust < 80,
+        'evidence_saved': evidence_path is not None
+    }
+
+    if new_trust < 50 and updated and updated.get('status') == 'active':
+        # Only the request that sets the flag runs the auto-submit
+        claimed = mongo.db.proctoring_sessions.find_one_and_update(
+            {'_id': session['_id'], 'auto_submit_triggered': {'$ne': True}},
+            {'$set': {'auto_submit_triggered': True}},
+            projection={'_id': 1}
+        )
+        if claimed:
+            response_data['critical_message'] = 'Trust score below 50%. Exam will be auto-submitted!'
+            try:
+                session['current_trust_score'] = new_trust
+                auto_result = _auto_submit_exam(session)
+                response_data['auto_submitted'] = True
+                publish('auto_submitted', session['exam_id'], {
+                    'session_id': str(session['_id']), 'student_id': student_id, 'trust_score': new_trust
+                })
+                if auto_result:
+                    response_data['result'] = auto_result
+            except Exception as ae:
+                logger.error(f"Auto-submit failed: {ae}")
+        else:
+            response_data['critical_message'] = 'Exam already submitted.'
+            response_data['auto_submitted'] = True
+    elif new_trust < 50:
+        response_data['critical_message'] = 'Exam already submitted.'
+        response_data['auto_submitted'] = True
+
+    return response_data
+
+
+def _end_session(session):
+    """Mark a proctoring session ended, write its buffered violations and free its detectors"""
+    from services.violation_buffer import get_violation_buffer
+    get_violation_buffer().flush()
+    mongo.db.proctoring_sessions.update_one(
+        {'_id': session['_id']},
+        {'$set': {'status': 'ended', 'end_time': datetime.utcnow(), 'updated_at': datetime.utcnow()}}
+    )
+    from services.inference_pool import release_session
+    release_session(str(session['_id']))
+    publish('session_ended', session['exam_id'], {
+        'session_id': str(session['_id']), 'student_id': session['student_id']
+    })
+
+
 def _auto_submit_exam(session):
     """Auto-submit exam when trust score < 50%"""
     try:
@@ -135,29 +222,20 @@ def _auto_submit_exam(session):
                 'final_trust_score': existing.get('final_trust_score')
             }
 
-        mongo.db.proctoring_sessions.update_one(
-            {'_id': session['_id']},
-            {'$set': {'status': 'ended', 'end_time': datetime.utcnow()}}
-        )
+        _end_session(session)
 
         exam = mongo.db.exams.find_one({'_id': ObjectId(exam_id)})
         if not exam:
             return None
 
-        # Calculate marks from already-submitted answers
-        questions = {str(q['_id']): q for q in mongo.db.exam_questions.find({'exam_id': exam_id})}
-        student_answers = list(mongo.db.student_answers.find({'student_id': student_id, 'exam_id': exam_id}))
-
-        obtained_marks = 0
-        correct_count = 0
-        for sa in student_answers:
-            q = questions.get(sa.get('question_id'))
-            if q:
-                if sa.get('selected_answer') == q.get('correct_answer'):
-                    obtained_marks += q.get('marks', 1)
-                    correct_count += 1
-                elif exam.get('negative_marking', 0) > 0:
-                    obtained_marks = max(0, obtained_marks - exam['negative_marking'])
+        # Grade the answers already saved for this exam
+        student_answers = list(mongo.db.student_answers.find(
+            {'student_id': student_id, 'exam_id': exam_id}, {'question_id': 1, 'selected_answer': 1}
+        ))
+        answer_key = load_answer_key(exam_id, [sa.get('question_id') for sa in student_answers])
+        grade = grade_answers(answer_key, student_answers, exam.get('negative_marking', 0))
+        obtained_marks = grade['obtained_marks']
+        correct_count = grade['correct']
 
         total_marks = exam.get('total_marks', 0)
         percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
@@ -174,9 +252,22 @@ def _auto_submit_exam(session):
             percentage=percentage, status='auto_submitted',
             violation_count=violation_count,
             final_trust_score=session['current_trust_score'],
-            correct_answers=correct_count, total_time_taken=time_taken
+            correct_answers=correct_count, incorrect_answers=grade['incorrect'],
+            unanswered=grade['unanswered'], total_time_taken=time_taken
         )
-        mongo.db.exam_results.insert_one(result_doc)
+        try:
+            mongo.db.exam_results.insert_one(result_doc)
+        except DuplicateKeyError:
+            # Graded concurrently by a submission; that result stands
+            existing = mongo.db.exam_results.find_one({'student_id': student_id, 'exam_id': exam_id})
+            return {
+                'obtained_marks': existing.get('obtained_marks'),
+                'total_marks': existing.get('total_marks'),
+                'percentage': existing.get('percentage'),
+                'correct_answers': existing.get('correct_answers'),
+                'violation_count': existing.get('violation_count'),
+                'final_trust_score': existing.get('final_trust_score')
+            }
 
         try:
             notif = make_notification(
@@ -184,7 +275,7 @@ def _auto_submit_exam(session):
                 message=f"🔴 EXAM AUTO-SUBMITTED\nStudent: {student_id}\nReason: Trust Score Below 50%\nScore: {obtained_marks}/{total_marks} ({percentage:.2f}%)\nFinal Trust Score: {session['current_trust_score']}%",
                 severity_level='high'
             )
-            mongo.db.examiner_notifications.insert_one(notif)
+            notification_service.create_notification(notif)
         except Exception as ne:
             logger.warning(f"Notification failed (non-critical): {ne}")
 
@@ -213,88 +304,89 @@ def _auto_submit_exam(session):
 @proctoring_bp.route('/submit', methods=['POST'])
 @jwt_required()
 def submit_exam():
+    """
+    Queue the student's answers for grading
+
+    Returns 202 with a submission_id to poll. Repeating a request with the
+    same idempotency key (Idempotency-Key header or 'idempotency_key'
+    field, default: one per session) returns the original submission.
+    """
     try:
+        from services.submission_service import (
+            create_submission, find_submission, enqueue_submission, grade_submission, grade_if_unclaimed
+        )
         student_id = get_jwt_identity()
-        data = request.get_json()
+        data = request.get_json() or {}
+        idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
 
         session = mongo.db.proctoring_sessions.find_one({'student_id': student_id, 'status': 'active'})
         if not session:
+            previous = find_submission(student_id, idempotency_key)
+            if previous:
+                return _submission_response(previous)
             return jsonify({'error': 'No active session found'}), 404
 
-        exam_id = session['exam_id']
-        exam = mongo.db.exams.find_one({'_id': ObjectId(exam_id)})
-        if not exam:
-            return jsonify({'error': 'Exam not found'}), 404
-
-        answers = data.get('answers', [])
-        obtained_marks = 0
-        correct_count = 0
-        answer_docs = []
-
-        for ans in answers:
-            question_id = ans.get('question_id')
-            selected = ans.get('selected_answer')
-            q = mongo.db.exam_questions.find_one({'_id': ObjectId(question_id)})
-            if not q:
-                continue
-            is_correct = selected == q.get('correct_answer')
-            marks = q.get('marks', 1) if is_correct else 0
-            if not is_correct and exam.get('negative_marking', 0) > 0:
-                marks = max(0, marks - exam['negative_marking'])
-            if is_correct:
-                correct_count += 1
-            obtained_marks += marks
-            answer_docs.append({
-                'student_id': student_id,
-                'exam_id': exam_id,
-                'question_id': question_id,
-                'selected_answer': selected,
-                'marks_awarded': marks
-            })
-
-        if answer_docs:
-            mongo.db.student_answers.insert_many(answer_docs)
-
-        mongo.db.proctoring_sessions.update_one(
-            {'_id': session['_id']},
-            {'$set': {'status': 'ended', 'end_time': datetime.utcnow()}}
+        submission, created = create_submission(
+            session, data.get('answers', []), idempotency_key=idempotency_key,
+            auto_submitted=bool(data.get('auto_submitted'))
         )
+        if not created:
+            return _submission_response(submission)
+
+        _end_session(session)
+
+        if not Config.SUBMISSION_QUEUE_ENABLED or not enqueue_submission(submission['_id']):
+            # No grader workers available: grade in this request
+            try:
+                grade_submission(submission['_id'], stale_after=Config.SUBMISSION_STALE_SECONDS)
+            except Exception as e:
+                # The session is already closed; keep the submission and retry in the background
+                logger.error(f"Inline grading of {submission['_id']} failed, retrying: {e}")
+                grade_if_unclaimed(
+                    current_app._get_current_object(), submission['_id'],
+                    Config.SUBMISSION_FALLBACK_SECONDS, stale_after=Config.SUBMISSION_STALE_SECONDS
+                )
+            submission = mongo.db.submissions.find_one({'_id': submission['_id']})
+        else:
+            grade_if_unclaimed(
+                current_app._get_current_object(), submission['_id'],
+                Config.SUBMISSION_FALLBACK_SECONDS, stale_after=Config.SUBMISSION_STALE_SECONDS
+            )
 
-        total_marks = exam.get('total_marks', 0)
-        percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
-        violation_count = mongo.db.violations.count_documents({'student_id': student_id, 'exam_id': exam_id})
+        return _submission_response(submission)
 
-        time_taken = None
-        if session.get('start_time'):
-            time_taken = int((datetime.utcnow() - session['start_time']).total_seconds() / 60)
+    except Exception as e:
+        logger.error(f"Error submitting exam: {e}")
+        import traceback; traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
 
-        result_doc = make_exam_result(
-            student_id=student_id, exam_id=exam_id,
-            enrollment_id=session.get('enrollment_id'),
-            obtained_marks=obtained_marks, total_marks=total_marks,
-            percentage=percentage, status='completed',
-            violation_count=violation_count,
-            final_trust_score=session.get('current_trust_score', 100),
-            correct_answers=correct_count,
-            incorrect_answers=len(answers) - correct_count,
-            total_time_taken=time_taken
-        )
-        mongo.db.exam_results.insert_one(result_doc)
 
-        return jsonify({
-            'message': 'Exam submitted successfully',
-            'result': {
-                'obtained_marks': obtained_marks, 'total_marks': total_marks,
-                'percentage': round(percentage, 2), 'correct_answers': correct_count,
-                'total_questions': len(answers), 'violation_count': violation_count,
-                'final_trust_score': session.get('current_trust_score', 100),
-                'time_taken': time_taken
-            }
-        }), 200
+def _submission_response(submission):
+    """200 with the result once graded, otherwise 202 with where to poll"""
+    from services.submission_service import submission_to_dict
+    payload = submission_to_dict(submission)
+    if submission.get('status') == 'completed':
+        payload['message'] = 'Exam submitted successfully'
+        return jsonify(payload), 200
+    payload['message'] = 'Exam submitted, grading in progress'
+    payload['status_url'] = f"/api/proctoring/submissions/{submission['_id']}"
+    response = jsonify(payload)
+    response.headers['Retry-After'] = str(Config.SUBMISSION_POLL_AFTER_SECONDS)
+    return response, 202
 
+
+@proctoring_bp.route('/submissions/<submission_id>', methods=['GET'])
+@jwt_required()
+def get_submission(submission_id):
+    """Poll a queued submission for its result"""
+    try:
+        submission = mongo.db.submissions.find_one({'_id': ObjectId(submission_id)}, {'answers': 0})
+        if not submission:
+            return jsonify({'error': 'Submission not found'}), 404
+        if submission['student_id'] != get_jwt_identity():
+            return jsonify({'error': 'Unauthorized'}), 403
+        return _submission_response(submission)
     except Exception as e:
-        logger.error(f"Error submitting exam: {e}")
-        import traceback; traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
 
@@ -351,7 +443,6 @@ def update_analytics(session_id):
             session = mongo.db.proctoring_sessions.find_one({'_id': ObjectId(session_id)})
             if not session:
                 return jsonify({'error': 'Session not found'}), 404
-            from models import make_analytics
             a_doc = make_analytics(session_id=session_id)
             mongo.db.session_analytics.insert_one(a_doc)
             a = mongo.db.session_analytics.find_one({'session_id': session_id})
@@ -372,25 +463,76 @@ def update_analytics(session_id):
         return jsonify({'error': str(e)}), 500
 
 
+# Polls with updated_since overlap by this much so writes racing the previous poll are not missed
+MONITOR_CURSOR_OVERLAP = timedelta(seconds=2)
+MONITOR_RECENT_VIOLATIONS = 5
+
+
 @proctoring_bp.route('/monitor/active-sessions', methods=['GET'])
 @jwt_required()
 def get_active_sessions():
+    """
+    Live sessions of the examiner's exams
+
+    Query params:
+        limit: Page size (default 100, max 500)
+        after: session_id to continue a page from
+        updated_since: ISO timestamp from a previous response's next_cursor;
+            returns only sessions changed since then, plus the ids of sessions that ended
+    """
     try:
         user_id = get_jwt_identity()
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
+        user = mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'role': 1})
         if not user or user['role'] != 'examiner':
             return jsonify({'error': 'Unauthorized'}), 403
 
-        examiner_exam_ids = [str(e['_id']) for e in mongo.db.exams.find({'examiner_id': user_id})]
-        active_sessions = list(mongo.db.proctoring_sessions.find({
-            'exam_id': {'$in': examiner_exam_ids}, 'status': 'active'
-        }))
+        limit = max(1, min(int(request.args.get('limit', 100)), 500))
+        poll_started = datetime.utcnow()
+
+        exams = {
+            str(e['_id']): e for e in
+            mongo.db.exams.find({'examiner_id': user_id}, {'title': 1, 'duration': 1})
+        }
+        query = {'exam_id': {'$in': list(exams)}}
+        updated_since = request.args.get('updated_since')
+        if updated_since:
+            since = datetime.fromisoformat(updated_since.rstrip('Z'))
+            query['updated_at'] = {'$gt': since - MONITOR_CURSOR_OVERLAP}
+        else:
+            query['status'] = 'active'
+        after = request.args.get('after')
+        if after:
+            query['_id'] = {'$gt': ObjectId(after)}
+
+        sessions = list(mongo.db.proctoring_sessions.find(query, {
+            'student_id': 1, 'exam_id': 1, 'status': 1, 'current_trust_score': 1,
+            'start_time': 1, 'camera_active': 1, 'mic_active': 1
+        }).sort('_id', 1).limit(limit + 1))
+        has_more = len(sessions) > limit
+        sessions = sessions[:limit]
+
+        ended_ids = [str(s['_id']) for s in sessions if s.get('status') != 'active']
+        active = [s for s in sessions if s.get('status') == 'active']
+
+        students = {}
+        recent = {}
+        if active:
+            student_ids = list({ObjectId(s['student_id']) for s in active})
+            students = {
+                str(u['_id']): u for u in
+                mongo.db.users.find({'_id': {'$in': student_ids}}, {'name': 1, 'email': 1})
+            }
+            recent = {
+                r['_id']: r['violations'] for r in mongo.db.proctoring_sessions.aggregate(
+                    recent_violations_pipeline([s['_id'] for s in active], MONITOR_RECENT_VIOLATIONS)
+                )
+            }
 
+        host = request.host_url.rstrip('/')
         sessions_data = []
-        for s in active_sessions:
-            student = mongo.db.users.find_one({'_id': ObjectId(s['student_id'])})
-            exam = mongo.db.exams.find_one({'_id': ObjectId(s['exam_id'])})
-            violations = list(mongo.db.violations.find({'session_id': str(s['_id'])}).sort('created_at', -1).limit(5))
+        for s in active:
+            student = students.get(s['student_id'])
+            exam = exams.get(s['exam_id'])
             sessions_data.append({
                 'session_id': str(s['_id']),
                 'student': {'id': str(student['_id']), 'name': student['name'], 'email': student['email']} if student else {},
@@ -400,15 +542,26 @@ def get_active_sessions():
                 'camera_active': s.get('camera_active', True),
                 'mic_active': s.get('mic_active', True),
                 'violations': [{
-                    'id': str(v['_id']), 'type': v.get('violation_type'),
-                    'reduction': v.get('trust_score_reduction'),
+                    'id': str(v['id']), 'type': v.get('type'),
+                    'reduction': v.get('reduction'),
                     'time': v['created_at'].isoformat() if v.get('created_at') else None,
-                    'evidence_url': f"{request.host_url.rstrip('/')}/api/proctoring/evidence/{v['evidence_path'].split('/')[-1]}" if v.get('evidence_path') else None
-                } for v in violations]
+                    'evidence_url': evidence_url(v.get('evidence_path'), host),
+                    'thumbnail_url': thumbnail_url(v.get('evidence_path'), host=host)
+                } for v in recent.get(str(s['_id']), [])]
             })
 
-        return jsonify({'active_sessions': sessions_data, 'count': len(sessions_data)}), 200
+        return jsonify({
+            'active_sessions': sessions_data,
+            'ended_session_ids': ended_ids,
+            'count': len(sessions_data),
+            'has_more': has_more,
+            'next_page': str(sessions[-1]['_id']) if has_more else None,
+            'next_cursor': poll_started.isoformat() + 'Z',
+            'delta': bool(updated_since)
+        }), 200
 
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
     except Exception as e:
         logger.error(f"Error getting active sessions: {e}")
         import traceback; traceback.print_exc()
@@ -450,7 +603,8 @@ def get_session_details(session_id):
                 'id': str(v['_id']), 'type': v.get('violation_type'),
                 'reduction': v.get('trust_score_reduction'),
                 'time': v['created_at'].isoformat() if v.get('created_at') else None,
-                'evidence_url': f"{request.host_url.rstrip('/')}/api/proctoring/evidence/{v['evidence_path'].split('/')[-1]}" if v.get('evidence_path') else None
+                'evidence_url': evidence_url(v.get('evidence_path'), request.host_url.rstrip('/')),
+                'thumbnail_url': thumbnail_url(v.get('evidence_path'), host=request.host_url.rstrip('/'))
             } for v in violations],
             'violation_count': len(violations)
         }), 200
@@ -461,33 +615,80 @@ def get_session_details(session_id):
 
 @proctoring_bp.route('/evidence/<path:filename>', methods=['GET'])
 def serve_evidence(filename):
+    """
+    Serve an evidence file
+
+    Links from evidence_url carry exp and sig, which are checked without a
+    database lookup. Older links with an examiner JWT in ?token= still work.
+    ?size= returns a cached JPEG preview (see thumbnail_url). A blob that
+    compression re-encoded under a new extension redirects to the new file.
+    """
     try:
-        from flask_jwt_extended import decode_token
-        token = request.args.get('token')
-        if not token:
-            return jsonify({'error': 'Unauthorized'}), 403
-        try:
-            decoded = decode_token(token)
-            user_id = decoded['sub']
-        except Exception:
-            return jsonify({'error': 'Invalid token'}), 403
-
-        user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
-        if not user or user['role'] != 'examiner':
-            return jsonify({'error': 'Unauthorized'}), 403
-
-        safe_filename = os.path.basename(filename)
-        evidence_path = os.path.join(UPLOAD_FOLDER, safe_filename)
-        if not os.path.exists(evidence_path):
+        if request.args.get('sig'):
+            if not verify_evidence_signature(filename, request.args.get('exp'), request.args.get('sig')):
+                return jsonify({'error': 'Invalid or expired link'}), 403
+        else:
+            from flask_jwt_extended import decode_token
+            token = request.args.get('token')
+            if not token:
+                return jsonify({'error': 'Unauthorized'}), 403
+            try:
+                decoded = decode_token(token)
+                user_id = decoded['sub']
+            except Exception:
+                return jsonify({'error': 'Invalid token'}), 403
+
+            user = mongo.db.users.find_one({'_id': ObjectId(user_id)})
+            if not user or user['role'] != 'examiner':
+                return jsonify({'error': 'Unauthorized'}), 403
+
+        evidence_path = evidence_abspath(filename)
+        if not evidence_path or not os.path.isfile(evidence_path):
+            blob = mongo.db.evidence_blobs.find_one(
+                {'_id': normalize_evidence_path(filename)}, {'moved_to': 1}
+            )
+            if blob and blob.get('moved_to'):
+                url = evidence_url(blob['moved_to'])
+                if request.args.get('size'):
+                    url += f"&size={request.args['size']}"
+                return redirect(url)
             return jsonify({'error': 'Evidence not found'}), 404
 
-        from flask import send_file
-        return send_file(evidence_path)
+        size = request.args.get('size')
+        if size:
+            if not size.isdigit() or int(size) not in THUMBNAIL_SIZES:
+                return jsonify({'error': f'size must be one of {list(THUMBNAIL_SIZES)}'}), 400
+            thumbnail = get_thumbnail(filename, int(size))
+            if not thumbnail:
+                return jsonify({'error': 'No preview for this evidence'}), 404
+            return _evidence_response(thumbnail_relpath(filename, int(size)), thumbnail)
+        return _evidence_response(filename, evidence_path)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _evidence_response(relative_path, evidence_path):
+    """
+    File response with a strong ETag, conditional GET and Range support
+
+    With EVIDENCE_ACCEL_REDIRECT on, nginx streams the file from its internal
+    location instead (and handles ETag and Range itself).
+    """
+    from flask import send_file
+    max_age = Config.EVIDENCE_URL_TTL_SECONDS
+    if Config.EVIDENCE_ACCEL_REDIRECT:
+        import mimetypes
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(evidence_path)[0] or 'application/octet-stream'
+        )
+        response.headers['X-Accel-Redirect'] = Config.EVIDENCE_ACCEL_PREFIX + normalize_evidence_path(relative_path)
+    else:
+        response = send_file(evidence_path, conditional=True, etag=True, max_age=max_age)
+    response.headers['Cache-Control'] = f'private, max-age={max_age}'
+    return response
+
+
 @proctoring_bp.route('/analyze-frame', methods=['POST'])
 @jwt_required()
 def analyze_frame():
@@ -500,33 +701,361 @@ def analyze_frame():
         if 'frame' not in request.files:
             return jsonify({'error': 'No frame provided'}), 400
 
-        frame_bytes = request.files['frame'].read()
-        import numpy as np
-        import cv2
-        frame = cv2.imdecode(np.frombuffer(frame_bytes, np.uint8), cv2.IMREAD_COLOR)
+        from ai_models.frame_engine import FrameTooLarge
+        try:
+            frame = _decode_uploaded_frame()
+        except FrameTooLarge as e:
+            return jsonify({'error': str(e)}), 413
         if frame is None:
             return jsonify({'error': 'Invalid frame'}), 400
 
-        from ai_models.model_manager import get_detection_manager
-        manager = get_detection_manager()
-        detections = {}
+        from services.inference_pool import get_inference_pool, InferenceQueueFull, InferenceTimeout
+        try:
+            detections = get_inference_pool().analyze(
+                str(session['_id']), frame, detectors=FRAME_DETECTION_DEFAULTS.keys(),
+                skip_unchanged=Config.FRAME_SKIP_UNCHANGED
+            )
+        except InferenceQueueFull:
+            response = jsonify({'error': 'Frame analysis is busy, retry later'})
+            response.headers['Retry-After'] = str(Config.INFERENCE_RETRY_AFTER_SECONDS)
+            return response, 503
+        except InferenceTimeout:
+            return jsonify({'error': 'Frame analysis timed out'}), 504
+        timings = detections.pop('timings_ms', {})
+        reused = detections.pop('reused', False)
+        detections.pop('change_score', None)
+        for key, default in FRAME_DETECTION_DEFAULTS.items():
+            detections.setdefault(key, dict(default))
+
+        return jsonify({'detections': detections, 'timings_ms': timings, 'reused': reused}), 200
 
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _decode_uploaded_frame():
+    """
+    Decode the 'frame' upload of the current request at analysis resolution
+
+    Returns:
+        BGR frame, or None if invalid
+
+    Raises:
+        FrameTooLarge: If the upload exceeds the byte or pixel budget
+    """
+    from ai_models.frame_engine import decode_frame, FrameTooLarge
+    if (request.content_length or 0) > Config.FRAME_MAX_UPLOAD_BYTES:
+        raise FrameTooLarge('Frame upload too large')
+    return decode_frame(
+        request.files['frame'].read(),
+        analysis_width=Config.FRAME_ANALYSIS_WIDTH,
+        max_bytes=Config.FRAME_MAX_UPLOAD_BYTES,
+        max_pixels=Config.FRAME_MAX_PIXELS
+    )
+
+
+def _record_detected_violations(session, detections):
+    """
+    Record the violations implied by detector results
+
+    Each violation type is recorded at most once per FRAME_VIOLATION_COOLDOWN_SECONDS.
+
+    Returns:
+        list: {'type', 'violation_id'} for each violation recorded
+    """
+    from services.violation_detector import violation_detector
+    from services.violation_buffer import get_violation_buffer
+    recorded = []
+    cutoff = datetime.utcnow() - timedelta(seconds=Config.FRAME_VIOLATION_COOLDOWN_SECONDS)
+    buffer = get_violation_buffer()
+    for violation_type, description in violation_detector.violations_from_detections(detections):
+        if buffer.has_pending(str(session['_id']), violation_type, cutoff) or mongo.db.violations.find_one({
+            'session_id': str(session['_id']), 'violation_type': violation_type,
+            'created_at': {'$gte': cutoff}
+        }, {'_id': 1}):
+            continue
+        outcome = _record_violation(
+            session, violation_type,
+            violation_detector.get_violation_severity(violation_type),
+            description=description
+        )
+        recorded.append({'type': violation_type, 'violation_id': outcome['violation_id']})
+        if outcome.get('auto_submitted'):
+            break
+    return recorded
+
+
+_result_executor = None
+_result_executor_lock = threading.Lock()
+
+
+def _get_result_executor():
+    """
+    Threads that persist background frame results
+
+    Future callbacks run on the inference pool's single collector thread;
+    doing the Mongo writes (and possibly an auto-submit) there would hold
+    up every other frame's result, including synchronous /analyze-frame
+    callers. The callback only hands the work to this executor.
+    """
+    global _result_executor
+    if _result_executor is None:
+        with _result_executor_lock:
+            if _result_executor is None:
+                _result_executor = ThreadPoolExecutor(
+                    max_workers=Config.FRAME_RESULT_WORKERS, thread_name_prefix='frame-results'
+                )
+    return _result_executor
+
+
+def _store_frame_result(app, frame_id, session_id, future):
+    """Persist background detections and record any violations they imply"""
+    with app.app_context():
         try:
-            detections['phone'] = manager.phone_detector.detect_phone(frame) if manager.phone_detector else {'phone_detected': False}
+            detections = future.result()
         except Exception as e:
-            detections['phone'] = {'phone_detected': False}
+            logger.error(f"Background frame analysis failed: {e}")
+            mongo.db.frame_results.update_one(
+                {'_id': frame_id},
+                {'$set': {'status': 'failed', 'error': str(e), 'completed_at': datetime.utcnow()}}
+            )
+            return
 
         try:
-            detections['persons'] = manager.person_detector.detect_persons(frame) if manager.person_detector else {'multiple_persons': False}
+            timings = detections.pop('timings_ms', {})
+            recorded = []
+            session = None
+            if not detections.get('reused'):
+                # Reused results were already turned into violations when first computed
+                session = mongo.db.proctoring_sessions.find_one({'_id': session_id, 'status': 'active'})
+            if session:
+                recorded = _record_detected_violations(session, detections)
+
+            mongo.db.frame_results.update_one(
+                {'_id': frame_id},
+                {'$set': {
+                    'status': 'completed', 'detections': detections, 'timings_ms': timings,
+                    'violations': recorded, 'completed_at': datetime.utcnow()
+                }}
+            )
         except Exception as e:
-            detections['persons'] = {'multiple_persons': False}
+            logger.error(f"Error storing frame result: {e}")
 
+
+def _frame_result_to_dict(doc):
+    return {
+        'frame_id': str(doc['_id']),
+        'session_id': doc['session_id'],
+        'status': doc.get('status'),
+        'detections': doc.get('detections'),
+        'violations': doc.get('violations', []),
+        'timings_ms': doc.get('timings_ms'),
+        'error': doc.get('error'),
+        'created_at': doc['created_at'].isoformat() + 'Z' if doc.get('created_at') else None,
+        'completed_at': doc['completed_at'].isoformat() + 'Z' if doc.get('completed_at') else None
+    }
+
+
+@proctoring_bp.route('/frames', methods=['POST'])
+@jwt_required()
+def ingest_frame():
+    """Accept a webcam frame for background analysis and return immediately"""
+    try:
+        student_id = get_jwt_identity()
+        session = mongo.db.proctoring_sessions.find_one({'student_id': student_id, 'status': 'active'})
+        if not session:
+            return jsonify({'error': 'No active session'}), 404
+
+        if 'frame' not in request.files:
+            return jsonify({'error': 'No frame provided'}), 400
+
+        from ai_models.frame_engine import FrameTooLarge
         try:
-            detections['face'] = manager.face_detector.detect_face(frame) if manager.face_detector else {'face_detected': True}
-        except Exception as e:
-            detections['face'] = {'face_detected': True}
+            frame = _decode_uploaded_frame()
+        except FrameTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        if frame is None:
+            return jsonify({'error': 'Invalid frame'}), 400
+
+        frame_id = ObjectId()
+        mongo.db.frame_results.insert_one({
+            '_id': frame_id,
+            'session_id': str(session['_id']),
+            'student_id': student_id,
+            'exam_id': session['exam_id'],
+            'status': 'pending',
+            'created_at': datetime.utcnow()
+        })
+
+        from services.inference_pool import get_inference_pool, InferenceQueueFull
+        try:
+            future = get_inference_pool().submit(
+                str(session['_id']), frame, detectors=FRAME_DETECTION_DEFAULTS.keys(),
+                skip_unchanged=Config.FRAME_SKIP_UNCHANGED
+            )
+        except InferenceQueueFull:
+            mongo.db.frame_results.update_one(
+                {'_id': frame_id}, {'$set': {'status': 'rejected', 'completed_at': datetime.utcnow()}}
+            )
+            response = jsonify({'error': 'Frame analysis is busy, retry later'})
+            response.headers['Retry-After'] = str(Config.INFERENCE_RETRY_AFTER_SECONDS)
+            return response, 503
+
+        app = current_app._get_current_object()
+        future.add_done_callback(
+            lambda f: _get_result_executor().submit(_store_frame_result, app, frame_id, session['_id'], f)
+        )
+
+        return jsonify({
+            'frame_id': str(frame_id),
+            'status': 'pending',
+            'results_url': f"/api/proctoring/frames?session_id={session['_id']}"
+        }), 202
+
+    except Exception as e:
+        logger.error(f"Error ingesting frame: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@proctoring_bp.route('/frames', methods=['GET'])
+@jwt_required()
+def get_frame_results():
+    """Bulk frame analysis results for a session, optionally only those after a cursor"""
+    try:
+        user_id = get_jwt_identity()
+        session_id = request.args.get('session_id')
+        if session_id:
+            session = mongo.db.proctoring_sessions.find_one({'_id': ObjectId(session_id)})
+        else:
+            session = mongo.db.proctoring_sessions.find_one({'student_id': user_id, 'status': 'active'})
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+
+        if session['student_id'] != user_id:
+            exam = mongo.db.exams.find_one({'_id': ObjectId(session['exam_id'])}, {'examiner_id': 1})
+            if not exam or exam.get('examiner_id') != user_id:
+                return jsonify({'error': 'Unauthorized'}), 403
+
+        try:
+            limit = max(1, min(int(request.args.get('limit', 100)), 500))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        after = request.args.get('after')
+        if after and not ObjectId.is_valid(after):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+        query = {'session_id': str(session['_id'])}
+        if after:
+            query['_id'] = {'$gt': ObjectId(after)}
+
+        docs = list(mongo.db.frame_results.find(query).sort('_id', 1).limit(limit))
+
+        # Stop the cursor before the first pending frame so its result is returned once ready
+        next_cursor = after
+        for d in docs:
+            if d.get('status') == 'pending':
+                break
+            next_cursor = str(d['_id'])
+
+        return jsonify({
+            'session_id': str(session['_id']),
+            'frames': [_frame_result_to_dict(d) for d in docs],
+            'next_cursor': next_cursor
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+AUDIO_FORMATS = {'pcm_s16le': '<i2', 'pcm_f32le': '<f4'}
 
-        return jsonify({'detections': detections}), 200
 
+@proctoring_bp.route('/audio', methods=['POST'])
+@jwt_required()
+def ingest_audio():
+    """
+    Analyse a chunk of the student's microphone stream
+
+    The body is raw mono PCM (Content-Type: application/octet-stream), or a
+    multipart 'audio' file. sample_rate and format ('pcm_s16le' or
+    'pcm_f32le') are query parameters. Consecutive uploads of one session
+    form a continuous stream: they are analysed by the session's inference
+    worker, which keeps the sound detector's state between chunks.
+    """
+    try:
+        student_id = get_jwt_identity()
+        session = mongo.db.proctoring_sessions.find_one({'student_id': student_id, 'status': 'active'})
+        if not session:
+            return jsonify({'error': 'No active session'}), 404
+
+        if (request.content_length or 0) > Config.AUDIO_MAX_UPLOAD_BYTES:
+            return jsonify({'error': 'Audio chunk too large'}), 413
+
+        dtype = AUDIO_FORMATS.get(request.args.get('format', 'pcm_s16le'))
+        if dtype is None:
+            return jsonify({'error': f"Unsupported format, use one of {sorted(AUDIO_FORMATS)}"}), 400
+        sample_rate = int(request.args.get('sample_rate', Config.AUDIO_SAMPLE_RATE))
+        if not 8000 <= sample_rate <= 48000:
+            return jsonify({'error': 'sample_rate must be between 8000 and 48000'}), 400
+
+        if 'audio' in request.files:
+            pcm = request.files['audio'].read()
+        else:
+            pcm = request.get_data(cache=False)
+        if not pcm:
+            return jsonify({'error': 'No audio provided'}), 400
+        if len(pcm) % int(dtype[-1]):
+            return jsonify({'error': 'Audio chunk is not a whole number of samples'}), 400
+
+        # The session's worker holds its sound detector, so uploads form one stream
+        from services.inference_pool import get_inference_pool, InferenceQueueFull, InferenceTimeout
+        try:
+            detections = get_inference_pool().analyze_audio(
+                str(session['_id']), pcm, sample_rate=sample_rate, dtype=dtype
+            )
+        except InferenceQueueFull:
+            response = jsonify({'error': 'Audio analysis is busy, retry later'})
+            response.headers['Retry-After'] = str(Config.INFERENCE_RETRY_AFTER_SECONDS)
+            return response, 503
+        except InferenceTimeout:
+            return jsonify({'error': 'Audio analysis timed out'}), 504
+
+        recorded = _record_detected_violations(session, detections)
+        return jsonify({'detections': detections, 'violations': recorded}), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error analysing audio: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@proctoring_bp.route('/detector-status', methods=['GET'])
+@jwt_required()
+def get_detector_status():
+    """
+    Model load times, per-detector timings and pool occupancy
+
+    With inference worker processes the detectors live there, so their
+    reports are listed under 'workers'; the top-level fields describe
+    this server process (used when INFERENCE_WORKERS=0).
+    """
+    try:
+        user = mongo.db.users.find_one({'_id': ObjectId(get_jwt_identity())}, {'role': 1})
+        if not user or user['role'] != 'examiner':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        from ai_models.model_manager import get_startup_report
+        from ai_models.detector_pool import get_detector_pool
+        from services.inference_pool import get_inference_pool
+        pool = get_detector_pool()
+        inference_pool = get_inference_pool()
+        return jsonify({
+            'startup': get_startup_report(),
+            'timings': pool.timings.report(),
+            'detector_pool': pool.stats(),
+            'inference_pool': inference_pool.stats(),
+            'workers': inference_pool.worker_reports()
+        }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -24,15 +24,17 @@ def main():
     import threading
     import time
     from cleanup_evidence import cleanup_old_evidence
+    from config_evidence import AUTO_CLEANUP_INTERVAL_HOURS
 
     def background_cleanup():
         while True:
             try:
                 print("* Running automatic evidence cleanup job...")
-                cleanup_old_evidence()
+                with app.app_context():
+                    cleanup_old_evidence()
             except Exception as e:
                 print(f"Cleanup error: {e}")
-            time.sleep(6 * 3600)  # Sleep 6 hours
+            time.sleep(AUTO_CLEANUP_INTERVAL_HOURS * 3600)
 
     cleanup_thread = threading.Thread(target=background_cleanup, daemon=True)
     cleanup_thread.start()
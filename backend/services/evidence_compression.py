@@ -0,0 +1,241 @@
+"""
+Background evidence image compression
+"""
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config_evidence import (
+    COMPRESS_IMAGES, COMPRESS_IN_CELERY, COMPRESS_RETRY_AFTER_MINUTES, IMAGE_FORMAT, IMAGE_QUALITY,
+    MAX_IMAGE_DIMENSION
+)
+
+logger = logging.getLogger(__name__)
+
+# Source formats that are re-encoded; GIFs are left alone so animations survive
+COMPRESSIBLE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'bmp'}
+
+# A claim older than this is assumed abandoned and may be retried
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def compressed_ext():
+    """Extension of a re-encoded image (that of IMAGE_FORMAT)"""
+    return 'webp' if IMAGE_FORMAT == 'webp' else 'jpg'
+
+
+def needs_compression(source_ext):
+    return COMPRESS_IMAGES and source_ext in COMPRESSIBLE_EXTENSIONS
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='evidence-compress')
+    return _executor
+
+
+def enqueue_compression(evidence_path):
+    """Compress a newly stored image in the background; never blocks the upload on the work"""
+    if COMPRESS_IN_CELERY:
+        try:
+            from celery_app import compress_evidence as compress_task
+            compress_task.delay(evidence_path)
+            return
+        except Exception as e:
+            logger.warning(f"Could not enqueue compression of {evidence_path}, compressing in process: {e}")
+    _get_executor().submit(_compress_logged, evidence_path)
+
+
+def _compress_logged(evidence_path):
+    try:
+        compress_evidence(evidence_path)
+    except Exception as e:
+        logger.error(f"Compressing {evidence_path} failed: {e}")
+
+
+def compress_evidence(evidence_path):
+    """
+    Downsize and re-encode a stored evidence image
+
+    The image is scaled to fit MAX_IMAGE_DIMENSION and encoded as
+    IMAGE_FORMAT at IMAGE_QUALITY into a temporary file next to it. Uploads
+    are stored under their own extension, so a re-encode into another
+    format is renamed to the same address with the new extension and the
+    blob is moved there (see _move_blob); a same-format re-encode replaces
+    the file in place. An already-small image whose re-encode would not be
+    smaller is kept as it is. A failed re-encode leaves the original file
+    and name untouched.
+
+    Returns:
+        dict: original_size, size and evidence_path (the new one if moved),
+        or None if the blob was missing or claimed elsewhere
+    """
+    from database import mongo
+    from PIL import Image, ImageOps
+    from services.evidence_store import evidence_abspath
+
+    now = datetime.utcnow()
+    claimed = mongo.db.evidence_blobs.find_one_and_update(
+        {'_id': evidence_path, 'compressed_at': None, '$or': [
+            {'compress_claimed_at': None},
+            {'compress_claimed_at': {'$lt': now - CLAIM_TIMEOUT}}
+        ]},
+        {'$set': {'compress_claimed_at': now}}
+    )
+    if not claimed:
+        return None
+
+    path = evidence_abspath(evidence_path)
+    if not path or not os.path.isfile(path):
+        return None
+
+    target_ext = compressed_ext()
+    target = 'WEBP' if target_ext == 'webp' else 'JPEG'
+    new_path = evidence_path
+    original_size = os.path.getsize(path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with Image.open(path) as img:
+            source_format = img.format
+            img = ImageOps.exif_transpose(img)
+            resized = max(img.size) > MAX_IMAGE_DIMENSION
+            if resized:
+                img.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.LANCZOS)
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            with os.fdopen(fd, 'wb') as out:
+                img.save(out, target, quality=IMAGE_QUALITY, optimize=True)
+
+        size = os.path.getsize(tmp_path)
+        if size >= original_size and source_format == target and not resized:
+            os.remove(tmp_path)
+            size = original_size
+        else:
+            if source_format != target:
+                new_path = f"{evidence_path.rsplit('.', 1)[0]}.{target_ext}"
+            os.replace(tmp_path, evidence_abspath(new_path))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        mongo.db.evidence_blobs.update_one({'_id': evidence_path}, {'$set': {'compress_claimed_at': None}})
+        raise
+
+    fields = {
+        'original_size': original_size, 'size': size, 'source_format': source_format,
+        'compressed_at': datetime.utcnow()
+    }
+    if new_path == evidence_path:
+        mongo.db.evidence_blobs.update_one({'_id': evidence_path}, {'$set': fields})
+    else:
+        _move_blob(claimed, new_path, fields)
+    logger.info(f"Compressed {evidence_path}: {original_size} -> {size} bytes")
+
+    # Previews are rendered here, off the request path, rather than on first view
+    from services.evidence_thumbnails import render_thumbnails
+    render_thumbnails(new_path)
+    return {'original_size': original_size, 'size': size, 'evidence_path': new_path}
+
+
+def _move_blob(blob, new_path, fields):
+    """
+    Point a blob and the violations referencing it at its re-encoded file
+
+    The old record stays as a redirect (moved_to) until retention removes
+    it: store_stream hands out the new path for a repeated upload, the
+    evidence route redirects old links, and purge_expired rewrites any
+    violation still naming the old path instead of clearing it.
+    """
+    from database import mongo
+    from pymongo import ReturnDocument
+    from services.evidence_store import LEGACY_PREFIXES, evidence_abspath
+    from services.evidence_thumbnails import remove_thumbnails
+
+    old_path = blob['_id']
+    old = mongo.db.evidence_blobs.find_one_and_update(
+        {'_id': old_path},
+        {'$set': {'moved_to': new_path, 'compressed_at': fields['compressed_at']}},
+        projection={'expires_at': 1},
+        return_document=ReturnDocument.AFTER
+    )
+    mongo.db.evidence_blobs.update_one(
+        {'_id': new_path},
+        {'$set': dict(fields, sha256=blob.get('sha256'), source_ext=blob.get('source_ext'),
+                      created_at=blob.get('created_at')),
+         '$max': {'expires_at': (old or blob)['expires_at']}},
+        upsert=True
+    )
+    mongo.db.violations.update_many(
+        {'evidence_path': {'$in': [old_path] + [prefix + old_path for prefix in LEGACY_PREFIXES]}},
+        {'$set': {'evidence_path': new_path}}
+    )
+    path = evidence_abspath(old_path)
+    if path and os.path.isfile(path):
+        os.remove(path)
+    remove_thumbnails(old_path)
+
+
+def requeue_uncompressed(older_than=None, limit=500):
+    """
+    Queue compression again for images that were stored but never compressed
+
+    Covers tasks lost with a broker or worker that went away, and in-process
+    compressions cut short by a restart. Legacy files keep their original
+    extension, so they are never re-encoded.
+
+    Args:
+        older_than: Minimum age of a blob (default: COMPRESS_RETRY_AFTER_MINUTES)
+        limit: Blobs queued per call
+
+    Returns:
+        int: Blobs queued
+    """
+    from database import mongo
+    if not COMPRESS_IMAGES:
+        return 0
+    now = datetime.utcnow()
+    cutoff = now - (older_than or timedelta(minutes=COMPRESS_RETRY_AFTER_MINUTES))
+    pending = mongo.db.evidence_blobs.find({
+        'compressed_at': None,
+        'created_at': {'$lt': cutoff},
+        'source_ext': {'$in': sorted(COMPRESSIBLE_EXTENSIONS)},
+        'legacy': {'$ne': True},
+        '$or': [{'compress_claimed_at': None}, {'compress_claimed_at': {'$lt': now - CLAIM_TIMEOUT}}]
+    }, {'_id': 1}).limit(limit)
+    count = 0
+    for blob in pending:
+        enqueue_compression(blob['_id'])
+        count += 1
+    return count
+
+
+def compression_savings():
+    """
+    Totals over every compressed blob
+
+    Returns:
+        dict: blobs, original_bytes, stored_bytes, saved_bytes
+    """
+    from database import mongo
+    totals = list(mongo.db.evidence_blobs.aggregate([
+        {'$match': {'compressed_at': {'$ne': None}, 'moved_to': None}},
+        {'$group': {
+            '_id': None, 'blobs': {'$sum': 1},
+            'original_bytes': {'$sum': '$original_size'}, 'stored_bytes': {'$sum': '$size'}
+        }}
+    ]))
+    if not totals:
+        return {'blobs': 0, 'original_bytes': 0, 'stored_bytes': 0, 'saved_bytes': 0}
+    t = totals[0]
+    return {
+        'blobs': t['blobs'], 'original_bytes': t['original_bytes'], 'stored_bytes': t['stored_bytes'],
+        'saved_bytes': t['original_bytes'] - t['stored_bytes']
+    }
@@ -0,0 +1,201 @@
+"""
+Evidence retention — deletes expired evidence through the expires_at index
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+
+from config_evidence import EVIDENCE_DIR, EVIDENCE_RETENTION_HOURS, PURGE_BATCH_SIZE, PURGE_MAX_BATCHES
+
+logger = logging.getLogger(__name__)
+
+RETENTION = timedelta(hours=EVIDENCE_RETENTION_HOURS)
+
+
+def retention_deadline(start=None):
+    """expires_at of evidence stored or referenced at start (default: now)"""
+    return (start or datetime.utcnow()) + RETENTION
+
+
+def backfill_expiry():
+    """
+    Give blobs stored before expires_at existed an expiry of created_at + retention
+
+    Returns:
+        int: Blobs updated
+    """
+    from database import mongo
+    result = mongo.db.evidence_blobs.update_many(
+        {'expires_at': None},
+        [{'$set': {'expires_at': {'$add': [
+            {'$ifNull': ['$created_at', '$$NOW']}, int(RETENTION.total_seconds() * 1000)
+        ]}}}]
+    )
+    return result.modified_count
+
+
+def adopt_legacy_files():
+    """
+    Register evidence saved flat in EVIDENCE_DIR before the content-addressed store
+
+    This is the only directory scan left and is meant to be run once after
+    upgrading. Each file becomes a blob expiring retention hours after its
+    mtime, so purge_expired deletes it like any other.
+
+    Returns:
+        int: Files registered
+    """
+    from database import mongo
+    from pymongo import UpdateOne
+    if not os.path.isdir(EVIDENCE_DIR):
+        return 0
+
+    ops = []
+    for entry in os.scandir(EVIDENCE_DIR):
+        if not entry.is_file() or entry.name.startswith('.'):
+            continue
+        stat = entry.stat()
+        created_at = datetime.utcfromtimestamp(stat.st_mtime)
+        ops.append(UpdateOne({'_id': entry.name}, {'$setOnInsert': {
+            'source_ext': entry.name.rsplit('.', 1)[-1].lower(), 'size': stat.st_size,
+            'created_at': created_at, 'expires_at': retention_deadline(created_at),
+            'compressed_at': None, 'legacy': True
+        }}, upsert=True))
+    if not ops:
+        return 0
+    return mongo.db.evidence_blobs.bulk_write(ops, ordered=False).upserted_count
+
+
+def _delete_file(evidence_path):
+    """
+    Remove a blob whose record was just deleted, and its previews
+
+    The file is first moved aside, then the record is looked up again:
+    store_stream upserts the record before it checks for the file, so a
+    record that has reappeared means an upload is reusing this blob, and
+    the file is moved back instead of deleted.
+
+    Returns:
+        int: Bytes freed, or None if the blob was kept
+    """
+    import uuid
+    from database import mongo
+    from services.evidence_store import evidence_abspath, TMP_DIR
+    from services.evidence_thumbnails import remove_thumbnails
+    path = evidence_abspath(evidence_path)
+    if not path or not os.path.isfile(path):
+        return remove_thumbnails(evidence_path)
+
+    trash_dir = os.path.join(EVIDENCE_DIR, TMP_DIR)
+    os.makedirs(trash_dir, exist_ok=True)
+    trash_path = os.path.join(trash_dir, f"purge-{uuid.uuid4().hex}")
+    os.replace(path, trash_path)
+
+    if mongo.db.evidence_blobs.find_one({'_id': evidence_path}, {'_id': 1}):
+        if os.path.exists(path):
+            # The upload already put its own copy in place
+            os.remove(trash_path)
+        else:
+            os.replace(trash_path, path)
+        return None
+
+    freed = os.path.getsize(trash_path)
+    os.remove(trash_path)
+    return freed + remove_thumbnails(evidence_path)
+
+
+def _tombstone_violations(evidence_paths, now):
+    """Clear evidence_path on violations that referenced deleted blobs"""
+    from database import mongo
+    from services.evidence_store import LEGACY_PREFIXES
+    stored_as = list(evidence_paths)
+    stored_as += [prefix + path for prefix in LEGACY_PREFIXES for path in evidence_paths]
+    result = mongo.db.violations.update_many(
+        {'evidence_path': {'$in': stored_as}},
+        {'$set': {'evidence_path': None, 'evidence_deleted_at': now}}
+    )
+    return result.modified_count
+
+
+def _redirect_violations(evidence_path, moved_to):
+    """Point violations still naming a moved blob at its re-encoded file"""
+    from database import mongo
+    from services.evidence_store import LEGACY_PREFIXES
+    stored_as = [evidence_path] + [prefix + evidence_path for prefix in LEGACY_PREFIXES]
+    result = mongo.db.violations.update_many(
+        {'evidence_path': {'$in': stored_as}}, {'$set': {'evidence_path': moved_to}}
+    )
+    return result.modified_count
+
+
+def purge_expired(batch_size=PURGE_BATCH_SIZE, max_batches=PURGE_MAX_BATCHES, now=None):
+    """
+    Delete evidence whose expires_at has passed, oldest first
+
+    Images left uncompressed by a lost task are queued again first (see
+    requeue_uncompressed). Blobs are read from the expires_at index in batches of batch_size, so a
+    run touches only what has expired. Each blob record is removed with a
+    conditional delete before its file, so a blob that was referenced or
+    uploaded again in the meantime (both push expires_at forward) is kept,
+    and _delete_file keeps the file if an upload recreates the record
+    while it is being deleted. The violations that pointed at deleted
+    blobs keep their record but lose evidence_path and get
+    evidence_deleted_at, unless the blob was only a redirect left by a
+    re-encode (moved_to) whose target still exists; those violations are
+    pointed at the target instead.
+
+    Args:
+        batch_size: Blobs per batch
+        max_batches: Batches per run; the rest is left for the next run
+        now: Cutoff (default: now)
+
+    Returns:
+        dict: deleted, bytes_freed, violations_tombstoned, batches, more, compression_requeued
+    """
+    from database import mongo
+    from services.evidence_compression import requeue_uncompressed
+    now = now or datetime.utcnow()
+    backfill_expiry()
+
+    report = {'deleted': 0, 'bytes_freed': 0, 'violations_tombstoned': 0, 'batches': 0, 'more': False}
+    try:
+        report['compression_requeued'] = requeue_uncompressed()
+    except Exception as e:
+        logger.error(f"Could not re-queue uncompressed evidence: {e}")
+        report['compression_requeued'] = 0
+    while report['batches'] < max_batches:
+        expired = list(mongo.db.evidence_blobs.find(
+            {'expires_at': {'$lte': now}}, {'expires_at': 1}
+        ).sort('expires_at', 1).limit(batch_size))
+        if not expired:
+            return report
+        report['batches'] += 1
+
+        deleted = []
+        for blob in expired:
+            claimed = mongo.db.evidence_blobs.find_one_and_delete(
+                {'_id': blob['_id'], 'expires_at': {'$lte': now}}
+            )
+            if not claimed:
+                continue
+            try:
+                freed = _delete_file(blob['_id'])
+            except OSError as e:
+                logger.error(f"Could not delete evidence {blob['_id']}: {e}")
+                freed = 0
+            if freed is None:
+                continue  # Uploaded again while being purged
+            report['bytes_freed'] += freed
+            moved_to = claimed.get('moved_to')
+            if moved_to and mongo.db.evidence_blobs.find_one({'_id': moved_to}, {'_id': 1}):
+                _redirect_violations(blob['_id'], moved_to)
+                report['deleted'] += 1
+                continue
+            deleted.append(blob['_id'])
+
+        if deleted:
+            report['deleted'] += len(deleted)
+            report['violations_tombstoned'] += _tombstone_violations(deleted, now)
+
+    report['more'] = mongo.db.evidence_blobs.find_one({'expires_at': {'$lte': now}}, {'_id': 1}) is not None
+    return report
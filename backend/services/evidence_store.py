@@ -0,0 +1,191 @@
+"""
+Content-addressed evidence store
+"""
+import hashlib
+import hmac
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from werkzeug.utils import safe_join
+
+from config_evidence import EVIDENCE_DIR, MAX_FILE_SIZE_MB
+from services.evidence_compression import needs_compression, enqueue_compression
+from services.evidence_retention import retention_deadline
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+TMP_DIR = '.tmp'
+LEGACY_PREFIXES = ('/uploads/evidence/', 'uploads/evidence/')
+
+
+class EvidenceTooLarge(ValueError):
+    """Upload exceeds MAX_FILE_SIZE_MB"""
+
+
+def shard_path(digest, ext):
+    """Relative path of a blob: ab/cd/<sha256>.<ext>"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def normalize_evidence_path(evidence_path):
+    """Evidence path relative to EVIDENCE_DIR, accepting legacy '/uploads/evidence/...' values"""
+    if not evidence_path:
+        return None
+    for prefix in LEGACY_PREFIXES:
+        if evidence_path.startswith(prefix):
+            return evidence_path[len(prefix):]
+    return evidence_path.lstrip('/')
+
+
+def evidence_abspath(evidence_path):
+    """Filesystem path of a stored evidence file, or None if the path escapes EVIDENCE_DIR"""
+    relative = normalize_evidence_path(evidence_path)
+    if not relative:
+        return None
+    return safe_join(os.path.abspath(EVIDENCE_DIR), relative)
+
+
+def _signature(relative, expires):
+    from config import Config
+    message = f"{relative}:{expires}".encode()
+    return hmac.new(Config.EVIDENCE_URL_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign_evidence_path(evidence_path, ttl=None):
+    """
+    Query string that grants access to one evidence file for a limited time
+
+    Expiry is rounded up to a multiple of ttl, so links built within the
+    same window are identical and browsers can cache the file between polls.
+    Each link stays valid for between ttl and 2 * ttl seconds.
+
+    Returns:
+        str: 'exp=<unix time>&sig=<hex HMAC-SHA256>'
+    """
+    from config import Config
+    ttl = ttl or Config.EVIDENCE_URL_TTL_SECONDS
+    expires = (int(time.time()) // ttl + 2) * ttl
+    return f"exp={expires}&sig={_signature(normalize_evidence_path(evidence_path), expires)}"
+
+
+def verify_evidence_signature(evidence_path, expires, signature):
+    """True if exp/sig from sign_evidence_path are valid for this file and not expired"""
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time() or not signature:
+        return False
+    return hmac.compare_digest(_signature(normalize_evidence_path(evidence_path), expires), signature)
+
+
+def evidence_url(evidence_path, host='', signed=True):
+    """URL that serves a stored evidence file, signed unless signed=False (None without evidence)"""
+    relative = normalize_evidence_path(evidence_path)
+    if not relative:
+        return None
+    url = f"{host}/api/proctoring/evidence/{relative}"
+    return f"{url}?{sign_evidence_path(relative)}" if signed else url
+
+
+def thumbnail_url(evidence_path, size=None, host=''):
+    """Signed URL of an evidence preview (None if the file type has none)"""
+    from config_evidence import THUMBNAIL_SIZES
+    from services.evidence_thumbnails import has_thumbnail
+    relative = normalize_evidence_path(evidence_path)
+    if not relative or not has_thumbnail(relative):
+        return None
+    return f"{evidence_url(relative, host)}&size={size or THUMBNAIL_SIZES[0]}"
+
+
+def store_stream(stream, ext, max_bytes=None):
+    """
+    Store an upload once per distinct content
+
+    The stream is hashed while it is copied to a temporary file. The blob
+    record is then upserted with a fresh expires_at before the file is
+    looked for, so purge_expired cannot claim a blob this call is about to
+    reuse; if the file is missing (never stored, or being purged) the copy
+    is moved to the content address, otherwise it is discarded. Uploads are
+    stored under their own extension and new images are queued for
+    background compression; once a re-encode has moved the blob (moved_to),
+    a repeated upload returns the re-encoded path.
+
+    Args:
+        stream: Readable binary file object
+        ext: File extension without the dot
+        max_bytes: Largest accepted upload (default: MAX_FILE_SIZE_MB)
+
+    Returns:
+        str: evidence_path relative to EVIDENCE_DIR (ab/cd/<sha256>.<ext>)
+
+    Raises:
+        EvidenceTooLarge: The stream is longer than max_bytes
+    """
+    from database import mongo
+    max_bytes = max_bytes or MAX_FILE_SIZE_MB * 1024 * 1024
+    tmp_dir = os.path.join(EVIDENCE_DIR, TMP_DIR)
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise EvidenceTooLarge(f"Evidence exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+
+        evidence_path = shard_path(digest.hexdigest(), ext)
+        expires_at = retention_deadline()
+        # The document before the update: None if this call inserted it
+        existing = mongo.db.evidence_blobs.find_one_and_update(
+            {'_id': evidence_path},
+            {'$setOnInsert': {
+                'sha256': digest.hexdigest(), 'source_ext': ext, 'size': size,
+                'created_at': datetime.utcnow(), 'compressed_at': None
+            }, '$max': {'expires_at': expires_at}},
+            projection={'moved_to': 1},
+            upsert=True
+        )
+
+        if existing and existing.get('moved_to'):
+            os.remove(tmp_path)
+            mongo.db.evidence_blobs.update_one(
+                {'_id': existing['moved_to']}, {'$max': {'expires_at': expires_at}}
+            )
+            return existing['moved_to']
+
+        final_path = evidence_abspath(evidence_path)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if existing is None and needs_compression(ext):
+        enqueue_compression(evidence_path)
+    return evidence_path
+
+
+def add_reference(evidence_path):
+    """Keep a blob for a full retention period after a violation references it"""
+    from database import mongo
+    now = datetime.utcnow()
+    mongo.db.evidence_blobs.update_one(
+        {'_id': normalize_evidence_path(evidence_path)},
+        {'$set': {'last_referenced_at': now}, '$max': {'expires_at': retention_deadline(now)}}
+    )
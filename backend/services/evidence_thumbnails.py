@@ -0,0 +1,111 @@
+"""
+Evidence thumbnails — small JPEG previews cached on disk
+"""
+import logging
+import os
+import tempfile
+
+from config_evidence import THUMBNAIL_DIR, THUMBNAIL_QUALITY, THUMBNAIL_SIZES
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp'}
+VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'webm'}
+
+
+def has_thumbnail(evidence_path):
+    """True if a preview can be rendered for this file type"""
+    ext = evidence_path.rsplit('.', 1)[-1].lower() if evidence_path and '.' in evidence_path else ''
+    return ext in IMAGE_EXTENSIONS or ext in VIDEO_EXTENSIONS
+
+
+def thumbnail_relpath(evidence_path, size):
+    """Path of a preview relative to EVIDENCE_DIR: thumbs/<size>/<evidence path>.jpg"""
+    from services.evidence_store import normalize_evidence_path
+    stem = normalize_evidence_path(evidence_path).rsplit('.', 1)[0]
+    return f"{THUMBNAIL_DIR}/{size}/{stem}.jpg"
+
+
+def _first_frame(path):
+    """First frame of a video as a PIL image"""
+    import cv2
+    from PIL import Image
+    capture = cv2.VideoCapture(path)
+    try:
+        ok, frame = capture.read()
+    finally:
+        capture.release()
+    if not ok:
+        raise ValueError('No frame could be read')
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def render_thumbnail(evidence_path, size):
+    """
+    Write the preview of an evidence file at one size
+
+    Returns:
+        str: Filesystem path of the preview, or None if it cannot be rendered
+    """
+    from PIL import Image, ImageOps
+    from services.evidence_store import evidence_abspath
+
+    source = evidence_abspath(evidence_path)
+    target = evidence_abspath(thumbnail_relpath(evidence_path, size))
+    if not source or not target or not os.path.isfile(source) or not has_thumbnail(evidence_path):
+        return None
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+    try:
+        if evidence_path.rsplit('.', 1)[-1].lower() in VIDEO_EXTENSIONS:
+            img = _first_frame(source)
+        else:
+            with Image.open(source) as original:
+                img = ImageOps.exif_transpose(original)
+        img.thumbnail((size, size), Image.LANCZOS)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        with os.fdopen(fd, 'wb') as out:
+            img.save(out, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        os.replace(tmp_path, target)
+        return target
+    except Exception as e:
+        logger.warning(f"Thumbnail of {evidence_path} at {size}px failed: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+
+def get_thumbnail(evidence_path, size):
+    """Filesystem path of a cached preview, rendering it on first use"""
+    from services.evidence_store import evidence_abspath
+    if size not in THUMBNAIL_SIZES:
+        return None
+    cached = evidence_abspath(thumbnail_relpath(evidence_path, size))
+    if cached and os.path.isfile(cached):
+        return cached
+    return render_thumbnail(evidence_path, size)
+
+
+def render_thumbnails(evidence_path):
+    """Render every configured size, replacing stale previews (e.g. after compression)"""
+    for size in THUMBNAIL_SIZES:
+        render_thumbnail(evidence_path, size)
+
+
+def remove_thumbnails(evidence_path):
+    """
+    Delete the cached previews of an evidence file
+
+    Returns:
+        int: Bytes freed
+    """
+    from services.evidence_store import evidence_abspath
+    freed = 0
+    for size in THUMBNAIL_SIZES:
+        path = evidence_abspath(thumbnail_relpath(evidence_path, size))
+        if path and os.path.isfile(path):
+            freed += os.path.getsize(path)
+            os.remove(path)
+    return freed
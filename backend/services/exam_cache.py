@@ -0,0 +1,238 @@
+"""
+Compiled exam cache — in-process with optional Redis backing
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = 'exam:compiled:{}'
+
+
+def compile_exam(exam_id):
+    """
+    Build the cacheable form of an exam from MongoDB
+
+    The exam document is read before its questions, so 'version' is never
+    newer than the questions it was compiled with.
+
+    Returns:
+        dict: {'exam', 'questions' (student payload, no answers),
+            'answer_key' (correct answer, marks and explanation per question),
+            'version' (the exam's cache_version)}, or None if the exam does not exist
+    """
+    from database import mongo
+    exam = mongo.db.exams.find_one({'_id': ObjectId(exam_id)})
+    if not exam:
+        return None
+
+    questions = list(mongo.db.exam_questions.find({'exam_id': exam_id}).sort('order', 1))
+    return {
+        'version': exam.get('cache_version', 0),
+        'exam': {
+            'id': str(exam['_id']),
+            'title': exam['title'],
+            'description': exam.get('description'),
+            'duration': exam.get('duration'),
+            'total_marks': exam.get('total_marks'),
+            'passing_marks': exam.get('passing_marks'),
+            'negative_marking': exam.get('negative_marking', 0),
+            'is_published': exam.get('is_published', False),
+            'examiner_id': exam.get('examiner_id')
+        },
+        'questions': [
+            {
+                'id': str(q['_id']),
+                'question_text': q['question_text'],
+                'option_a': q.get('option_a'),
+                'option_b': q.get('option_b'),
+                'option_c': q.get('option_c'),
+                'option_d': q.get('option_d'),
+                'marks': q.get('marks', 1),
+                'question_type': q.get('question_type', 'mcq')
+            } for q in questions
+        ],
+        'answer_key': {
+            str(q['_id']): {
+                'correct_answer': q.get('correct_answer'),
+                'marks': q.get('marks', 1),
+                'explanation': q.get('explanation')
+            } for q in questions
+        }
+    }
+
+
+class ExamCache:
+    """
+    LRU cache of compiled exams
+
+    Every edit bumps cache_version on the exam document (invalidate_exam).
+    Each lookup reads that one field by _id and only trusts an entry
+    compiled at the current version, so every process, including Celery
+    graders, sees an edit on its next lookup, with or without Redis. An
+    entry compiled from data read before an edit carries the old version
+    and is discarded however late it is stored. With Redis configured,
+    compiled exams are also shared between processes.
+    """
+
+    def __init__(self, max_entries=256, ttl=300, redis_client=None):
+        """
+        Args:
+            max_entries: Compiled exams kept in this process
+            ttl: Seconds an entry is trusted before recompiling
+            redis_client: Optional redis.Redis instance
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.redis = redis_client
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'redis_hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def _current_version(self, exam_id):
+        """cache_version of the exam document, or None if the exam does not exist"""
+        from database import mongo
+        exam = mongo.db.exams.find_one({'_id': ObjectId(exam_id)}, {'cache_version': 1})
+        return exam.get('cache_version', 0) if exam else None
+
+    def get(self, exam_id):
+        """
+        Compiled form of an exam, compiling it on a miss
+
+        Returns:
+            dict: Compiled exam, or None if the exam does not exist
+        """
+        exam_id = str(exam_id)
+        version = self._current_version(exam_id)
+        if version is None:
+            with self._lock:
+                self._entries.pop(exam_id, None)
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(exam_id)
+            if entry and now - entry['at'] < self.ttl and entry['compiled'].get('version') == version:
+                self._entries.move_to_end(exam_id)
+                self._stats['hits'] += 1
+                return entry['compiled']
+
+        compiled = self._load_redis(exam_id)
+        if compiled is not None and compiled.get('version') == version:
+            with self._lock:
+                self._stats['redis_hits'] += 1
+        else:
+            compiled = compile_exam(exam_id)
+            with self._lock:
+                self._stats['misses'] += 1
+            if compiled is None:
+                return None
+            self._store_redis(exam_id, compiled)
+
+        with self._lock:
+            current = self._entries.get(exam_id)
+            # Never replace a newer entry stored by a concurrent lookup
+            if current is None or current['compiled'].get('version', 0) <= compiled.get('version', 0):
+                self._entries[exam_id] = {'compiled': compiled, 'at': now}
+                self._entries.move_to_end(exam_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, exam_id):
+        """
+        Drop an exam everywhere after its questions or status changed
+
+        Call after the change is written: bumping cache_version is what
+        makes other processes recompile.
+        """
+        from database import mongo
+        exam_id = str(exam_id)
+        mongo.db.exams.update_one({'_id': ObjectId(exam_id)}, {'$inc': {'cache_version': 1}})
+        with self._lock:
+            self._entries.pop(exam_id, None)
+            self._stats['invalidations'] += 1
+        if self.redis is not None:
+            try:
+                self.redis.delete(REDIS_KEY.format(exam_id))
+            except Exception as e:
+                logger.warning(f"Exam cache Redis invalidation failed: {e}")
+
+    def _load_redis(self, exam_id):
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(REDIS_KEY.format(exam_id))
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Exam cache Redis read failed: {e}")
+            return None
+
+    def _store_redis(self, exam_id, compiled):
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(REDIS_KEY.format(exam_id), json.dumps(compiled), ex=int(self.ttl))
+        except Exception as e:
+            logger.warning(f"Exam cache Redis write failed: {e}")
+
+    def stats(self):
+        """Hit, miss and invalidation counters"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['redis_hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                entries=len(self._entries),
+                hit_rate=round((lookups - self._stats['misses']) / lookups, 3) if lookups else None,
+                redis=self.redis is not None
+            )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_exam_cache():
+    """Get or create this process's exam cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from config import Config
+                redis_client = None
+                if Config.EXAM_CACHE_REDIS:
+                    try:
+                        import redis
+                        redis_client = redis.Redis.from_url(Config.REDIS_URL)
+                    except Exception as e:
+                        logger.warning(f"Exam cache running without Redis: {e}")
+                _cache = ExamCache(
+                    max_entries=Config.EXAM_CACHE_MAX_ENTRIES,
+                    ttl=Config.EXAM_CACHE_TTL_SECONDS,
+                    redis_client=redis_client
+                )
+    return _cache
+
+
+def get_compiled_exam(exam_id):
+    """Compiled form of an exam (see compile_exam), cached unless EXAM_CACHE_ENABLED is off"""
+    from config import Config
+    if not Config.EXAM_CACHE_ENABLED:
+        return compile_exam(str(exam_id))
+    return get_exam_cache().get(exam_id)
+
+
+def exam_version(exam_id):
+    """Current cache_version of an exam (None if it does not exist), for caches built on it"""
+    return get_exam_cache()._current_version(str(exam_id))
+
+
+def invalidate_exam(exam_id):
+    """Invalidate a cached exam and the reviews rendered from it"""
+    from services.review_service import get_review_cache
+    get_exam_cache().invalidate(exam_id)
+    get_review_cache().invalidate_exam(exam_id)
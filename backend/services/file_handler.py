@@ -40,12 +40,20 @@ class FileHandler:
                 logger.warning(f"File too large: {file.filename}")
                 return None
             
+            file_ext = file.filename.rsplit('.', 1)[1].lower()
+
+            # Evidence is stored once per distinct content (see services/evidence_store)
+            if folder == 'evidence':
+                from services.evidence_store import store_stream
+                evidence_path = store_stream(file.stream, file_ext)
+                logger.info(f"Evidence stored: {evidence_path}")
+                return f'/uploads/evidence/{evidence_path}'
+
             # Create folder if not exists
             upload_folder = os.path.join('uploads', folder)
             os.makedirs(upload_folder, exist_ok=True)
             
             # Generate secure filename
-            file_ext = file.filename.rsplit('.', 1)[1].lower()
             filename = f"{uuid.uuid4()}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{file_ext}"
             filepath = os.path.join(upload_folder, filename)
             
@@ -0,0 +1,95 @@
+"""
+Exam grading engine — MongoDB
+"""
+import logging
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+
+def load_answer_key(exam_id, question_ids=None):
+    """
+    Load an exam's answer key from the compiled exam cache, or in one query
+
+    Args:
+        exam_id: Exam ID (string)
+        question_ids: Optional question IDs to restrict a database load to ($in)
+
+    Returns:
+        dict: question_id -> {'correct_answer', 'marks'}
+    """
+    from config import Config
+    if Config.EXAM_CACHE_ENABLED:
+        from services.exam_cache import get_compiled_exam
+        compiled = get_compiled_exam(exam_id)
+        return compiled['answer_key'] if compiled else {}
+
+    from database import mongo
+    query = {'exam_id': exam_id}
+    if question_ids is not None:
+        object_ids = [ObjectId(q) for q in question_ids if ObjectId.is_valid(q)]
+        query['_id'] = {'$in': object_ids}
+    cursor = mongo.db.exam_questions.find(query, {'correct_answer': 1, 'marks': 1})
+    return {
+        str(q['_id']): {'correct_answer': q.get('correct_answer'), 'marks': q.get('marks', 1)}
+        for q in cursor
+    }
+
+
+def grade_answers(answer_key, answers, negative_marking=0):
+    """
+    Score answers against an answer key in a single pass
+
+    A correct answer earns the question's marks, a wrong answer loses
+    negative_marking, and a blank answer scores 0. The total never goes
+    below 0. Answers to unknown questions are ignored, and the last
+    answer given for a question wins.
+
+    Args:
+        answer_key: question_id -> {'correct_answer', 'marks'}
+        answers: Iterable of {'question_id', 'selected_answer'}
+        negative_marking: Marks deducted per wrong answer
+
+    Returns:
+        dict: obtained_marks, correct, incorrect, unanswered and a per-question 'graded' list
+    """
+    latest = {}
+    for ans in answers:
+        question_id = ans.get('question_id')
+        if question_id in answer_key:
+            latest[question_id] = ans.get('selected_answer')
+
+    penalty = negative_marking or 0
+    graded = []
+    obtained = correct = incorrect = unanswered = 0
+    for question_id, selected in latest.items():
+        key = answer_key[question_id]
+        if selected in (None, ''):
+            marks = 0
+            unanswered += 1
+        elif selected == key['correct_answer']:
+            marks = key['marks']
+            correct += 1
+        else:
+            marks = -penalty if penalty > 0 else 0
+            incorrect += 1
+        obtained += marks
+        graded.append({'question_id': question_id, 'selected_answer': selected, 'marks_awarded': marks})
+
+    return {
+        'obtained_marks': max(0, obtained),
+        'correct': correct,
+        'incorrect': incorrect,
+        'unanswered': unanswered,
+        'graded': graded
+    }
+
+
+def save_graded_answers(student_id, exam_id, graded):
+    """Write all graded answers with one insert_many"""
+    from database import mongo
+    if not graded:
+        return
+    mongo.db.student_answers.insert_many([
+        dict(g, student_id=student_id, exam_id=exam_id) for g in graded
+    ], ordered=False)
@@ -0,0 +1,437 @@
+"""
+Out-of-process frame inference with shared-memory frame handoff
+"""
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue is at its configured depth"""
+
+
+class InferenceTimeout(Exception):
+    """Raised when a frame was not analysed before its deadline"""
+
+
+def _attach_shared_memory(name):
+    """Attach to a parent-owned block without registering it for cleanup here"""
+    from multiprocessing import shared_memory, resource_tracker
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # The parent unlinks the block; stop this process's tracker from doing it too
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+# Seconds between the status reports a worker sends while it is busy
+REPORT_INTERVAL = 30.0
+
+
+def _worker_report(pool):
+    from ai_models.model_manager import get_startup_report
+    return {
+        'pid': os.getpid(),
+        'startup': get_startup_report(),
+        'timings': pool.timings.report(),
+        'detector_pool': pool.stats(),
+        'reported_at': time.time()
+    }
+
+
+def _worker_main(index, task_queue, result_queue, pool_size):
+    """Inference worker process loop"""
+    # A spawned interpreter starts without the server's logging setup
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+        format=f'%(asctime)s [inference-worker-{index}] %(levelname)s %(name)s: %(message)s'
+    )
+    from ai_models.detector_pool import DetectorPool
+    pool = DetectorPool(max_size=pool_size)
+    try:
+        pool.prewarm()
+        logger.info("Inference worker ready")
+    except Exception as e:
+        logger.error(f"Inference worker warm-up failed: {e}")
+    result_queue.put(('report', index, _worker_report(pool)))
+    last_report = time.monotonic()
+
+    while True:
+        if time.monotonic() - last_report > REPORT_INTERVAL:
+            result_queue.put(('report', index, _worker_report(pool)))
+            last_report = time.monotonic()
+
+        message = task_queue.get()
+        if message is None:
+            break
+
+        if message[0] == 'release':
+            pool.release(message[1])
+            continue
+
+        if message[0] == 'audio':
+            _, task_id, session_id, pcm, sample_rate, dtype = message
+            try:
+                with pool.session(session_id) as manager:
+                    result = manager.analyze_audio(pcm, sample_rate=sample_rate, dtype=dtype)
+                result_queue.put(('result', task_id, result, None))
+            except Exception as e:
+                logger.error(f"Inference worker audio error: {e}")
+                result_queue.put(('result', task_id, None, str(e)))
+            continue
+
+        _, task_id, session_id, shm_name, shape, dtype, detectors, skip_unchanged = message
+        try:
+            shm = _attach_shared_memory(shm_name)
+            try:
+                frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                with pool.session(session_id) as manager:
+                    result = manager.analyze_frame(frame, detectors=detectors,
+                                                   skip_unchanged=skip_unchanged)
+                del frame
+            finally:
+                shm.close()
+            result_queue.put(('result', task_id, result, None))
+        except Exception as e:
+            logger.error(f"Inference worker error: {e}")
+            result_queue.put(('result', task_id, None, str(e)))
+
+
+class InferencePool:
+    """
+    Dedicated worker processes for frame and audio analysis
+
+    The request thread copies the decoded frame into a shared-memory block
+    and hands its name to a worker. Frames of one session always go to the
+    same worker so its tracking state stays in one process. With zero
+    workers frames are analysed inline in the calling thread.
+
+    Each server process owns its own pool, so session affinity only holds
+    within one server process. Run gunicorn with a single worker
+    (WEB_CONCURRENCY=1, the default) and scale with INFERENCE_WORKERS;
+    with more server workers a session's frames are split between pools
+    and its tracking and frame-change state is split with them.
+    """
+
+    def __init__(self, workers=2, queue_depth=64, timeout=5.0, pool_size=32):
+        """
+        Args:
+            workers: Number of worker processes (0 = analyse inline)
+            queue_depth: Maximum frames queued or in flight
+            timeout: Default seconds to wait for a result
+            pool_size: Detector managers kept per worker
+        """
+        self.workers = max(0, int(workers))
+        self.queue_depth = max(1, int(queue_depth))
+        self.timeout = float(timeout)
+        self.pool_size = pool_size
+        self._slots = threading.BoundedSemaphore(self.queue_depth)
+        self._task_ids = itertools.count(1)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._processes = []
+        self._task_queues = []
+        self._result_queue = None
+        self._ctx = None
+        self._reports = {}
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    def start(self):
+        """Spawn worker processes (idempotent)"""
+        if self._started or self.workers == 0:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            import multiprocessing
+            # Never fork a threaded server process; start workers from a clean interpreter
+            self._ctx = multiprocessing.get_context('spawn')
+            self._result_queue = self._ctx.Queue()
+            for index in range(self.workers):
+                self._task_queues.append(self._ctx.Queue())
+                self._processes.append(None)
+                self._spawn(index)
+            threading.Thread(target=self._collect, name='inference-collector', daemon=True).start()
+            self._started = True
+            logger.info(f"Inference pool started with {self.workers} workers")
+
+    def _spawn(self, index):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._task_queues[index], self._result_queue, self.pool_size),
+            name=f'inference-worker-{index}',
+            daemon=True
+        )
+        process.start()
+        self._processes[index] = process
+
+    def shutdown(self):
+        """Stop worker processes"""
+        if not self._started:
+            return
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+        self._started = False
+
+    # ── Submission ───────────────────────────────────────────────────────────
+
+    def _worker_index(self, session_id):
+        # crc32 rather than hash(): str hashes are salted per process
+        return zlib.crc32(session_id.encode()) % self.workers
+
+    def submit(self, session_id, frame, detectors=None, skip_unchanged=False):
+        """
+        Queue a frame for analysis
+
+        Args:
+            session_id: Proctoring session ID (selects the worker)
+            frame: Decoded BGR frame
+            detectors: Optional result keys to run
+            skip_unchanged: Reuse the session's previous results for unchanged frames
+
+        Returns:
+            Future: Resolves to the detection results dict
+
+        Raises:
+            InferenceQueueFull: If queue_depth frames are already pending
+        """
+        if not self._slots.acquire(blocking=False):
+            raise InferenceQueueFull()
+
+        session_id = str(session_id)
+        detectors = tuple(detectors) if detectors is not None else None
+        future = Future()
+
+        if self.workers == 0:
+            try:
+                from ai_models.detector_pool import get_detector_pool
+                with get_detector_pool().session(session_id) as manager:
+                    future.set_result(manager.analyze_frame(frame, detectors=detectors,
+                                                            skip_unchanged=skip_unchanged))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._slots.release()
+            return future
+
+        self.start()
+        from multiprocessing import shared_memory
+        shm = None
+        try:
+            frame = np.ascontiguousarray(frame)
+            shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[:] = frame
+
+            task_id = next(self._task_ids)
+            index = self._worker_index(session_id)
+            with self._pending_lock:
+                self._pending[task_id] = (future, shm, index)
+            self._task_queues[index].put(
+                ('frame', task_id, session_id, shm.name, frame.shape, frame.dtype.str,
+                 detectors, skip_unchanged)
+            )
+        except Exception:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            self._slots.release()
+            raise
+        return future
+
+    def analyze(self, session_id, frame, detectors=None, skip_unchanged=False, timeout=None):
+        """
+        Analyse a frame and wait for the result
+
+        Raises:
+            InferenceQueueFull: If the queue is full
+            InferenceTimeout: If no result arrives before the deadline
+        """
+        future = self.submit(session_id, frame, detectors=detectors, skip_unchanged=skip_unchanged)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            raise InferenceTimeout()
+
+    def analyze_audio(self, session_id, pcm, sample_rate, dtype='<i2', timeout=None):
+        """
+        Analyse a PCM chunk on the session's worker and wait for the result
+
+        Audio goes to the same worker as the session's frames, so its sound
+        detector keeps one continuous stream (carry-over samples, ring
+        buffer, noise floor) across uploads.
+
+        Raises:
+            InferenceQueueFull: If the queue is full
+            InferenceTimeout: If no result arrives before the deadline
+        """
+        if not self._slots.acquire(blocking=False):
+            raise InferenceQueueFull()
+
+        session_id = str(session_id)
+        if self.workers == 0:
+            try:
+                from ai_models.detector_pool import get_detector_pool
+                with get_detector_pool().session(session_id) as manager:
+                    return manager.analyze_audio(pcm, sample_rate=sample_rate, dtype=dtype)
+            finally:
+                self._slots.release()
+
+        self.start()
+        future = Future()
+        task_id = next(self._task_ids)
+        try:
+            index = self._worker_index(session_id)
+            with self._pending_lock:
+                self._pending[task_id] = (future, None, index)
+            self._task_queues[index].put(('audio', task_id, session_id, bytes(pcm), sample_rate, dtype))
+        except Exception:
+            with self._pending_lock:
+                self._pending.pop(task_id, None)
+            self._slots.release()
+            raise
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            raise InferenceTimeout()
+
+    def release_session(self, session_id):
+        """Free the detectors a session holds in its worker"""
+        session_id = str(session_id)
+        if self._started:
+            self._task_queues[self._worker_index(session_id)].put(('release', session_id))
+
+    # ── Result collection ────────────────────────────────────────────────────
+
+    def _finish(self, task_id, result=None, error=None):
+        with self._pending_lock:
+            pending = self._pending.pop(task_id, None)
+        if pending is None:
+            return
+        future, shm, _ = pending
+        if shm is not None:
+            try:
+                shm.close()
+                shm.unlink()
+            except Exception:
+                pass
+        self._slots.release()
+        if error is not None:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(result)
+
+    def _collect(self):
+        """Resolve futures as workers report back, and restart dead workers"""
+        while True:
+            try:
+                message = self._result_queue.get(timeout=1.0)
+                if message[0] == 'report':
+                    self._reports[message[1]] = message[2]
+                else:
+                    self._finish(*message[1:])
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.error(f"Inference collector error: {e}")
+            self._check_workers()
+
+    def _check_workers(self):
+        for index, process in enumerate(self._processes):
+            if process is None or process.is_alive() or not self._started:
+                continue
+            logger.error(f"Inference worker {index} died (exit code {process.exitcode}), restarting")
+            with self._pending_lock:
+                lost = [tid for tid, (_, _, i) in self._pending.items() if i == index]
+            for task_id in lost:
+                self._finish(task_id, error='Inference worker crashed')
+            self._spawn(index)
+
+    def stats(self):
+        """Queue occupancy"""
+        with self._pending_lock:
+            in_flight = len(self._pending)
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'in_flight': in_flight,
+            'alive_workers': sum(1 for p in self._processes if p is not None and p.is_alive())
+        }
+
+    def worker_reports(self):
+        """
+        Latest status each worker process sent: startup report, timings and detector pool
+
+        Workers report once warmed up and then at most every REPORT_INTERVAL
+        seconds while they receive work.
+
+        Returns:
+            dict: worker index -> report
+        """
+        return {index: dict(report) for index, report in sorted(self._reports.items())}
+
+
+_inference_pool = None
+_inference_pool_lock = threading.Lock()
+
+
+def get_inference_pool():
+    """Get or create this process's inference pool"""
+    global _inference_pool
+    if _inference_pool is None:
+        with _inference_pool_lock:
+            if _inference_pool is None:
+                from config import Config
+                _inference_pool = InferencePool(
+                    workers=Config.INFERENCE_WORKERS,
+                    queue_depth=Config.INFERENCE_QUEUE_DEPTH,
+                    timeout=Config.INFERENCE_TIMEOUT_SECONDS,
+                    pool_size=Config.DETECTOR_POOL_SIZE
+                )
+    return _inference_pool
+
+
+def warm_up():
+    """
+    Prepare frame inference in a freshly forked server worker
+
+    With worker processes configured they are spawned now and load their
+    models in parallel; otherwise the in-process detector pool is warmed
+    in a background thread.
+    """
+    import os
+    pool = get_inference_pool()
+    if pool.workers > 0 and int(os.getenv('WEB_CONCURRENCY', 1)) > 1:
+        logger.warning(
+            "WEB_CONCURRENCY > 1: every server worker runs its own inference pool, so a "
+            "session's frames are split between pools; use WEB_CONCURRENCY=1 and raise "
+            "INFERENCE_WORKERS instead"
+        )
+    if pool.workers > 0:
+        pool.start()
+    else:
+        from ai_models.model_manager import warm_up as warm_up_detectors
+        warm_up_detectors(background=True)
+
+
+def release_session(session_id):
+    """Release a session's detectors in this process and in its inference worker"""
+    from ai_models.detector_pool import release_session_detectors
+    release_session_detectors(session_id)
+    if _inference_pool is not None:
+        _inference_pool.release_session(session_id)
@@ -6,13 +6,60 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Examiners whose unread counter is known to exist in this process
+_counted = set()
+
 
 class NotificationService:
+    """
+    Examiner notifications with a maintained unread counter
+
+    notification_counters holds one {_id: examiner_id, unread} document per
+    examiner. It is incremented when a notification is created and
+    decremented by the number of notifications a mark-read actually
+    changed, so reading the count never scans notifications. Only read
+    notifications expire (TTL on read_at), which keeps the counter exact.
+    """
+
+    @staticmethod
+    def _ensure_counter(examiner_id):
+        """Create the examiner's counter from the existing notifications the first time it is needed"""
+        from database import mongo
+        if examiner_id in _counted:
+            return
+        if not mongo.db.notification_counters.find_one({'_id': examiner_id}, {'_id': 1}):
+            unread = mongo.db.examiner_notifications.count_documents(
+                {'examiner_id': examiner_id, 'is_read': False}
+            )
+            mongo.db.notification_counters.update_one(
+                {'_id': examiner_id}, {'$setOnInsert': {'unread': unread}}, upsert=True
+            )
+        _counted.add(examiner_id)
+
+    @staticmethod
+    def create_notification(doc):
+        """
+        Store a notification, count it as unread and push it to the examiner
+
+        Args:
+            doc: Document from models.make_notification
+
+        Returns:
+            dict: The stored document
+        """
+        from database import mongo
+        from models import notification_to_dict
+        from services.realtime import publish_to_examiner
+        examiner_id = doc['examiner_id']
+        NotificationService._ensure_counter(examiner_id)
+        mongo.db.examiner_notifications.insert_one(doc)
+        mongo.db.notification_counters.update_one({'_id': examiner_id}, {'$inc': {'unread': 1}})
+        publish_to_examiner('notification', examiner_id, notification_to_dict(doc))
+        return doc
 
     @staticmethod
     def create_violation_notification(examiner_id, student_id, exam_id, violation_id,
                                       message, proof_type=None, proof_url=None):
-        from database import mongo
         from models import make_notification
         try:
             doc = make_notification(
@@ -22,7 +69,7 @@ class NotificationService:
             doc['violation_id'] = violation_id
             doc['proof_type'] = proof_type or 'alert'
             doc['proof_url'] = proof_url
-            mongo.db.examiner_notifications.insert_one(doc)
+            NotificationService.create_notification(doc)
             logger.info(f"Notification created for examiner {examiner_id}")
             return doc
         except Exception as e:
@@ -30,17 +77,30 @@ class NotificationService:
             return None
 
     @staticmethod
-    def mark_as_read(notification_id, user_id):
+    def mark_read(examiner_id, notification_ids=None):
+        """
+        Mark several (or, with notification_ids=None, all) of an examiner's notifications read
+
+        Returns:
+            int: Number of notifications that were unread
+        """
         from database import mongo
         from bson import ObjectId
+        query = {'examiner_id': examiner_id, 'is_read': False}
+        if notification_ids is not None:
+            query['_id'] = {'$in': [ObjectId(n) for n in notification_ids if ObjectId.is_valid(n)]}
+        NotificationService._ensure_counter(examiner_id)
+        changed = mongo.db.examiner_notifications.update_many(
+            query, {'$set': {'is_read': True, 'read_at': datetime.utcnow()}}
+        ).modified_count
+        if changed:
+            mongo.db.notification_counters.update_one({'_id': examiner_id}, {'$inc': {'unread': -changed}})
+        return changed
+
+    @staticmethod
+    def mark_as_read(notification_id, user_id):
         try:
-            n = mongo.db.examiner_notifications.find_one({'_id': ObjectId(notification_id)})
-            if not n or n['examiner_id'] != user_id:
-                return False
-            mongo.db.examiner_notifications.update_one(
-                {'_id': ObjectId(notification_id)}, {'$set': {'is_read': True}}
-            )
-            return True
+            return NotificationService.mark_read(user_id, [notification_id]) > 0
         except Exception as e:
             logger.error(f"Error marking notification: {e}")
             return False
@@ -49,22 +109,57 @@ class NotificationService:
     def get_unread_count(examiner_id):
         from database import mongo
         try:
-            return mongo.db.examiner_notifications.count_documents(
-                {'examiner_id': examiner_id, 'is_read': False}
-            )
+            NotificationService._ensure_counter(examiner_id)
+            counter = mongo.db.notification_counters.find_one({'_id': examiner_id})
+            return max(0, counter.get('unread', 0)) if counter else 0
         except Exception as e:
             logger.error(f"Error getting unread count: {e}")
             return 0
 
     @staticmethod
-    def get_recent_notifications(examiner_id, limit=10):
+    def recount_unread(examiner_id):
+        """Rebuild an examiner's unread counter from the notifications themselves"""
+        from database import mongo
+        unread = mongo.db.examiner_notifications.count_documents({'examiner_id': examiner_id, 'is_read': False})
+        mongo.db.notification_counters.update_one({'_id': examiner_id}, {'$set': {'unread': unread}}, upsert=True)
+        _counted.add(examiner_id)
+        return unread
+
+    @staticmethod
+    def get_notifications_page(examiner_id, limit=20, before=None, unread_only=False):
+        """
+        One page of an examiner's notifications, newest first
+
+        Args:
+            examiner_id: Examiner user ID
+            limit: Page size
+            before: Cursor (notification id) returned as next_cursor by the previous page
+            unread_only: Only unread notifications
+
+        Returns:
+            dict: notifications, next_cursor (None on the last page), has_more
+        """
         from database import mongo
+        from bson import ObjectId
         from models import notification_to_dict
+        query = {'examiner_id': examiner_id}
+        if unread_only:
+            query['is_read'] = False
+        if before:
+            query['_id'] = {'$lt': ObjectId(before)}
+        docs = list(mongo.db.examiner_notifications.find(query).sort('_id', -1).limit(limit + 1))
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        return {
+            'notifications': [notification_to_dict(n) for n in docs],
+            'next_cursor': str(docs[-1]['_id']) if has_more else None,
+            'has_more': has_more
+        }
+
+    @staticmethod
+    def get_recent_notifications(examiner_id, limit=10):
         try:
-            notifications = list(mongo.db.examiner_notifications.find(
-                {'examiner_id': examiner_id}
-            ).sort('created_at', -1).limit(limit))
-            return [notification_to_dict(n) for n in notifications]
+            return NotificationService.get_notifications_page(examiner_id, limit=limit)['notifications']
         except Exception as e:
             logger.error(f"Error getting notifications: {e}")
             return []
@@ -0,0 +1,150 @@
+"""
+Real-time monitoring events — Socket.IO
+"""
+import logging
+import threading
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+EXAM_ROOM = 'exam:{}'
+EXAMINER_ROOM = 'examiner:{}'
+
+_server = None
+_emitter = None
+_emitter_lock = threading.Lock()
+
+
+def init_realtime(app, cors_origins=None):
+    """
+    Serve Socket.IO from the Flask app's WSGI entry point
+
+    Examiners connect with their JWT (auth={'token': ...}), are placed in
+    their examiner room, and join one room per exam they monitor. With
+    REALTIME_REDIS on, emits go through Redis pub/sub so clients connected
+    to any gunicorn worker receive events published by any other process,
+    Celery workers included. Each client is told on connect ('welcome')
+    whether that fan-out is available, so it knows how far to trust pushes.
+
+    Args:
+        app: Flask application
+        cors_origins: Origins allowed to open a connection (None = same origin only)
+
+    Returns:
+        socketio.Server, or None when REALTIME_ENABLED is off
+    """
+    global _server
+    from config import Config
+    if not Config.REALTIME_ENABLED:
+        return None
+
+    import socketio
+    from database import mongo
+    from flask_jwt_extended import decode_token
+
+    client_manager = socketio.RedisManager(Config.REDIS_URL) if Config.REALTIME_REDIS else None
+    sio = socketio.Server(
+        async_mode='threading',
+        client_manager=client_manager,
+        cors_allowed_origins=cors_origins or [],
+        logger=False, engineio_logger=False
+    )
+
+    def _examiner_exam_ids(user_id, exam_id=None):
+        query = {'examiner_id': user_id}
+        if exam_id:
+            if not ObjectId.is_valid(exam_id):
+                return []
+            query['_id'] = ObjectId(exam_id)
+        return [str(e['_id']) for e in mongo.db.exams.find(query, {'_id': 1})]
+
+    @sio.event
+    def connect(sid, environ, auth):
+        token = (auth or {}).get('token')
+        if not token:
+            raise socketio.exceptions.ConnectionRefusedError('Missing token')
+        try:
+            with app.app_context():
+                user_id = decode_token(token)['sub']
+        except Exception:
+            raise socketio.exceptions.ConnectionRefusedError('Invalid token')
+        user = mongo.db.users.find_one({'_id': ObjectId(user_id)}, {'role': 1}) if ObjectId.is_valid(user_id) else None
+        if not user or user.get('role') != 'examiner':
+            raise socketio.exceptions.ConnectionRefusedError('Only examiners can monitor exams')
+        sio.save_session(sid, {'user_id': user_id})
+        sio.enter_room(sid, EXAMINER_ROOM.format(user_id))
+        # Without Redis, events published by Celery workers never reach this socket
+        sio.emit('welcome', {'fanout': client_manager is not None}, to=sid)
+
+    @sio.on('join_exam')
+    def join_exam(sid, data):
+        """Join one exam's room, or every exam of the examiner when no exam_id is given"""
+        user_id = sio.get_session(sid)['user_id']
+        exam_id = (data or {}).get('exam_id')
+        exam_ids = _examiner_exam_ids(user_id, exam_id)
+        if exam_id and not exam_ids:
+            return {'error': 'Unauthorized'}
+        for eid in exam_ids:
+            sio.enter_room(sid, EXAM_ROOM.format(eid))
+        return {'joined': exam_ids}
+
+    @sio.on('leave_exam')
+    def leave_exam(sid, data):
+        exam_id = (data or {}).get('exam_id')
+        if exam_id:
+            sio.leave_room(sid, EXAM_ROOM.format(exam_id))
+        return {'left': exam_id}
+
+    app.wsgi_app = socketio.WSGIApp(sio, app.wsgi_app)
+    _server = sio
+    return sio
+
+
+def _get_emitter():
+    """Write-only Redis emitter for processes that do not serve Socket.IO (e.g. Celery)"""
+    global _emitter
+    if _emitter is None:
+        from config import Config
+        if not Config.REALTIME_REDIS:
+            return None
+        with _emitter_lock:
+            if _emitter is None:
+                import socketio
+                _emitter = socketio.RedisManager(Config.REDIS_URL, write_only=True)
+    return _emitter
+
+
+def publish(event, exam_id, data):
+    """
+    Send a monitoring event to everyone watching an exam
+
+    Never raises: a failed publish must not fail the request that caused it,
+    and polling endpoints remain the source of truth.
+
+    Args:
+        event: Event name (violation, trust_score, session_started, session_ended, auto_submitted)
+        exam_id: Exam whose room receives the event
+        data: JSON-serialisable payload; exam_id is added to it
+    """
+    from config import Config
+    if not Config.REALTIME_ENABLED or not exam_id:
+        return
+    try:
+        target = _server if _server is not None else _get_emitter()
+        if target is not None:
+            target.emit(event, dict(data, exam_id=str(exam_id)), room=EXAM_ROOM.format(exam_id))
+    except Exception as e:
+        logger.warning(f"Realtime publish of {event} failed: {e}")
+
+
+def publish_to_examiner(event, examiner_id, data):
+    """Send an event to one examiner's connections (e.g. a new notification)"""
+    from config import Config
+    if not Config.REALTIME_ENABLED or not examiner_id:
+        return
+    try:
+        target = _server if _server is not None else _get_emitter()
+        if target is not None:
+            target.emit(event, data, room=EXAMINER_ROOM.format(examiner_id))
+    except Exception as e:
+        logger.warning(f"Realtime publish of {event} failed: {e}")
@@ -0,0 +1,207 @@
+"""
+Result report builder — batched joins over exam_results
+"""
+import itertools
+import json
+import logging
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+# Related collections a report can join onto exam_results
+JOINS = ('students', 'sessions', 'violations', 'exams')
+
+
+class ResultReport:
+    """
+    Stream exam_results rows joined with their related documents
+
+    Results are read in batches. For each batch the students, sessions,
+    violations (grouped per student with $group) and exams it references
+    are fetched with one $in query each, so a report costs a constant
+    number of round trips per batch instead of several per row.
+    """
+
+    def __init__(self, query, row_builder, joins=(), sort=None, batch_size=500):
+        """
+        Args:
+            query: exam_results filter
+            row_builder: Callable(result, related) -> row dict, where related
+                holds 'student', 'session', 'violations' and 'exam' (None if not joined)
+            joins: Subset of JOINS to fetch
+            sort: pymongo sort spec (default: newest submission first)
+            batch_size: Results joined per round of queries
+        """
+        unknown = set(joins) - set(JOINS)
+        if unknown:
+            raise ValueError(f"Unknown joins: {sorted(unknown)}")
+        self.query = query
+        self.row_builder = row_builder
+        self.joins = set(joins)
+        self.sort = sort or [('submitted_at', -1), ('_id', -1)]
+        self.batch_size = max(1, int(batch_size))
+
+    def count(self):
+        """Number of exam results matching the query, regardless of paging"""
+        from database import mongo
+        return mongo.db.exam_results.count_documents(self.query)
+
+    def rows(self, offset=0, limit=None, fields=None):
+        """
+        Yield report rows
+
+        Args:
+            offset: Results to skip
+            limit: Maximum rows (None = all)
+            fields: Optional top-level row keys to keep
+
+        Yields:
+            dict: One row per exam result
+        """
+        from database import mongo
+        cursor = mongo.db.exam_results.find(self.query).sort(self.sort).skip(int(offset))
+        if limit is not None:
+            cursor = cursor.limit(int(limit))
+        cursor = cursor.batch_size(self.batch_size)
+
+        batch = []
+        for result in cursor:
+            batch.append(result)
+            if len(batch) >= self.batch_size:
+                yield from self._build(batch, fields)
+                batch = []
+        if batch:
+            yield from self._build(batch, fields)
+
+    def _build(self, batch, fields):
+        related = self._fetch_related(batch)
+        for r in batch:
+            row = self.row_builder(r, {
+                'student': related['students'].get(r['student_id']),
+                'session': related['sessions'].get((r['exam_id'], r['student_id'])),
+                'violations': related['violations'].get((r['exam_id'], r['student_id']), []),
+                'exam': related['exams'].get(r['exam_id'])
+            })
+            if fields:
+                row = {k: row[k] for k in fields if k in row}
+            yield row
+
+    def _fetch_related(self, batch):
+        """One query per join for the whole batch"""
+        from database import mongo
+        related = {name: {} for name in JOINS}
+        student_ids = list({r['student_id'] for r in batch})
+        exam_ids = list({r['exam_id'] for r in batch})
+
+        if 'students' in self.joins:
+            related['students'] = {
+                str(u['_id']): u for u in mongo.db.users.find(
+                    {'_id': {'$in': [ObjectId(s) for s in student_ids if ObjectId.is_valid(s)]}},
+                    {'name': 1, 'email': 1}
+                )
+            }
+        if 'exams' in self.joins:
+            related['exams'] = {
+                str(e['_id']): e for e in mongo.db.exams.find(
+                    {'_id': {'$in': [ObjectId(e) for e in exam_ids if ObjectId.is_valid(e)]}},
+                    {'title': 1, 'total_marks': 1, 'duration': 1}
+                )
+            }
+        if 'sessions' in self.joins:
+            for s in mongo.db.proctoring_sessions.find(
+                {'exam_id': {'$in': exam_ids}, 'student_id': {'$in': student_ids}},
+                {'exam_id': 1, 'student_id': 1, 'current_trust_score': 1, 'status': 1}
+            ):
+                related['sessions'].setdefault((s['exam_id'], s['student_id']), s)
+        if 'violations' in self.joins:
+            for g in mongo.db.violations.aggregate(
+                violations_by_student_pipeline(exam_ids, student_ids), allowDiskUse=True
+            ):
+                related['violations'][(g['_id']['exam_id'], g['_id']['student_id'])] = g['violations']
+        return related
+
+
+def violations_by_student_pipeline(exam_ids, student_ids):
+    """Aggregation over violations grouping them per (exam_id, student_id), newest first"""
+    return [
+        {'$match': {'exam_id': {'$in': list(exam_ids)}, 'student_id': {'$in': list(student_ids)}}},
+        {'$sort': {'created_at': -1}},
+        {'$group': {
+            '_id': {'exam_id': '$exam_id', 'student_id': '$student_id'},
+            'violations': {'$push': {
+                '_id': '$_id', 'violation_type': '$violation_type', 'severity': '$severity',
+                'description': '$description', 'trust_score_reduction': '$trust_score_reduction',
+                'evidence_path': '$evidence_path', 'created_at': '$created_at'
+            }}
+        }}
+    ]
+
+
+def parse_report_args(args, default_limit=None, max_limit=1000):
+    """
+    Read offset, limit and fields query parameters
+
+    Returns:
+        tuple: (offset, limit or None, list of fields or None)
+    """
+    offset = max(0, int(args.get('offset', 0)))
+    limit = args.get('limit', default_limit)
+    limit = max(1, min(int(limit), max_limit)) if limit is not None else None
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or None
+    return offset, limit, fields
+
+
+def joins_for(fields, field_joins):
+    """Joins needed to produce the selected fields (all joins when fields is None)"""
+    if fields is None:
+        return set().union(*field_joins.values()) if field_joins else set()
+    needed = set()
+    for field in fields:
+        needed |= field_joins.get(field, set())
+    return needed
+
+
+def prefetch(rows):
+    """
+    Produce the first row (its whole batch and joins) before the response starts
+
+    Errors in the first query therefore still reach the route's error
+    handling as a 500 instead of truncating a 200 body.
+
+    Returns:
+        iterator: The same rows
+    """
+    rows = iter(rows)
+    return itertools.chain(list(itertools.islice(rows, 1)), rows)
+
+
+def stream_json(head, key, rows, limit=None):
+    """
+    Serialise {**head, key: [rows...], 'count': rows in this page, 'has_more'} without building the list
+
+    Pass limit + 1 to rows() and limit here to have has_more reported.
+    Totals belong in head (see ResultReport.count). If a later batch fails
+    after the headers were sent, the document is still closed as valid
+    JSON, with an 'error' key and has_more true.
+
+    Yields:
+        str: JSON fragments
+    """
+    prefix = json.dumps(head, default=str)
+    yield (prefix[:-1] + ', ' if head else '{') + json.dumps(key) + ': ['
+    count = 0
+    has_more = False
+    error = None
+    try:
+        for row in rows:
+            if limit is not None and count >= limit:
+                has_more = True
+                break
+            yield (', ' if count else '') + json.dumps(row, default=str)
+            count += 1
+    except Exception as e:
+        logger.error(f"Result report failed after {count} rows: {e}")
+        error = str(e)
+        has_more = True
+    tail = f', "error": {json.dumps(error)}' if error else ''
+    yield f'], "count": {count}{tail}, "has_more": {json.dumps(has_more)}}}'
@@ -0,0 +1,145 @@
+"""
+Exam review builder — answers joined with the compiled exam
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewCache:
+    """
+    LRU cache of rendered reviews keyed by (student_id, exam_id)
+
+    A submitted result does not change, so a review only goes stale when
+    the exam's questions are edited. Entries remember the exam's
+    cache_version and are only served while it is unchanged, so edits
+    made through any process are seen on the next lookup.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300):
+        """
+        Args:
+            max_entries: Reviews kept in this process
+            ttl: Seconds a review is served before it is rebuilt
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, student_id, exam_id, result_id, version=None):
+        """Cached review, or None if missing, expired, or built for another result or exam version"""
+        key = (student_id, exam_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (not entry or entry['result_id'] != result_id or entry['version'] != version
+                    or time.monotonic() - entry['at'] >= self.ttl):
+                return None
+            self._entries.move_to_end(key)
+            return entry['review']
+
+    def put(self, student_id, exam_id, result_id, review, version=None):
+        key = (student_id, exam_id)
+        with self._lock:
+            self._entries[key] = {
+                'review': review, 'result_id': result_id, 'version': version, 'at': time.monotonic()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_exam(self, exam_id):
+        """Drop every cached review of an exam"""
+        exam_id = str(exam_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == exam_id]:
+                del self._entries[key]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_review_cache():
+    """Get or create this process's review cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from config import Config
+                _cache = ReviewCache(
+                    max_entries=Config.REVIEW_CACHE_MAX_ENTRIES,
+                    ttl=Config.EXAM_CACHE_TTL_SECONDS
+                )
+    return _cache
+
+
+def build_review(student_id, exam_id):
+    """
+    Question-by-question review of a student's answers
+
+    Reads all of the student's answers for the exam in one query and joins
+    them in memory with the compiled (cached) exam.
+
+    Returns:
+        dict: {'exam_title', 'questions'}, or None if the exam does not exist
+    """
+    from database import mongo
+    from services.exam_cache import get_compiled_exam
+
+    compiled = get_compiled_exam(exam_id)
+    if not compiled:
+        return None
+
+    answers = {}
+    for sa in mongo.db.student_answers.find(
+        {'student_id': student_id, 'exam_id': exam_id},
+        {'question_id': 1, 'selected_answer': 1, 'marks_awarded': 1}
+    ).sort('_id', 1):
+        answers[sa.get('question_id')] = sa
+
+    review_data = []
+    for q in compiled['questions']:
+        key = compiled['answer_key'].get(q['id'], {})
+        sa = answers.get(q['id'])
+        selected = sa.get('selected_answer') if sa else None
+        review_data.append({
+            "question_id": q['id'],
+            "question_text": q['question_text'],
+            "option_a": q.get('option_a'),
+            "option_b": q.get('option_b'),
+            "option_c": q.get('option_c'),
+            "option_d": q.get('option_d'),
+            "correct_answer": key.get('correct_answer'),
+            "explanation": key.get('explanation'),
+            "selected_answer": selected,
+            "is_correct": selected == key.get('correct_answer') if selected else False,
+            "marks": q.get('marks', 1),
+            "marks_awarded": sa.get('marks_awarded', 0) if sa else 0
+        })
+
+    return {'exam_title': compiled['exam']['title'], 'questions': review_data}
+
+
+def get_review(student_id, exam_id, result_id):
+    """build_review, served from the review cache when REVIEW_CACHE_ENABLED is on"""
+    from config import Config
+    if not Config.REVIEW_CACHE_ENABLED:
+        return build_review(student_id, exam_id)
+
+    from services.exam_cache import exam_version
+
+    # Read before building, so a review racing an edit is stored under the old version
+    version = exam_version(exam_id)
+    if version is None:
+        return None
+    cache = get_review_cache()
+    review = cache.get(student_id, exam_id, result_id, version)
+    if review is None:
+        review = build_review(student_id, exam_id)
+        if review is not None:
+            cache.put(student_id, exam_id, result_id, review, version)
+    return review
@@ -0,0 +1,65 @@
+"""
+Live session monitoring queries
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = 'migrations'
+
+
+def recent_violations_pipeline(session_ids, n=5):
+    """
+    Aggregation over proctoring_sessions returning each session's n latest violations
+
+    Each session is joined to violations with an equality $lookup on
+    session_id whose sub-pipeline sorts and limits, so MongoDB walks the
+    (session_id, created_at) index and reads n documents per session,
+    however many violations the session has.
+
+    Args:
+        session_ids: Session ObjectIds
+        n: Violations per session
+
+    Returns:
+        list: Pipeline yielding {'_id': session_id (str), 'violations': [...]}
+    """
+    return [
+        {'$match': {'_id': {'$in': list(session_ids)}}},
+        {'$project': {'_id': {'$toString': '$_id'}}},
+        {'$lookup': {
+            'from': 'violations',
+            'localField': '_id',
+            'foreignField': 'session_id',
+            'pipeline': [
+                {'$sort': {'created_at': -1}},
+                {'$limit': n},
+                {'$project': {
+                    '_id': 0, 'id': '$_id', 'type': '$violation_type',
+                    'reduction': '$trust_score_reduction',
+                    'created_at': 1, 'evidence_path': 1
+                }}
+            ],
+            'as': 'violations'
+        }}
+    ]
+
+
+def backfill_session_updated_at(db):
+    """
+    Stamp sessions created before updated_at was maintained, once per database
+
+    They get the current time, so the next delta poll of every monitor
+    returns them once (ended ones as ended_session_ids).
+
+    Returns:
+        int: Sessions updated, or 0 if the backfill already ran
+    """
+    if db[MIGRATIONS].find_one({'_id': 'sessions_updated_at'}):
+        return 0
+    result = db.proctoring_sessions.update_many(
+        {'updated_at': {'$exists': False}}, [{'$set': {'updated_at': '$$NOW'}}]
+    )
+    db[MIGRATIONS].update_one({'_id': 'sessions_updated_at'}, {'$set': {'done': True}}, upsert=True)
+    logger.info(f"Backfilled updated_at on {result.modified_count} proctoring sessions")
+    return result.modified_count
@@ -0,0 +1,278 @@
+"""
+Exam submission queue — MongoDB + Celery
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+_index_ready = False
+
+
+def _ensure_index():
+    global _index_ready
+    if not _index_ready:
+        from database import mongo
+        from indexes import ensure_indexes
+        ensure_indexes(mongo.db, ['submissions'])
+        _index_ready = True
+
+
+def create_submission(session, answers, idempotency_key=None, auto_submitted=False):
+    """
+    Persist a raw answer payload, once per idempotency key
+
+    Args:
+        session: Active proctoring session document
+        answers: List of {'question_id', 'selected_answer'} as sent by the client
+        idempotency_key: Client-chosen key; defaults to one submission per session
+        auto_submitted: True when the client submitted because time ran out
+
+    Returns:
+        tuple: (submission document, created) — created is False for a repeated key
+    """
+    from database import mongo
+    _ensure_index()
+    key = idempotency_key or f"session:{session['_id']}"
+    doc = {
+        '_id': ObjectId(),
+        'idempotency_key': key,
+        'student_id': session['student_id'],
+        'exam_id': session['exam_id'],
+        'session_id': str(session['_id']),
+        'answers': answers,
+        'auto_submitted': auto_submitted,
+        'status': 'queued',
+        'attempts': 0,
+        'result': None,
+        'error': None,
+        'created_at': datetime.utcnow(),
+        'completed_at': None
+    }
+    try:
+        mongo.db.submissions.insert_one(doc)
+        return doc, True
+    except DuplicateKeyError:
+        return mongo.db.submissions.find_one({'idempotency_key': key}), False
+
+
+def find_submission(student_id, idempotency_key):
+    """
+    Submission a student already made under a key, if any
+
+    Without a key this looks for the default key create_submission uses,
+    one per session, on the student's most recent session.
+    """
+    from database import mongo
+    if not idempotency_key:
+        latest = mongo.db.proctoring_sessions.find_one(
+            {'student_id': student_id}, {'_id': 1}, sort=[('_id', -1)]
+        )
+        if not latest:
+            return None
+        idempotency_key = f"session:{latest['_id']}"
+    return mongo.db.submissions.find_one({'idempotency_key': idempotency_key, 'student_id': student_id})
+
+
+def enqueue_submission(submission_id):
+    """
+    Hand a submission to the grader workers
+
+    Returns:
+        bool: False if the broker is unreachable (the caller should grade inline)
+    """
+    try:
+        from celery_app import grade_submission as grade_task
+        grade_task.delay(str(submission_id))
+        return True
+    except Exception as e:
+        logger.error(f"Could not enqueue submission {submission_id}: {e}")
+        return False
+
+
+def grade_if_unclaimed(app, submission_id, delay, stale_after=300, retries=3):
+    """
+    Grade a queued submission in this process if no worker has claimed it after delay seconds
+
+    A reachable broker is no proof that a worker is consuming it; this
+    keeps a submission from waiting for requeue_stale_submissions (or
+    forever, without Celery beat). It is also the retry for inline grading
+    that failed. grade_submission claims atomically, so a worker that picks
+    the task up late finds it already graded.
+
+    Args:
+        retries: Further attempts, delay seconds apart, if grading fails here
+    """
+    def run():
+        from database import mongo
+        with app.app_context():
+            if not mongo.db.submissions.find_one({'_id': ObjectId(submission_id), 'status': 'queued'}, {'_id': 1}):
+                return
+            logger.warning(f"Submission {submission_id} not graded yet, grading in process")
+            try:
+                grade_submission(submission_id, stale_after=stale_after)
+            except Exception as e:
+                logger.error(f"In-process grading of {submission_id} failed: {e}")
+                if retries > 0:
+                    grade_if_unclaimed(app, submission_id, delay, stale_after=stale_after, retries=retries - 1)
+
+    timer = threading.Timer(delay, run)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def _stored_result(existing, total_questions):
+    """Result summary of an exam result that is already stored"""
+    return {
+        'obtained_marks': existing.get('obtained_marks'),
+        'total_marks': existing.get('total_marks'),
+        'percentage': round(existing.get('percentage') or 0, 2),
+        'correct_answers': existing.get('correct_answers'),
+        'total_questions': total_questions,
+        'violation_count': existing.get('violation_count'),
+        'final_trust_score': existing.get('final_trust_score'),
+        'time_taken': existing.get('total_time_taken'),
+        'status': existing.get('status')
+    }
+
+
+def grade_submission(submission_id, stale_after=300):
+    """
+    Grade a queued submission and store its exam result
+
+    Safe to call more than once: the submission is claimed atomically and
+    an existing exam result for the student and exam is never duplicated.
+
+    Returns:
+        dict: The stored result summary, or None if another worker holds the submission
+    """
+    from database import mongo
+    from models import make_exam_result
+    from services.grading import load_answer_key, grade_answers, save_graded_answers
+
+    now = datetime.utcnow()
+    submission = mongo.db.submissions.find_one_and_update(
+        {'_id': ObjectId(submission_id), '$or': [
+            {'status': 'queued'},
+            {'status': 'grading', 'claimed_at': {'$lt': now - timedelta(seconds=stale_after)}}
+        ]},
+        {'$set': {'status': 'grading', 'claimed_at': now}, '$inc': {'attempts': 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not submission:
+        done = mongo.db.submissions.find_one({'_id': ObjectId(submission_id)}, {'result': 1, 'status': 1})
+        return done.get('result') if done and done.get('status') == 'completed' else None
+
+    try:
+        student_id = submission['student_id']
+        exam_id = submission['exam_id']
+        session = mongo.db.proctoring_sessions.find_one({'_id': ObjectId(submission['session_id'])}) or {}
+
+        existing = mongo.db.exam_results.find_one({'student_id': student_id, 'exam_id': exam_id})
+        if existing:
+            # Auto-submitted on trust score, or a retried grading that already stored its result
+            result = _stored_result(existing, len(submission['answers']))
+        else:
+            exam = mongo.db.exams.find_one({'_id': ObjectId(exam_id)})
+            if not exam:
+                raise ValueError('Exam not found')
+
+            answers = submission['answers']
+            answer_key = load_answer_key(exam_id, [a.get('question_id') for a in answers])
+            grade = grade_answers(answer_key, answers, exam.get('negative_marking', 0))
+            save_graded_answers(student_id, exam_id, grade['graded'])
+
+            total_marks = exam.get('total_marks', 0)
+            obtained_marks = grade['obtained_marks']
+            percentage = (obtained_marks / total_marks * 100) if total_marks > 0 else 0
+            violation_count = mongo.db.violations.count_documents({'student_id': student_id, 'exam_id': exam_id})
+
+            time_taken = None
+            if session.get('start_time'):
+                time_taken = int((submission['created_at'] - session['start_time']).total_seconds() / 60)
+
+            result_doc = make_exam_result(
+                student_id=student_id, exam_id=exam_id,
+                enrollment_id=session.get('enrollment_id'),
+                obtained_marks=obtained_marks, total_marks=total_marks,
+                percentage=percentage, status='completed',
+                violation_count=violation_count,
+                final_trust_score=session.get('current_trust_score', 100),
+                correct_answers=grade['correct'],
+                incorrect_answers=grade['incorrect'],
+                unanswered=grade['unanswered'],
+                total_time_taken=time_taken
+            )
+            result_doc['submitted_at'] = submission['created_at']
+            try:
+                mongo.db.exam_results.insert_one(result_doc)
+                result = {
+                    'obtained_marks': obtained_marks, 'total_marks': total_marks,
+                    'percentage': round(percentage, 2), 'correct_answers': grade['correct'],
+                    'total_questions': len(answers), 'violation_count': violation_count,
+                    'final_trust_score': session.get('current_trust_score', 100),
+                    'time_taken': time_taken, 'status': 'completed'
+                }
+            except DuplicateKeyError:
+                # Another grader stored the result first (exam_results is unique per student and exam)
+                existing = mongo.db.exam_results.find_one({'student_id': student_id, 'exam_id': exam_id})
+                result = _stored_result(existing, len(answers))
+
+        mongo.db.submissions.update_one(
+            {'_id': submission['_id']},
+            {'$set': {'status': 'completed', 'result': result, 'completed_at': datetime.utcnow()},
+             '$unset': {'claimed_at': ''}}
+        )
+        return result
+
+    except Exception as e:
+        logger.error(f"Grading submission {submission_id} failed: {e}")
+        mongo.db.submissions.update_one(
+            {'_id': submission['_id']},
+            {'$set': {'status': 'queued', 'error': str(e)}, '$unset': {'claimed_at': ''}}
+        )
+        raise
+
+
+def requeue_stale_submissions(queued_after=60, stale_after=300, max_attempts=5):
+    """
+    Re-enqueue submissions a worker never picked up or abandoned mid-grading
+
+    Returns:
+        int: Number of submissions re-enqueued
+    """
+    from database import mongo
+    now = datetime.utcnow()
+    stale = mongo.db.submissions.find({
+        'attempts': {'$lt': max_attempts},
+        '$or': [
+            {'status': 'queued', 'created_at': {'$lt': now - timedelta(seconds=queued_after)}},
+            {'status': 'grading', 'claimed_at': {'$lt': now - timedelta(seconds=stale_after)}}
+        ]
+    }, {'_id': 1})
+    count = 0
+    for s in stale:
+        if enqueue_submission(s['_id']):
+            count += 1
+    mongo.db.submissions.update_many(
+        {'status': 'queued', 'attempts': {'$gte': max_attempts}},
+        {'$set': {'status': 'failed', 'completed_at': now}}
+    )
+    return count
+
+
+def submission_to_dict(doc):
+    return {
+        'submission_id': str(doc['_id']),
+        'exam_id': doc['exam_id'],
+        'status': doc.get('status'),
+        'result': doc.get('result'),
+        'error': doc.get('error') if doc.get('status') == 'failed' else None,
+        'created_at': doc['created_at'].isoformat() + 'Z' if doc.get('created_at') else None,
+        'completed_at': doc['completed_at'].isoformat() + 'Z' if doc.get('completed_at') else None
+    }
@@ -0,0 +1,147 @@
+"""
+Buffered violation writes — MongoDB
+"""
+import atexit
+import logging
+import threading
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+
+class ViolationBuffer:
+    """
+    Collect violation documents and write them with insert_many
+
+    Documents get a client-generated ObjectId when added, so callers can
+    return the violation id before the write happens. A batch is flushed
+    when it reaches batch_size, after flush_interval seconds, or when
+    flush() is called (e.g. before counting a session's violations).
+
+    Until then a document exists only in this process: readers in other
+    processes do not see it, and a crash loses it (a clean shutdown
+    flushes at exit). Callers flush right away for violations that must
+    not be lost or that an auto-submit is about to count.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=1.0):
+        """
+        Args:
+            batch_size: Pending documents that trigger an immediate flush (1 = no buffering)
+            flush_interval: Longest time in seconds a document waits to be written
+        """
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self._pending = []
+        self._in_flight = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self._stats = {'added': 0, 'written': 0, 'batches': 0, 'failed': 0}
+
+    def add(self, doc):
+        """
+        Queue a violation document for writing
+
+        Returns:
+            ObjectId: The id the document will be stored under
+        """
+        doc.setdefault('_id', ObjectId())
+        with self._lock:
+            self._pending.append(doc)
+            self._stats['added'] += 1
+            full = len(self._pending) >= self.batch_size
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+        return doc['_id']
+
+    def flush(self):
+        """
+        Write every pending document
+
+        Returns:
+            int: Number of documents written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._in_flight = batch
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not batch:
+                return 0
+            try:
+                written = self._write(batch)
+            finally:
+                with self._lock:
+                    self._in_flight = []
+            return written
+
+    def _write(self, batch):
+        from database import mongo
+        from pymongo.errors import BulkWriteError
+        try:
+            mongo.db.violations.insert_many(batch, ordered=False)
+            written = len(batch)
+        except BulkWriteError as e:
+            # Duplicate ids mean a retried batch already landed; anything else is lost
+            errors = e.details.get('writeErrors', [])
+            lost = [err for err in errors if err.get('code') != 11000]
+            written = len(batch) - len(errors)
+            self._stats['failed'] += len(lost)
+            if lost:
+                logger.error(f"Failed to write {len(lost)} violations: {lost[0].get('errmsg')}")
+        except Exception as e:
+            # Put the batch back so the next flush retries it
+            logger.error(f"Violation batch write failed, will retry: {e}")
+            with self._lock:
+                self._pending = batch + self._pending
+                self._schedule()
+            return 0
+
+        self._stats['written'] += written
+        self._stats['batches'] += 1
+        return written
+
+    def _schedule(self):
+        """Start the flush timer if none is running (lock held by caller)"""
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def has_pending(self, session_id, violation_type, since):
+        """True if an unwritten violation of this type for the session was created after since"""
+        with self._lock:
+            return any(
+                d['session_id'] == session_id and d['violation_type'] == violation_type
+                and d['created_at'] >= since
+                for d in self._pending + self._in_flight
+            )
+
+    def stats(self):
+        """Write counters and current backlog"""
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending))
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_violation_buffer():
+    """Get or create this process's violation buffer"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                from config import Config
+                _buffer = ViolationBuffer(
+                    batch_size=Config.VIOLATION_BATCH_SIZE,
+                    flush_interval=Config.VIOLATION_FLUSH_INTERVAL_SECONDS
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
@@ -52,6 +52,49 @@ class ViolationDetector:
         
         return reduction_map.get(severity, 10)
     
+    @staticmethod
+    def violations_from_detections(detections):
+        """
+        Map frame or audio detection results to violation types
+        
+        Args:
+            detections: Result dict from ViolationDetectionManager.analyze_frame or analyze_audio
+            
+        Returns:
+            list: (violation_type, description) tuples
+        """
+        found = []
+        
+        if detections.get('phone', {}).get('phone_detected'):
+            found.append(('phone_detected', 'Phone or device detected in camera frame'))
+        
+        if detections.get('persons', {}).get('multiple_persons'):
+            count = detections['persons'].get('person_count', 0)
+            found.append(('multiple_persons', f'{count} persons detected in camera frame'))
+        
+        if detections.get('face', {}).get('face_detected') is False:
+            found.append(('face_not_visible', 'Face not visible in camera frame'))
+        
+        # Gaze skipped for lack of a face is already reported as face_not_visible
+        if detections.get('eye_gaze', {}).get('is_suspicious') and not detections['eye_gaze'].get('skipped'):
+            direction = detections['eye_gaze'].get('gaze_direction')
+            found.append(('eye_gaze_suspicious', f'Looking away from screen ({direction})'))
+        
+        if detections.get('head_movement', {}).get('extreme_movement'):
+            found.append(('extreme_head_movement', 'Extreme head movement detected'))
+        
+        if detections.get('blur', {}).get('removal_attempt'):
+            found.append(('blur_exit_attempt', 'Background blur removal attempt detected'))
+        
+        if detections.get('sound', {}).get('sound_detected'):
+            sound = detections['sound']
+            if sound.get('is_speech'):
+                found.append(('sound_detected', f"Speech detected ({sound.get('speech_seconds', 0)}s)"))
+            else:
+                found.append(('sound_detected', f"Loud sound detected ({sound.get('volume_level')})"))
+        
+        return found
+    
     @staticmethod
     def analyze_violation_pattern(violations):
         """Analyze violation pattern"""
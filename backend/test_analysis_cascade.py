@@ -0,0 +1,105 @@
+"""
+Cascade scheduling in ViolationDetectionManager
+
+Runs frames through the same detector set the /analyze-frame and /frames
+routes request, with stand-in detectors that record what they were given,
+so no models are needed.
+
+    pytest test_analysis_cascade.py
+"""
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from ai_models.model_manager import DETECTOR_REGISTRY, ViolationDetectionManager
+
+# The detector set the frame routes request (routes.proctoring.FRAME_DETECTION_DEFAULTS)
+ROUTE_DETECTORS = ('phone', 'persons', 'face', 'eye_gaze', 'head_movement')
+
+
+class FakeFaceDetector:
+    input_width = None
+
+    def __init__(self):
+        self.bbox = (0.25, 0.25, 0.5, 0.5)
+
+    def detect_face(self, frame, frame_rgb=None):
+        if self.bbox is None:
+            return {'face_detected': False, 'face_count': 0}
+        return {'face_detected': True, 'face_count': 1, 'bbox': self.bbox}
+
+
+class FakeEyeTracker:
+    def __init__(self):
+        self.rois = []
+
+    def detect_eye_gaze(self, frame, frame_rgb=None, roi=None):
+        self.rois.append(roi)
+        return {'looking_at_screen': True, 'gaze_direction': 'center', 'is_suspicious': False}
+
+
+class FakeHeadDetector:
+    input_width = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect_head_movement(self, frame, frame_rgb=None):
+        self.calls += 1
+        return {'extreme_movement': False, 'movement_speed': 0, 'head_angle': 0}
+
+
+@pytest.fixture
+def manager():
+    manager = ViolationDetectionManager()
+    manager.set_analysis_mode('cascade')
+    for attr in DETECTOR_REGISTRY:
+        manager.__dict__[attr] = None
+    manager.__dict__['face_detector'] = FakeFaceDetector()
+    manager.__dict__['eye_tracker'] = FakeEyeTracker()
+    manager.__dict__['head_detector'] = FakeHeadDetector()
+    return manager
+
+
+def frame():
+    return np.zeros((240, 320, 3), dtype=np.uint8)
+
+
+def test_route_detector_set_includes_cascade_stages():
+    proctoring = pytest.importorskip('routes.proctoring')
+    assert tuple(proctoring.FRAME_DETECTION_DEFAULTS) == ROUTE_DETECTORS
+    assert set(ViolationDetectionManager.CASCADE_STAGES) <= set(ROUTE_DETECTORS)
+
+
+def test_gaze_runs_on_face_crop(manager):
+    result = manager.analyze_frame(frame(), detectors=ROUTE_DETECTORS)
+    assert result['face']['face_detected']
+    assert manager.eye_tracker.rois == [(40, 30, 240, 180)]
+    assert 'eye_gaze' in result['timings_ms']
+
+
+def test_gaze_skipped_without_face(manager):
+    manager.face_detector.bbox = None
+    result = manager.analyze_frame(frame(), detectors=ROUTE_DETECTORS)
+    assert result['eye_gaze']['skipped']
+    assert manager.eye_tracker.rois == []
+    assert manager.get_stage_stats()['eye_gaze'] == {'ran': 0, 'skipped': 1}
+
+
+def test_head_pose_only_reruns_when_face_moves(manager):
+    detectors = ROUTE_DETECTORS
+    manager.analyze_frame(frame(), detectors=detectors)
+    second = manager.analyze_frame(frame(), detectors=detectors)
+    assert manager.head_detector.calls == 1
+    assert second['head_movement']['skipped']
+
+    manager.face_detector.bbox = (0.4, 0.25, 0.5, 0.5)
+    manager.analyze_frame(frame(), detectors=detectors)
+    assert manager.head_detector.calls == 2
+
+
+def test_gaze_uses_full_frame_without_face_detector(manager):
+    manager.__dict__['face_detector'] = None
+    manager.analyze_frame(frame(), detectors=ROUTE_DETECTORS)
+    assert manager.eye_tracker.rois == [None]
@@ -0,0 +1,70 @@
+"""
+Session assignment and eviction in DetectorPool
+
+Uses a factory of stand-in managers, so no models are loaded.
+
+    pytest test_detector_pool.py
+"""
+import pytest
+
+pytest.importorskip('cv2')
+
+from ai_models.detector_pool import DetectorPool
+
+
+class FakeManager:
+    def __init__(self):
+        self.resets = 0
+
+    def reset(self):
+        self.resets += 1
+
+
+@pytest.fixture
+def pool():
+    return DetectorPool(max_size=2, factory=FakeManager)
+
+
+def test_same_session_gets_same_manager(pool):
+    with pool.session('a') as first:
+        pass
+    with pool.session('a') as second:
+        pass
+    assert first is second
+    assert first.resets == 0
+    assert pool.stats()['created'] == 1
+
+
+def test_least_recently_used_session_is_evicted(pool):
+    with pool.session('a') as a:
+        pass
+    with pool.session('b') as b:
+        pass
+    with pool.session('a'):
+        pass
+    with pool.session('c') as c:
+        pass
+
+    # 'b' was used least recently, so 'c' takes over its manager after a reset
+    assert c is b
+    assert b.resets == 1
+    stats = pool.stats()
+    assert stats['evicted'] == 1
+    assert stats['active'] == 2
+    with pool.session('a') as again:
+        assert again is a
+
+
+def test_released_manager_is_reused(pool):
+    with pool.session('a') as a:
+        pass
+    assert pool.release('a')
+    assert not pool.release('a')
+
+    with pool.session('b') as b:
+        pass
+    assert b is a
+    stats = pool.stats()
+    assert stats['reused'] == 1
+    assert stats['created'] == 1
+    assert stats['idle'] == 0
@@ -0,0 +1,104 @@
+"""
+Deduplicated writes in store_stream
+
+Blob records live in an in-memory stand-in for the evidence_blobs
+collection and files in a temporary EVIDENCE_DIR.
+
+    pytest test_evidence_store.py
+"""
+import hashlib
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('flask_pymongo')
+
+import database
+from services import evidence_store
+from services.evidence_store import EvidenceTooLarge, shard_path, store_stream
+
+
+class FakeBlobs:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one_and_update(self, query, update, projection=None, upsert=False):
+        before = self.docs.get(query['_id'])
+        doc = self.docs.setdefault(query['_id'], {'_id': query['_id']})
+        if before is None:
+            doc.update(update.get('$setOnInsert', {}))
+        else:
+            before = dict(before)
+        self._apply(doc, update)
+        return before
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.get(query['_id'])
+        if doc is not None:
+            self._apply(doc, update)
+
+    @staticmethod
+    def _apply(doc, update):
+        for field, value in update.get('$max', {}).items():
+            if doc.get(field) is None or value > doc[field]:
+                doc[field] = value
+
+
+class FakeDb:
+    def __init__(self):
+        self.evidence_blobs = FakeBlobs()
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    fake = FakeDb()
+    queued = []
+    monkeypatch.setattr(database.mongo, 'db', fake, raising=False)
+    monkeypatch.setattr(evidence_store, 'EVIDENCE_DIR', str(tmp_path))
+    monkeypatch.setattr(evidence_store, 'enqueue_compression', queued.append)
+    fake.queued = queued
+    return fake
+
+
+def test_identical_uploads_share_one_file(store, tmp_path):
+    data = b'same frame'
+    first = store_stream(io.BytesIO(data), 'png')
+    second = store_stream(io.BytesIO(data), 'png')
+
+    assert first == second == shard_path(hashlib.sha256(data).hexdigest(), 'png')
+    assert (tmp_path / first).read_bytes() == data
+    assert os.listdir(tmp_path / '.tmp') == []
+    assert store.queued == [first]
+
+
+def test_reupload_extends_retention(store):
+    path = store_stream(io.BytesIO(b'frame'), 'png')
+    store.evidence_blobs.docs[path]['expires_at'] = datetime.utcnow() - timedelta(hours=1)
+    store_stream(io.BytesIO(b'frame'), 'png')
+    assert store.evidence_blobs.docs[path]['expires_at'] > datetime.utcnow()
+
+
+def test_missing_file_is_restored(store, tmp_path):
+    path = store_stream(io.BytesIO(b'frame'), 'png')
+    os.remove(tmp_path / path)
+    assert store_stream(io.BytesIO(b'frame'), 'png') == path
+    assert (tmp_path / path).exists()
+
+
+def test_reupload_of_reencoded_blob_returns_new_path(store, tmp_path):
+    path = store_stream(io.BytesIO(b'frame'), 'png')
+    moved = path.rsplit('.', 1)[0] + '.jpg'
+    store.evidence_blobs.docs[path]['moved_to'] = moved
+    store.evidence_blobs.docs[moved] = {'_id': moved, 'expires_at': datetime.utcnow()}
+
+    assert store_stream(io.BytesIO(b'frame'), 'png') == moved
+    assert store.evidence_blobs.docs[moved]['expires_at'] > datetime.utcnow() + timedelta(minutes=1)
+
+
+def test_oversized_upload_rejected(store, tmp_path):
+    with pytest.raises(EvidenceTooLarge):
+        store_stream(io.BytesIO(b'x' * 100), 'png', max_bytes=10)
+    assert os.listdir(tmp_path / '.tmp') == []
+    assert store.evidence_blobs.docs == {}
@@ -0,0 +1,52 @@
+"""
+Signed evidence links
+
+    pytest test_evidence_urls.py
+"""
+import time
+
+import pytest
+
+pytest.importorskip('werkzeug')
+
+from services.evidence_store import evidence_url, sign_evidence_path, verify_evidence_signature
+
+PATH = 'ab/cd/abcd1234.jpg'
+
+
+def parse(query):
+    return dict(part.split('=', 1) for part in query.split('&'))
+
+
+def test_signature_round_trip():
+    params = parse(sign_evidence_path(PATH, ttl=300))
+    assert verify_evidence_signature(PATH, params['exp'], params['sig'])
+
+
+def test_legacy_path_shares_signature():
+    params = parse(sign_evidence_path('/uploads/evidence/' + PATH, ttl=300))
+    assert verify_evidence_signature(PATH, params['exp'], params['sig'])
+
+
+def test_signature_bound_to_path():
+    params = parse(sign_evidence_path(PATH, ttl=300))
+    assert not verify_evidence_signature('ab/cd/other.jpg', params['exp'], params['sig'])
+
+
+def test_tampered_expiry_rejected():
+    params = parse(sign_evidence_path(PATH, ttl=300))
+    assert not verify_evidence_signature(PATH, int(params['exp']) + 300, params['sig'])
+
+
+def test_expired_or_malformed_rejected():
+    expired = int(time.time()) - 1
+    assert not verify_evidence_signature(PATH, expired, 'sig')
+    assert not verify_evidence_signature(PATH, 'soon', 'sig')
+    assert not verify_evidence_signature(PATH, None, None)
+
+
+def test_links_stable_within_ttl_window():
+    assert sign_evidence_path(PATH, ttl=3600) == sign_evidence_path(PATH, ttl=3600)
+    url = evidence_url(PATH)
+    assert url.startswith(f'/api/proctoring/evidence/{PATH}?exp=')
+    assert evidence_url(None) is None
@@ -0,0 +1,99 @@
+"""
+Version-checked lookups in ExamCache
+
+Runs against in-memory stand-ins for the exams and exam_questions
+collections, so no MongoDB is needed.
+
+    pytest test_exam_cache.py
+"""
+import pytest
+
+pytest.importorskip('flask_pymongo')
+from bson import ObjectId
+
+import database
+from services.exam_cache import ExamCache
+
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda d: d.get(key, 0) * direction))
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.finds = 0
+
+    def _matches(self, doc, query):
+        return all(doc.get(k) == v for k, v in query.items())
+
+    def find_one(self, query, projection=None):
+        self.finds += 1
+        return next((dict(d) for d in self.docs if self._matches(d, query)), None)
+
+    def find(self, query):
+        return FakeCursor(dict(d) for d in self.docs if self._matches(d, query))
+
+    def update_one(self, query, update):
+        for doc in self.docs:
+            if self._matches(doc, query):
+                for field, amount in update.get('$inc', {}).items():
+                    doc[field] = doc.get(field, 0) + amount
+                for field, value in update.get('$set', {}).items():
+                    doc[field] = value
+
+
+class FakeDb:
+    def __init__(self, exam_id):
+        self.exams = FakeCollection([{'_id': ObjectId(exam_id), 'title': 'Algebra'}])
+        self.exam_questions = FakeCollection([
+            {'_id': ObjectId(), 'exam_id': exam_id, 'question_text': 'x?', 'order': 1,
+             'correct_answer': 'A', 'marks': 1}
+        ])
+
+
+@pytest.fixture
+def exam_id():
+    return str(ObjectId())
+
+
+@pytest.fixture
+def db(monkeypatch, exam_id):
+    fake = FakeDb(exam_id)
+    monkeypatch.setattr(database.mongo, 'db', fake, raising=False)
+    return fake
+
+
+def test_second_lookup_is_a_hit(db, exam_id):
+    cache = ExamCache()
+    first = cache.get(exam_id)
+    assert cache.get(exam_id) is first
+    stats = cache.stats()
+    assert (stats['misses'], stats['hits']) == (1, 1)
+
+
+def test_invalidate_bumps_version_and_recompiles(db, exam_id):
+    cache = ExamCache()
+    assert cache.get(exam_id)['version'] == 0
+
+    cache.invalidate(exam_id)
+    assert db.exams.docs[0]['cache_version'] == 1
+    assert cache.get(exam_id)['version'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_edit_from_another_process_is_seen(db, exam_id):
+    cache = ExamCache()
+    cache.get(exam_id)
+    db.exam_questions.docs[0]['correct_answer'] = 'B'
+    # Another process invalidated: only the exam document changed here
+    db.exams.docs[0]['cache_version'] = 1
+
+    compiled = cache.get(exam_id)
+    assert compiled['version'] == 1
+    assert [k['correct_answer'] for k in compiled['answer_key'].values()] == ['B']
+
+
+def test_missing_exam_returns_none(db):
+    assert ExamCache().get(str(ObjectId())) is None
@@ -0,0 +1,67 @@
+"""
+Adaptive sampling in FrameChangeDetector
+
+    pytest test_frame_change.py
+"""
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from ai_models.change_detector import FrameChangeDetector
+
+DETECTORS = frozenset({'phone', 'face'})
+QUIET = {'phone': {'phone_detected': False}, 'face': {'face_detected': True}}
+
+
+def gray(value=0):
+    return np.full((36, 64), value, dtype=np.uint8)
+
+
+def analyse(detector, frame, results=QUIET):
+    should, score = detector.check(frame, DETECTORS)
+    if should:
+        detector.update(frame, DETECTORS, results, score)
+    else:
+        detector.skipped()
+    return should
+
+
+def test_first_frame_is_analysed():
+    detector = FrameChangeDetector(change_threshold=8, max_interval=8)
+    assert detector.check(gray(), DETECTORS) == (True, None)
+
+
+def test_quiet_frames_double_interval_up_to_max():
+    detector = FrameChangeDetector(change_threshold=8, max_interval=8)
+    intervals = []
+    for _ in range(30):
+        if analyse(detector, gray()):
+            intervals.append(detector.interval)
+    assert intervals[:4] == [2, 4, 8, 8]
+    assert detector.stats['skipped'] > detector.stats['analyzed']
+
+
+def test_motion_resets_interval():
+    detector = FrameChangeDetector(change_threshold=8, max_interval=8)
+    for _ in range(10):
+        analyse(detector, gray())
+    assert detector.interval == 8
+
+    assert analyse(detector, gray(100))
+    assert detector.interval == 1
+
+
+def test_alert_resets_interval():
+    detector = FrameChangeDetector(change_threshold=8, max_interval=8)
+    for _ in range(10):
+        analyse(detector, gray())
+    detector.update(gray(), DETECTORS, {'phone': {'phone_detected': True}}, 0.0)
+    assert detector.interval == 1
+
+
+def test_changed_detector_set_forces_analysis():
+    detector = FrameChangeDetector(change_threshold=8, max_interval=8)
+    analyse(detector, gray())
+    should, _ = detector.check(gray(), frozenset({'phone'}))
+    assert should
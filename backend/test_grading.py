@@ -0,0 +1,52 @@
+"""
+Scoring rules in grade_answers
+
+    pytest test_grading.py
+"""
+import pytest
+
+pytest.importorskip('bson')
+
+from services.grading import grade_answers
+
+KEY = {
+    'q1': {'correct_answer': 'A', 'marks': 2},
+    'q2': {'correct_answer': 'B', 'marks': 2},
+    'q3': {'correct_answer': 'C', 'marks': 1},
+}
+
+
+def answer(question_id, selected):
+    return {'question_id': question_id, 'selected_answer': selected}
+
+
+def test_correct_wrong_and_blank():
+    result = grade_answers(KEY, [answer('q1', 'A'), answer('q2', 'D'), answer('q3', '')])
+    assert result['obtained_marks'] == 2
+    assert (result['correct'], result['incorrect'], result['unanswered']) == (1, 1, 1)
+
+
+def test_negative_marking_deducts_per_wrong_answer():
+    result = grade_answers(KEY, [answer('q1', 'A'), answer('q2', 'D'), answer('q3', 'D')],
+                           negative_marking=0.5)
+    assert result['obtained_marks'] == 1
+    marks = {g['question_id']: g['marks_awarded'] for g in result['graded']}
+    assert marks == {'q1': 2, 'q2': -0.5, 'q3': -0.5}
+
+
+def test_total_never_below_zero():
+    result = grade_answers(KEY, [answer('q2', 'D'), answer('q3', 'D')], negative_marking=1)
+    assert result['obtained_marks'] == 0
+
+
+def test_last_duplicate_answer_wins():
+    result = grade_answers(KEY, [answer('q1', 'B'), answer('q1', 'A')])
+    assert result['correct'] == 1
+    assert result['incorrect'] == 0
+    assert len(result['graded']) == 1
+
+
+def test_unknown_questions_ignored():
+    result = grade_answers(KEY, [answer('q9', 'A'), answer('q1', 'A')])
+    assert result['obtained_marks'] == 2
+    assert [g['question_id'] for g in result['graded']] == ['q1']
@@ -0,0 +1,197 @@
+"""
+Query plan regression checks
+
+Two layers:
+
+- Static checks (always run): every query shape below has a registered
+  index in indexes.py whose leading key it filters on.
+- Plan checks: the same queries, and the real aggregation pipelines the
+  routes build, are run through explain() against a scratch database
+  with the registered indexes, failing on any collection scan. These
+  need a real mongod (mongomock has no query planner); set
+  MONGO_TEST_URI to point at one, otherwise they are skipped.
+
+    MONGO_TEST_URI=mongodb://localhost:27017 pytest test_query_plans.py
+
+ensure_indexes does not raise when a collection's indexes cannot be
+built. On an existing deployment, duplicate users.email values block the
+unique index and leave users without any of its indexes; check the
+startup log or run `python indexes.py` after upgrading.
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+pymongo = pytest.importorskip('pymongo')
+from bson import ObjectId
+
+from indexes import INDEXES, ensure_indexes
+from services.result_reports import violations_by_student_pipeline
+from services.session_monitor import recent_violations_pipeline
+
+TEST_DB = 'exam_proctoring_query_plans'
+
+EXAM_ID = str(ObjectId())
+STUDENT_ID = str(ObjectId())
+EXAMINER_ID = str(ObjectId())
+SESSION_ID = str(ObjectId())
+NOW = datetime.utcnow()
+
+# (description, collection, filter, sort) — one entry per query shape the routes issue
+FIND_QUERIES = [
+    ('active session of a student', 'proctoring_sessions', {'student_id': STUDENT_ID, 'status': 'active'}, None),
+    ('monitor: active sessions of exams', 'proctoring_sessions',
+     {'exam_id': {'$in': [EXAM_ID]}, 'status': 'active'}, [('_id', 1)]),
+    ('monitor: sessions changed since cursor', 'proctoring_sessions',
+     {'exam_id': {'$in': [EXAM_ID]}, 'updated_at': {'$gt': NOW - timedelta(minutes=1)}}, [('_id', 1)]),
+    ('report: sessions of students in exams', 'proctoring_sessions',
+     {'exam_id': {'$in': [EXAM_ID]}, 'student_id': {'$in': [STUDENT_ID]}}, None),
+    ('session violations', 'violations', {'session_id': SESSION_ID}, [('created_at', -1)]),
+    ('violation cooldown', 'violations',
+     {'session_id': SESSION_ID, 'violation_type': 'phone_detected', 'created_at': {'$gte': NOW}}, None),
+    ('student violations in exam', 'violations', {'student_id': STUDENT_ID, 'exam_id': EXAM_ID}, [('created_at', -1)]),
+    ('exam violation summary', 'violations', {'exam_id': EXAM_ID}, [('created_at', -1)]),
+    ('result of a student', 'exam_results', {'student_id': STUDENT_ID, 'exam_id': EXAM_ID}, None),
+    ('exam results listing', 'exam_results', {'exam_id': EXAM_ID}, [('submitted_at', -1), ('_id', -1)]),
+    ('student results listing', 'exam_results', {'student_id': STUDENT_ID}, [('submitted_at', -1), ('_id', -1)]),
+    ('examiner dashboard result count', 'exam_results', {'exam_id': {'$in': [EXAM_ID]}}, None),
+    ('violations referencing evidence', 'violations',
+     {'evidence_path': {'$in': ['ab/cd/abcd.jpg', '/uploads/evidence/ab/cd/abcd.jpg']}}, None),
+    ('expired evidence', 'evidence_blobs', {'expires_at': {'$lte': NOW}}, [('expires_at', 1)]),
+    ('uncompressed evidence', 'evidence_blobs',
+     {'compressed_at': None, 'created_at': {'$lt': NOW}, 'source_ext': {'$in': ['jpg', 'png']}}, None),
+    ('answer to a question', 'student_answers', {'student_id': STUDENT_ID, 'question_id': str(ObjectId())}, None),
+    ('answers in an exam', 'student_answers', {'student_id': STUDENT_ID, 'exam_id': EXAM_ID}, None),
+    ('exam questions', 'exam_questions', {'exam_id': EXAM_ID}, [('order', 1)]),
+    ('enrollment count', 'exam_enrollments', {'exam_id': {'$in': [EXAM_ID]}}, None),
+    ('examiner exams', 'exams', {'examiner_id': EXAMINER_ID}, [('created_at', -1)]),
+    ('published exams', 'exams', {'is_published': True}, [('created_at', -1)]),
+    ('examiner notifications', 'examiner_notifications', {'examiner_id': EXAMINER_ID}, [('created_at', -1)]),
+    ('notifications page', 'examiner_notifications',
+     {'examiner_id': EXAMINER_ID, '_id': {'$lt': ObjectId()}}, [('_id', -1)]),
+    ('unread notifications page', 'examiner_notifications',
+     {'examiner_id': EXAMINER_ID, 'is_read': False}, [('_id', -1)]),
+    ('session analytics', 'session_analytics', {'session_id': SESSION_ID}, None),
+    ('frame results after cursor', 'frame_results',
+     {'session_id': SESSION_ID, '_id': {'$gt': ObjectId()}}, [('_id', 1)]),
+    ('submission by idempotency key', 'submissions', {'idempotency_key': 'session:x'}, None),
+    ('stale queued submissions', 'submissions',
+     {'status': 'queued', 'created_at': {'$lt': NOW}}, None),
+    ('user by email', 'users', {'email': 'student@example.com'}, None),
+]
+
+# (description, collection, pipeline) — built by the same functions the routes call.
+# explain() only shows the outer plan of a $lookup; its per-session sort/limit into
+# violations is the 'session violations' find above.
+AGGREGATE_QUERIES = [
+    ('monitor: recent violations per session', 'proctoring_sessions',
+     recent_violations_pipeline([ObjectId(SESSION_ID)])),
+    ('report: violations per student', 'violations',
+     violations_by_student_pipeline([EXAM_ID], [STUDENT_ID])),
+]
+
+
+def _filter_fields(query):
+    """Top-level fields a filter constrains, including those inside $or branches"""
+    fields = set()
+    for key, value in query.items():
+        if key == '$or':
+            for branch in value:
+                fields |= _filter_fields(branch)
+        elif not key.startswith('$'):
+            fields.add(key)
+    return fields
+
+
+def _has_leading_index(collection, fields):
+    if '_id' in fields:
+        return True
+    return any(keys[0][0] in fields for keys, _ in INDEXES.get(collection, []))
+
+
+@pytest.mark.parametrize('description,collection,query,sort', FIND_QUERIES, ids=[q[0] for q in FIND_QUERIES])
+def test_find_has_registered_index(description, collection, query, sort):
+    assert _has_leading_index(collection, _filter_fields(query)), \
+        f'{description}: no index in indexes.py leads with any of {sorted(_filter_fields(query))}'
+
+
+@pytest.mark.parametrize('description,collection,pipeline', AGGREGATE_QUERIES, ids=[q[0] for q in AGGREGATE_QUERIES])
+def test_aggregate_has_registered_index(description, collection, pipeline):
+    match = pipeline[0].get('$match')
+    assert match is not None, f'{description}: pipeline does not start with $match'
+    assert _has_leading_index(collection, _filter_fields(match)), \
+        f'{description}: no index in indexes.py leads with any of {sorted(_filter_fields(match))}'
+
+
+@pytest.fixture(scope='module')
+def db():
+    uri = os.getenv('MONGO_TEST_URI')
+    if not uri:
+        pytest.skip('MONGO_TEST_URI not set')
+    client = pymongo.MongoClient(uri, serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command('ping')
+    except Exception as e:
+        pytest.skip(f'mongod unavailable: {e}')
+
+    database = client[TEST_DB]
+    client.drop_database(TEST_DB)
+    _seed(database)
+    ensure_indexes(database)
+    yield database
+    client.drop_database(TEST_DB)
+    client.close()
+
+
+def _seed(database):
+    """A few documents per collection, so plans are chosen against real data"""
+    for name in INDEXES:
+        docs = []
+        for i in range(20):
+            docs.append({
+                'exam_id': str(ObjectId()), 'student_id': str(ObjectId()), 'examiner_id': str(ObjectId()),
+                'session_id': str(ObjectId()), 'question_id': str(ObjectId()), 'status': 'completed',
+                'violation_type': 'tab_switch', 'is_published': bool(i % 2), 'order': i,
+                'email': f'user{i}@example.com', 'idempotency_key': f'key-{i}',
+                'evidence_path': f'ab/cd/{i}.jpg',
+                'created_at': NOW, 'updated_at': NOW, 'submitted_at': NOW, 'claimed_at': NOW,
+                'expires_at': NOW + timedelta(hours=i)
+            })
+        database[name].insert_many(docs)
+
+
+def _winning_stages(explain):
+    """Stage names of every winning plan in an explain document"""
+    stages = []
+
+    def walk(node, in_winning):
+        if isinstance(node, dict):
+            if in_winning and 'stage' in node:
+                stages.append(node['stage'])
+            for key, value in node.items():
+                walk(value, in_winning or key == 'winningPlan')
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_winning)
+
+    walk(explain, False)
+    return stages
+
+
+@pytest.mark.parametrize('description,collection,query,sort', FIND_QUERIES, ids=[q[0] for q in FIND_QUERIES])
+def test_find_uses_index(db, description, collection, query, sort):
+    cursor = db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    stages = _winning_stages(cursor.explain())
+    assert stages, f'{description}: no winning plan in explain output'
+    assert 'COLLSCAN' not in stages, f'{description}: collection scan ({stages})'
+
+
+@pytest.mark.parametrize('description,collection,pipeline', AGGREGATE_QUERIES, ids=[q[0] for q in AGGREGATE_QUERIES])
+def test_aggregate_uses_index(db, description, collection, pipeline):
+    explain = db.command('aggregate', collection, pipeline=pipeline, explain=True, allowDiskUse=True)
+    stages = _winning_stages(explain)
+    assert stages, f'{description}: no winning plan in explain output'
+    assert 'COLLSCAN' not in stages, f'{description}: collection scan ({stages})'
@@ -0,0 +1,81 @@
+"""
+Batching and retry in ViolationBuffer
+
+Writes go to an in-memory stand-in for the violations collection.
+
+    pytest test_violation_buffer.py
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('flask_pymongo')
+
+import database
+from services.violation_buffer import ViolationBuffer
+
+
+class FakeViolations:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def insert_many(self, docs, ordered=True):
+        if self.fail:
+            raise ConnectionError('database unavailable')
+        self.batches.append(list(docs))
+
+
+class FakeDb:
+    def __init__(self):
+        self.violations = FakeViolations()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDb()
+    monkeypatch.setattr(database.mongo, 'db', fake, raising=False)
+    return fake
+
+
+def violation(created_at=None):
+    return {'session_id': 's1', 'violation_type': 'phone_detected',
+            'created_at': created_at or datetime.utcnow()}
+
+
+def test_add_returns_id_before_write(db):
+    buffer = ViolationBuffer(batch_size=10, flush_interval=60)
+    violation_id = buffer.add(violation())
+    assert db.violations.batches == []
+    assert buffer.flush() == 1
+    assert db.violations.batches[0][0]['_id'] == violation_id
+
+
+def test_full_batch_flushes(db):
+    buffer = ViolationBuffer(batch_size=3, flush_interval=60)
+    for _ in range(3):
+        buffer.add(violation())
+    assert [len(b) for b in db.violations.batches] == [3]
+    assert buffer.stats()['pending'] == 0
+
+
+def test_failed_write_is_retried(db):
+    buffer = ViolationBuffer(batch_size=10, flush_interval=60)
+    buffer.add(violation())
+    db.violations.fail = True
+    assert buffer.flush() == 0
+    assert buffer.stats()['pending'] == 1
+
+    db.violations.fail = False
+    assert buffer.flush() == 1
+    assert buffer.stats()['written'] == 1
+
+
+def test_has_pending_sees_unwritten_violations(db):
+    buffer = ViolationBuffer(batch_size=10, flush_interval=60)
+    now = datetime.utcnow()
+    buffer.add(violation(now))
+    assert buffer.has_pending('s1', 'phone_detected', now - timedelta(seconds=5))
+    assert not buffer.has_pending('s1', 'phone_detected', now + timedelta(seconds=5))
+    buffer.flush()
+    assert not buffer.has_pending('s1', 'phone_detected', now - timedelta(seconds=5))
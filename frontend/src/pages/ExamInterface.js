@@ -37,6 +37,7 @@ function ExamInterface() {
   const timerIntervalRef = useRef(null);
   const setupVideoRef = useRef(null);
   const warningTimeoutRef = useRef(null);
+  const submissionKeyRef = useRef(null);
 
   // Load models on mount
   useEffect(() => {
@@ -328,6 +329,29 @@ function ExamInterface() {
     }
   };
 
+  // Submissions are graded in the background: post once, then poll until the result is ready
+  const submitAndWaitForResult = async (submissionData) => {
+    if (!submissionKeyRef.current) {
+      submissionKeyRef.current = `${examId}-${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    }
+    let response = await api.post('/proctoring/submit', {
+      ...submissionData,
+      idempotency_key: submissionKeyRef.current
+    });
+
+    const deadline = Date.now() + 5 * 60 * 1000;
+    while (response.status === 202 && response.data.status !== 'failed' && Date.now() < deadline) {
+      const retryAfter = parseInt(response.headers?.['retry-after'], 10) || 2;
+      await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+      response = await api.get(`/proctoring/submissions/${response.data.submission_id}`);
+    }
+    // Not graded yet: the result page keeps polling and shows a "still grading" state
+    return {
+      result: response.data.result,
+      grading: response.status === 202 ? response.data.submission_id : null
+    };
+  };
+
   const handleSubmitExam = async () => {
     try {
       setSessionStatus('submitting');
@@ -340,8 +364,8 @@ function ExamInterface() {
         }))
       };
 
-      const response = await api.post('/proctoring/submit', submissionData);
-      navigate(`/result/${examId}`, { state: { result: response.data.result } });
+      const { result, grading } = await submitAndWaitForResult(submissionData);
+      navigate(`/result/${examId}`, { state: { result, grading } });
     } catch (error) {
       console.error('Submit error:', error);
       showToast('Error submitting exam: ' + (error.response?.data?.error || error.message), 'error');
@@ -362,8 +386,8 @@ function ExamInterface() {
         auto_submitted: true
       };
 
-      const response = await api.post('/proctoring/submit', submissionData);
-      navigate(`/result/${examId}`, { state: { result: response.data.result, autoSubmitted: true } });
+      const { result, grading } = await submitAndWaitForResult(submissionData);
+      navigate(`/result/${examId}`, { state: { result, grading, autoSubmitted: true } });
     } catch (error) {
       console.error('Auto-submit error:', error);
       navigate(`/result/${examId}`);
@@ -268,7 +268,7 @@ function ExamResults() {
                             <div className="evidence-header">
                               <span className="evidence-label">📸 Evidence:</span>
                               <a
-                                href={`${API_BASE}${violation.evidence_url}?token=${token}`}
+                                href={`${API_BASE}${violation.evidence_url}`}
                                 target="_blank"
                                 rel="noopener noreferrer"
                                 className="evidence-link-small"
@@ -278,7 +278,8 @@ function ExamResults() {
                             </div>
                             <div className="evidence-preview">
                               <img
-                                src={`${API_BASE}${violation.evidence_url}?token=${token}`}
+                                src={`${API_BASE}${violation.thumbnail_url || violation.evidence_url}`}
+                                loading="lazy"
                                 alt={`Evidence for ${violation.type}`}
                                 className="evidence-image"
                                 onError={(e) => {
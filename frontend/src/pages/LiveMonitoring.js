@@ -1,8 +1,9 @@
 /* eslint-disable no-unused-vars, no-console, react-hooks/exhaustive-deps, no-useless-escape */
 import API_BASE from '../config';
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { useNavigate } from 'react-router-dom';
+import { connectMonitoring } from '../services/realtime';
 import '../styles/LiveMonitoring.css';
 
 function LiveMonitoring() {
@@ -12,6 +13,11 @@ function LiveMonitoring() {
   const [selectedSession, setSelectedSession] = useState(null);
   const [loading, setLoading] = useState(true);
   const [autoRefresh, setAutoRefresh] = useState(true);
+  // Cursor from the last full load; later polls only fetch sessions that changed
+  const cursorRef = useRef(null);
+  // True while the push channel is up and the server fans events out across processes;
+  // only then does polling merely back it up
+  const [live, setLive] = useState(false);
 
   useEffect(() => {
     if (!user || user.role !== 'examiner') {
@@ -21,22 +27,67 @@ function LiveMonitoring() {
 
     fetchActiveSessions();
 
-    // Auto-refresh every 5 seconds
+    // Auto-refresh every 5 seconds, or every minute while events are pushed
     let interval;
     if (autoRefresh) {
       interval = setInterval(() => {
         fetchActiveSessions();
-      }, 5000);
+      }, live ? 60000 : 5000);
     }
 
     return () => {
       if (interval) clearInterval(interval);
     };
-  }, [autoRefresh, user, navigate]);
+  }, [autoRefresh, live, user, navigate]);
+
+  useEffect(() => {
+    if (!user || user.role !== 'examiner' || !token) return undefined;
+
+    const updateSession = (sessionId, update) => {
+      setActiveSessions(prev => prev.map(s => (s.session_id === sessionId ? update(s) : s)));
+    };
+    const removeSession = ({ session_id: sessionId }) => {
+      setActiveSessions(prev => prev.filter(s => s.session_id !== sessionId));
+    };
+
+    const socket = connectMonitoring(token, {
+      onConnect: () => {
+        // Catch up on anything missed while disconnected
+        fetchActiveSessions();
+      },
+      onWelcome: ({ fanout }) => setLive(!!fanout),
+      onDisconnect: () => setLive(false),
+      violation: ({ session_id: sessionId, violation }) => {
+        const pushed = {
+          ...violation,
+          evidence_url: violation.evidence_url ? `${API_BASE}${violation.evidence_url}` : null,
+          thumbnail_url: violation.thumbnail_url ? `${API_BASE}${violation.thumbnail_url}` : null
+        };
+        updateSession(sessionId, s => ({ ...s, violations: [pushed, ...s.violations].slice(0, 5) }));
+        setSelectedSession(prev => (prev?.session?.id === sessionId
+          ? { ...prev, violations: [pushed, ...prev.violations], violation_count: (prev.violation_count || 0) + 1 }
+          : prev));
+      },
+      trust_score: ({ session_id: sessionId, trust_score: trustScore }) => {
+        updateSession(sessionId, s => ({ ...s, trust_score: trustScore }));
+        setSelectedSession(prev => (prev?.session?.id === sessionId
+          ? { ...prev, session: { ...prev.session, trust_score: trustScore } }
+          : prev));
+      },
+      // New sessions carry student and exam details, which the delta poll fills in
+      session_started: () => fetchActiveSessions(),
+      session_ended: removeSession,
+      auto_submitted: removeSession
+    });
+
+    return () => socket.disconnect();
+  }, [token, user]);
 
   const fetchActiveSessions = async () => {
     try {
-      const response = await fetch(`${API_BASE}/api/proctoring/monitor/active-sessions`, {
+      const params = new URLSearchParams({ limit: '500' });
+      if (cursorRef.current) params.set('updated_since', cursorRef.current);
+      const response = await fetch(`${API_BASE}/api/proctoring/monitor/active-sessions?${params}`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }
@@ -44,7 +95,20 @@ function LiveMonitoring() {
 
       if (response.ok) {
         const data = await response.json();
-        setActiveSessions(data.active_sessions || []);
+        if (data.delta) {
+          const ended = new Set(data.ended_session_ids || []);
+          const changed = new Map((data.active_sessions || []).map(s => [s.session_id, s]));
+          setActiveSessions(prev => [
+            ...prev
+              .filter(s => !ended.has(s.session_id))
+              .map(s => changed.get(s.session_id) || s),
+            ...[...changed.values()].filter(s => !prev.some(p => p.session_id === s.session_id))
+          ]);
+        } else {
+          setActiveSessions(data.active_sessions || []);
+        }
+        // A truncated page cannot be patched incrementally; reload everything next time
+        cursorRef.current = data.has_more ? null : data.next_cursor;
       }
     } catch (error) {
       console.error('Error fetching active sessions:', error);
@@ -122,7 +186,7 @@ function LiveMonitoring() {
               checked={autoRefresh}
               onChange={(e) => setAutoRefresh(e.target.checked)}
             />
-            Auto-refresh (5s)
+            {live ? 'Live updates' : 'Auto-refresh (5s)'}
           </label>
           <button onClick={fetchActiveSessions} className="btn-refresh">
             🔄 Refresh Now
@@ -233,15 +297,17 @@ function LiveMonitoring() {
                               <strong style={{ fontSize: '12px', color: '#4a5568' }}>📸 Evidence:</strong>
                             </div>
                             <div className="evidence-preview">
-                              {violation.evidence_url.match(/\.(jpg|jpeg|png|gif)$/i) ? (
+                              {violation.evidence_url.match(/\.(jpg|jpeg|png|gif|webp)(\?|$)/i) ? (
                                 <img
-                                  src={violation.evidence_url}
+                                  src={violation.thumbnail_url || violation.evidence_url}
                                   alt={`Evidence`}
                                   style={{ maxWidth: '100%', maxHeight: '200px', borderRadius: '4px' }}
                                 />
-                              ) : violation.evidence_url.match(/\.(mp4|avi|mov|webm)$/i) ? (
+                              ) : violation.evidence_url.match(/\.(mp4|avi|mov|webm)(\?|$)/i) ? (
                                 <video
                                   src={violation.evidence_url}
+                                  poster={violation.thumbnail_url || undefined}
+                                  preload="none"
                                   controls
                                   style={{ maxWidth: '100%', maxHeight: '200px', borderRadius: '4px' }}
                                 />
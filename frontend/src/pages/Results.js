@@ -22,15 +22,53 @@ function Results() {
   const autoSubmitted = location.state?.autoSubmitted;
   const autoSubmitReason = location.state?.reason;
   const resultData = location.state?.result;
+  const gradingSubmissionId = location.state?.grading;
+  const [grading, setGrading] = useState(!resultData && !!gradingSubmissionId);
 
   useEffect(() => {
     if (examId && resultData) {
       setCurrentResult({ ...resultData, exam_id: examId });
       setLoading(false);
+    } else if (grading) {
+      setLoading(false);
     } else {
       fetchResults();
     }
-  }, [examId, resultData]);
+  }, [examId, resultData, grading]);
+
+  // Submission still being graded: keep polling until the result is stored
+  useEffect(() => {
+    if (!grading) return undefined;
+    let cancelled = false;
+    let timer;
+    const poll = async () => {
+      try {
+        const res = await fetch(`${API_BASE}/api/proctoring/submissions/${gradingSubmissionId}`, {
+          headers: { 'Authorization': `Bearer ${token}` }
+        });
+        const data = await res.json();
+        if (cancelled) return;
+        if (res.status === 200 && data.result) {
+          setCurrentResult({ ...data.result, exam_id: examId });
+          setGrading(false);
+          return;
+        }
+        if (data.status === 'failed' || res.status >= 400) {
+          setError('Grading failed. Please contact your examiner.');
+          setGrading(false);
+          return;
+        }
+        timer = setTimeout(poll, (parseInt(res.headers.get('Retry-After'), 10) || 5) * 1000);
+      } catch {
+        if (!cancelled) timer = setTimeout(poll, 5000);
+      }
+    };
+    poll();
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [grading, gradingSubmissionId]);
 
   const fetchResults = async () => {
     try {
@@ -78,6 +116,14 @@ function Results() {
 
   if (loading) return <div className="results-loading">Loading results...</div>;
 
+  if (grading) {
+    return (
+      <div className="results-loading">
+        Your exam was submitted and is still being graded. This page updates when the result is ready.
+      </div>
+    );
+  }
+
   // Single result view (after submit / auto-submit)
   if (currentResult) {
     const pct = currentResult.percentage?.toFixed(1) || '0.0';
@@ -0,0 +1,35 @@
+/* eslint-disable no-unused-vars, no-console */
+import { io } from 'socket.io-client';
+import API_BASE from '../config';
+
+// Open the examiner monitoring channel and join the rooms of all the examiner's exams.
+// Events: violation, trust_score, session_started, session_ended, auto_submitted, notification
+export function connectMonitoring(token, handlers = {}) {
+  const socket = io(API_BASE || undefined, {
+    transports: ['websocket'],
+    auth: { token }
+  });
+
+  socket.on('connect', () => {
+    socket.emit('join_exam', {});
+    if (handlers.onConnect) handlers.onConnect();
+  });
+  // fanout: false means events from background workers are not delivered; keep polling
+  socket.on('welcome', (payload) => {
+    if (handlers.onWelcome) handlers.onWelcome(payload || {});
+  });
+  socket.on('disconnect', () => {
+    if (handlers.onDisconnect) handlers.onDisconnect();
+  });
+  socket.on('connect_error', (error) => {
+    console.warn('Monitoring channel unavailable:', error.message);
+    if (handlers.onDisconnect) handlers.onDisconnect();
+  });
+
+  ['violation', 'trust_score', 'session_started', 'session_ended', 'auto_submitted', 'notification']
+    .forEach((event) => {
+      if (handlers[event]) socket.on(event, handlers[event]);
+    });
+
+  return socket;
+}